@@ -0,0 +1,194 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from app.models.schemas import QueryPriority
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is admitted first
+PRIORITY_RANK = {
+    QueryPriority.CRITICAL: 0,
+    QueryPriority.NORMAL: 1,
+    QueryPriority.LOW: 2,
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a query is shed instead of being admitted."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    """A query waiting for admission."""
+
+    def __init__(self, priority: QueryPriority, can_shed: bool):
+        self.priority = priority
+        self.can_shed = can_shed
+        self.rejected = False
+
+
+class AdmissionController:
+    """Priority admission control with a token-bucket rate limit and load shedding."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        rate_per_second: float = 2.0,
+        burst: int = 10,
+        max_queue_depth: int = 100,
+        max_wait_seconds: float = 30.0
+    ):
+        """
+        Initialize the admission controller.
+
+        Args:
+            max_concurrent: Maximum number of admitted queries running at once
+            rate_per_second: Token refill rate, matched to the provider quota
+            burst: Token bucket capacity
+            max_queue_depth: Waiting queries beyond this are shed
+            max_wait_seconds: Waiting queries are shed after this long
+        """
+        self.max_concurrent = max_concurrent
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._stats = {
+            priority.value: {"admitted": 0, "rejected": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for priority in QueryPriority
+        }
+
+    @contextmanager
+    def admit(self, priority: QueryPriority, can_shed: bool = True) -> Iterator[None]:
+        """
+        Hold an admission slot for the duration of the block.
+
+        Args:
+            priority: Priority class of the query
+            can_shed: False for work that must wait rather than be rejected
+
+        Raises:
+            AdmissionRejected: If the query is shed
+        """
+        self.acquire(priority, can_shed)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, priority: QueryPriority, can_shed: bool = True) -> None:
+        """Wait for an admission slot; pair with release()."""
+        ticket = _Ticket(priority, can_shed)
+        start = time.monotonic()
+
+        with self._cond:
+            if can_shed and self._queue_depth() >= self.max_queue_depth:
+                self._shed_for(ticket)
+
+            heapq.heappush(self._queue, (PRIORITY_RANK[priority], next(self._sequence), ticket))
+
+            while True:
+                if ticket.rejected:
+                    self._record_rejection(priority)
+                    raise AdmissionRejected("Shed for higher-priority queries", retry_after=self._retry_after())
+
+                self._refill()
+                if self._queue[0][2] is ticket and self._active < self.max_concurrent and self._tokens >= 1:
+                    heapq.heappop(self._queue)
+                    self._tokens -= 1
+                    self._active += 1
+                    self._record_admission(priority, time.monotonic() - start)
+                    # Let the next waiter re-check now that the head changed
+                    self._cond.notify_all()
+                    return
+
+                waited = time.monotonic() - start
+                if can_shed and waited >= self.max_wait_seconds:
+                    self._remove(ticket)
+                    self._record_rejection(priority)
+                    raise AdmissionRejected("Timed out waiting for admission", retry_after=self._retry_after())
+
+                timeout = self.max_wait_seconds - waited if can_shed else None
+                if self._tokens < 1:
+                    token_wait = (1 - self._tokens) / self.rate_per_second
+                    timeout = token_wait if timeout is None else min(timeout, token_wait)
+                self._cond.wait(timeout)
+
+    def release(self) -> None:
+        """Release an admission slot."""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, active count and per-priority wait metrics."""
+        with self._cond:
+            self._refill()
+            priorities = {}
+            for name, stats in self._stats.items():
+                admitted = stats["admitted"]
+                priorities[name] = {
+                    **stats,
+                    "avg_wait_seconds": stats["total_wait_seconds"] / admitted if admitted else 0.0
+                }
+            return {
+                "queue_depth": self._queue_depth(),
+                "active": self._active,
+                "tokens_available": round(self._tokens, 2),
+                "priorities": priorities
+            }
+
+    def _queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _shed_for(self, ticket: _Ticket) -> None:
+        """Make room for a new ticket by shedding the lowest-priority waiter, or reject it."""
+        sheddable = [entry for entry in self._queue if entry[2].can_shed and not entry[2].rejected]
+        if sheddable:
+            worst = max(sheddable, key=lambda entry: (entry[0], entry[1]))
+            if worst[0] > PRIORITY_RANK[ticket.priority]:
+                worst[2].rejected = True
+                self._remove(worst[2])
+                self._cond.notify_all()
+                logger.warning(f"Shed queued {worst[2].priority.value} query for {ticket.priority.value} query")
+                return
+
+        self._record_rejection(ticket.priority)
+        raise AdmissionRejected("Admission queue is full", retry_after=self._retry_after())
+
+    def _remove(self, ticket: _Ticket) -> None:
+        self._queue = [entry for entry in self._queue if entry[2] is not ticket]
+        heapq.heapify(self._queue)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+        self._last_refill = now
+
+    def _retry_after(self) -> float:
+        """Estimate how long until the queue ahead would drain."""
+        return max(1.0, self._queue_depth() / self.rate_per_second)
+
+    def _record_admission(self, priority: QueryPriority, wait: float) -> None:
+        stats = self._stats[priority.value]
+        stats["admitted"] += 1
+        stats["total_wait_seconds"] += wait
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+
+    def _record_rejection(self, priority: QueryPriority) -> None:
+        self._stats[priority.value]["rejected"] += 1
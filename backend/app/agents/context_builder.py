@@ -0,0 +1,112 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app.core.tokens import estimate_tokens
+from app.models.schemas import AlertSeverity
+from app.services.data_service import DataService
+from app.agents.fast_path import extract_equipment_id
+
+logger = logging.getLogger(__name__)
+
+
+class EquipmentContextBuilder:
+    """Build compact equipment context for agent prompts within a token budget."""
+
+    def __init__(self, data_service: DataService, max_tokens: int = 400):
+        """
+        Initialize the context builder.
+
+        Args:
+            data_service: Source of equipment, alert and maintenance data
+            max_tokens: Token budget for the packed context
+        """
+        self.data_service = data_service
+        self.max_tokens = max_tokens
+
+    def build(self, query: str, equipment_id: Optional[str] = None) -> str:
+        """
+        Build context for the equipment referenced by a query.
+
+        Sections are packed in priority order (equipment record, rollup
+        statistics, recent alerts, maintenance history) and lines that do
+        not fit in the remaining budget are dropped.
+
+        Args:
+            query: User query, scanned for equipment IDs
+            equipment_id: Equipment ID from the request, used as fallback
+
+        Returns:
+            Formatted context, or an empty string if no equipment is referenced
+        """
+        equipment_id = extract_equipment_id(query, self.data_service) or equipment_id
+        equipment = self.data_service.get_equipment(equipment_id) if equipment_id else None
+        if equipment is None:
+            return ""
+
+        alerts = self.data_service.get_alerts(equipment_id=equipment.id)
+        # Unresolved alerts first, newest first within each group
+        alerts = sorted(alerts, key=lambda a: a.resolved)
+        # All logs: the statistics are totals; history lines are trimmed by the budget
+        logs = self.data_service.get_maintenance_logs(equipment_id=equipment.id, limit=None)
+
+        now = datetime.now()
+        metrics = ", ".join(f"{name}={value:g}" for name, value in equipment.metrics.items())
+        record = [
+            f"{equipment.id} {equipment.name} ({equipment.type}, {equipment.location})",
+            f"status={equipment.status.value} health={equipment.health_score:.1f}/100",
+            f"metrics: {metrics}",
+            f"last_maintenance={equipment.last_maintenance:%Y-%m-%d} "
+            f"next_maintenance={equipment.next_maintenance:%Y-%m-%d}",
+        ]
+
+        open_alerts = [a for a in alerts if not a.resolved]
+        severity_counts = ", ".join(
+            f"{severity.value}={count}"
+            for severity in AlertSeverity
+            if (count := sum(1 for a in open_alerts if a.severity == severity))
+        )
+        stats = [
+            f"open_alerts={len(open_alerts)}" + (f" ({severity_counts})" if severity_counts else ""),
+            f"maintenance_events={len(logs)} total_cost=${sum(log.cost for log in logs):,.0f} "
+            f"days_since_maintenance={(now - equipment.last_maintenance).days}",
+        ]
+
+        alert_lines = [
+            f"{alert.timestamp:%Y-%m-%d %H:%M} [{alert.severity.value}] {alert.type}: {alert.message}"
+            + (" (resolved)" if alert.resolved else "")
+            for alert in alerts
+        ]
+        log_lines = [
+            f"{log.timestamp:%Y-%m-%d} {log.type}: {log.description} ({log.duration_hours:g}h, ${log.cost:,.0f})"
+            for log in logs
+        ]
+
+        sections = [
+            ("Equipment", record),
+            ("Statistics", stats),
+            ("Recent Alerts", alert_lines),
+            ("Maintenance History", log_lines),
+        ]
+        return self._pack(sections)
+
+    def _pack(self, sections: list[tuple[str, list[str]]]) -> str:
+        """Pack section lines in priority order until the budget is used."""
+        parts = []
+        remaining = self.max_tokens
+
+        for title, lines in sections:
+            header = f"{title}:"
+            header_cost = estimate_tokens(header)
+            packed = []
+            for line in lines:
+                line = f"- {line}"
+                cost = estimate_tokens(line) + (0 if packed else header_cost)
+                if cost > remaining:
+                    break
+                packed.append(line)
+                remaining -= cost
+            if packed:
+                parts.append("\n".join([header, *packed]))
+
+        return "\n".join(parts)
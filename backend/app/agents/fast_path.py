@@ -0,0 +1,134 @@
+import re
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app.services.data_service import DataService
+
+logger = logging.getLogger(__name__)
+
+EQUIPMENT_ID_PATTERN = re.compile(r"\b[A-Z]{2,}-\d{2,}\b")
+
+# Questions that need reasoning go through the agent graph, even when they mention a lookup
+ANALYTICAL_PATTERN = re.compile(
+    r"\b(why|cause[sd]?|analy[sz]e|explain|recommend\w*|should|how (do|to|can)|fix|"
+    r"troubleshoot\w*|diagnos\w*|predict\w*|compare|root|summar\w*|trends?|history|"
+    r"hot|cold|temperatures?|vibrat\w*|pressure|noise|noisy|leak\w*|bearings?|seals?|"
+    r"abnormal|normal|unusual|high|low|safe|risk\w*|until|over the (last|past)|since|"
+    r"levels?|wear|worn|fail\w*)\b"
+)
+
+INTENT_PATTERNS = {
+    "status": re.compile(r"\b(status|running|operational|online|offline)\b"),
+    "health": re.compile(r"\bhealth(y)?\b"),
+    "next_maintenance": re.compile(r"\bmaintenance\b"),
+    "alerts": re.compile(r"\b(alerts?|alarms?)\b"),
+}
+
+# Lookups are only answered when the whole query is one of these short templates;
+# "<eq>" stands for the equipment ID, which is optional when the request carries one
+_EQ = r"(?: (?:of|for|on) (?:the )?(?:<eq>|it|this (?:unit|machine|equipment)))?"
+_NOUN = (
+    r"(?:(?:current |operating )?status|(?:current )?health(?: score)?|"
+    r"(?:next|upcoming|scheduled) maintenance(?: date)?|(?:open |active )?(?:alerts?|alarms?))"
+)
+_NOUNS = rf"{_NOUN}(?:(?:,| and|, and) {_NOUN})*"
+LOOKUP_TEMPLATES = [
+    re.compile(rf"(?:(?:what(?:'s| is| are)|show(?: me)?|get|give me|list|check) (?:the )?)?{_NOUNS}{_EQ}"),
+    re.compile(rf"(?:(?:what(?:'s| is| are)|show(?: me)?|get|list|check) )?(?:<eq>(?:'s)?|its) {_NOUNS}"),
+    re.compile(r"is (?:<eq>|it) (?:running|operational|online|offline)"),
+    re.compile(r"how healthy is (?:<eq>|it)"),
+    re.compile(rf"when(?:'s| is) (?:the )?next maintenance{_EQ}(?: due| scheduled)?"),
+    re.compile(r"when(?:'s| is) (?:<eq>(?:'s)? next maintenance|<eq> due for maintenance)(?: due| scheduled)?"),
+    re.compile(
+        rf"(?:are there (?:any )?|any |does (?:<eq>|it) have (?:any )?)"
+        rf"(?:open |active )?(?:alerts?|alarms?){_EQ}"
+    ),
+]
+
+
+def extract_equipment_id(query: str, data_service: DataService) -> Optional[str]:
+    """Find the first known equipment ID mentioned in a query."""
+    for candidate in EQUIPMENT_ID_PATTERN.findall(query.upper()):
+        if data_service.get_equipment(candidate):
+            return candidate
+    return None
+
+
+def detect_intents(query: str) -> list[str]:
+    """
+    Detect lookup intents, or return none unless the whole query is a lookup.
+
+    A lookup keyword alone is not enough: "Is PUMP-007 running hot?" asks
+    for a diagnosis, not the status line.
+    """
+    text = query.lower()
+    if ANALYTICAL_PATTERN.search(text):
+        return []
+    # Matched on the uppercased query, like extract_equipment_id, so "pump-007" counts too
+    text = EQUIPMENT_ID_PATTERN.sub("<eq>", query.upper()).lower()
+    text = re.sub(r"\s+", " ", text).strip(" ?.!")
+    if not any(template.fullmatch(text) for template in LOOKUP_TEMPLATES):
+        return []
+    return [intent for intent, pattern in INTENT_PATTERNS.items() if pattern.search(text)]
+
+
+def answer_lookup(
+    query: str,
+    equipment_id: Optional[str],
+    data_service: DataService
+) -> Optional[dict]:
+    """
+    Answer a structured lookup question straight from equipment data.
+
+    Args:
+        query: User query
+        equipment_id: Equipment ID from the request or session, used when
+            the query names none
+        data_service: Source of equipment, alert and maintenance data
+
+    Returns:
+        Query response, or None if the query needs the agent graph
+    """
+    intents = detect_intents(query)
+    if not intents:
+        return None
+
+    # The request's ID only stands in when the query names no ID; an unknown
+    # one goes to the graph rather than answering about other equipment
+    if EQUIPMENT_ID_PATTERN.search(query.upper()):
+        equipment_id = extract_equipment_id(query, data_service)
+    equipment = data_service.get_equipment(equipment_id) if equipment_id else None
+    if equipment is None:
+        return None
+
+    lines = []
+    if "status" in intents:
+        lines.append(f"{equipment.name} ({equipment.id}) is currently {equipment.status.value}.")
+    if "health" in intents:
+        lines.append(f"Health score: {equipment.health_score:.1f}/100.")
+    if "next_maintenance" in intents:
+        days_until = (equipment.next_maintenance - datetime.now()).days
+        lines.append(
+            f"Next maintenance is scheduled for {equipment.next_maintenance:%Y-%m-%d} "
+            f"(in {days_until} days)."
+        )
+    if "alerts" in intents:
+        open_alerts = data_service.get_alerts(equipment_id=equipment.id, resolved=False)
+        if open_alerts:
+            lines.append(f"{len(open_alerts)} open alert(s):")
+            lines.extend(
+                f"- [{alert.severity.value.upper()}] {alert.type}: {alert.message}"
+                for alert in open_alerts
+            )
+        else:
+            lines.append("There are no open alerts.")
+
+    logger.info(f"Fast path answered {', '.join(intents)} for {equipment.id}")
+    return {
+        "answer": "\n".join(lines),
+        "sources": [],
+        "recommendations": [],
+        "confidence": 1.0,
+        "agent_reasoning": f"Fast path: answered {', '.join(intents)} lookup from equipment data"
+    }
@@ -0,0 +1,121 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Example utterances per route. Each route's centroid is the normalized mean
+# of its examples' embeddings.
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    # Full path: analysis, retrieval and recommendations
+    "analysis": [
+        "Why is the pump vibrating so much?",
+        "What is causing the temperature to rise on the turbine?",
+        "Analyze the efficiency drop on the compressor",
+        "Explain the pressure fluctuations we are seeing",
+        "Diagnose the high vibration alert",
+        "What should we do about the critical alert?",
+        "Is this equipment likely to fail soon?",
+        "Compare the health of the turbine and the pump",
+    ],
+    # Documentation lookup: skip the analysis LLM call
+    "retrieval": [
+        "Show me the maintenance manual",
+        "What is the startup procedure for the gas turbine?",
+        "What are the steps of the bearing replacement procedure?",
+        "What are the normal operating parameters?",
+        "What is the preventive maintenance schedule?",
+        "What does the documentation say about emergency shutdown?",
+        "Find the troubleshooting guide",
+        "What are the vibration severity levels in the guide?",
+    ],
+    # No equipment reasoning needed: go straight to synthesis
+    "direct_answer": [
+        "Hello",
+        "Thanks for the help",
+        "What can you do?",
+        "Who are you?",
+        "How do I use this assistant?",
+        "Good morning",
+    ],
+}
+
+
+class IntentRouter:
+    """Route queries by comparing their embedding to precomputed intent centroids."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        examples: Optional[Dict[str, List[str]]] = None,
+        min_similarity: float = 0.25,
+        default_intent: str = "analysis"
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            embeddings: Embedding model shared with the RAG pipeline
+            examples: Example utterances per intent
+            min_similarity: Below this similarity the default intent is used
+            default_intent: Intent used for low-confidence matches
+        """
+        self.embeddings = embeddings
+        self.examples = examples or INTENT_EXAMPLES
+        self.min_similarity = min_similarity
+        self.default_intent = default_intent
+        self.intents = list(self.examples)
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Normalized intent centroid matrix, computed once on first use."""
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._centroids = self._compute_centroids()
+        return self._centroids
+
+    def _compute_centroids(self) -> np.ndarray:
+        """Embed all examples in one batch and average them per intent."""
+        texts = [text for intent in self.intents for text in self.examples[intent]]
+        vectors = self._normalize(np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32))
+
+        centroids = []
+        offset = 0
+        for intent in self.intents:
+            count = len(self.examples[intent])
+            centroids.append(vectors[offset:offset + count].mean(axis=0))
+            offset += count
+
+        logger.info(f"Computed intent centroids for {len(self.intents)} routes")
+        return self._normalize(np.stack(centroids))
+
+    def route(self, query_embedding: List[float]) -> Tuple[str, float]:
+        """
+        Pick the route for a query embedding.
+
+        Args:
+            query_embedding: Embedding of the user query
+
+        Returns:
+            Tuple of (intent, similarity)
+        """
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+        similarities = self.centroids @ query
+
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+        if score < self.min_similarity:
+            return self.default_intent, score
+        return self.intents[best], score
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize each row."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """LRU cache for LLM responses with exact and semantic matching."""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        semantic_threshold: float = 0.95,
+        persist_path: Optional[str] = None
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (LRU eviction)
+            ttl_seconds: Time-to-live for each entry
+            semantic_threshold: Minimum cosine similarity for a semantic hit
+            persist_path: Optional JSON file used to persist the cache
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0}
+
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: Sequence[BaseMessage]) -> str:
+        """Build the exact-match key for an LLM call."""
+        payload = json.dumps({
+            "model": model,
+            "temperature": temperature,
+            "messages": [[msg.type, msg.content] for msg in messages]
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_scope(
+        model: str,
+        temperature: float,
+        system_prompt: str,
+        equipment_id: Optional[str]
+    ) -> str:
+        """Build the scope within which semantic matches are allowed."""
+        payload = json.dumps([model, temperature, system_prompt, equipment_id])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        key: str,
+        version: Tuple[str, ...],
+        scope: Optional[str] = None,
+        embedding: Optional[List[float]] = None
+    ) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Exact-match key from make_key
+            version: Digest of the current data; entries built from other data are stale
+            scope: Semantic scope from make_scope
+            embedding: Query embedding for semantic matching
+
+        Returns:
+            Cached response content, or None on a miss
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            # Stale entries are dropped when read; LRU eviction bounds the rest
+            entry = self._entries.get(key)
+            if entry is not None and self._is_stale(entry, version, cutoff):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry["content"]
+
+            if scope is not None and embedding is not None:
+                match = self._semantic_lookup(scope, embedding, version, cutoff)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.stats["semantic_hits"] += 1
+                    return self._entries[match]["content"]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(
+        self,
+        key: str,
+        content: str,
+        version: Tuple[str, ...],
+        scope: Optional[str] = None,
+        embedding: Optional[List[float]] = None
+    ) -> None:
+        """Store a response in the cache."""
+        with self._lock:
+            self._entries[key] = {
+                "content": content,
+                "version": list(version),
+                "created_at": time.time(),
+                "scope": scope,
+                "embedding": list(embedding) if embedding is not None else None
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics."""
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
+
+    def _semantic_lookup(
+        self,
+        scope: str,
+        embedding: List[float],
+        version: Tuple[str, ...],
+        cutoff: float
+    ) -> Optional[str]:
+        """Find the most similar fresh cached entry in the same scope, dropping stale ones seen."""
+        candidates = []
+        for key, entry in list(self._entries.items()):
+            if entry["scope"] != scope or entry["embedding"] is None:
+                continue
+            if self._is_stale(entry, version, cutoff):
+                del self._entries[key]
+                continue
+            candidates.append((key, entry["embedding"]))
+        if not candidates:
+            return None
+
+        matrix = np.asarray([emb for _, emb in candidates], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        similarities = matrix @ query / np.maximum(norms, 1e-12)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.semantic_threshold:
+            return candidates[best][0]
+        return None
+
+    @staticmethod
+    def _is_stale(entry: Dict[str, Any], version: Tuple[str, ...], cutoff: float) -> bool:
+        """Check whether an entry is past its TTL or was built from other data."""
+        return entry["created_at"] < cutoff or tuple(entry["version"]) != tuple(version)
+
+    def load(self) -> None:
+        """Load persisted entries from disk."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with open(self.persist_path, "r") as f:
+                data = json.load(f)
+            with self._lock:
+                self._entries = OrderedDict(data.get("entries", []))
+            logger.info(f"Loaded {len(self._entries)} cached LLM responses")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load LLM cache: {str(e)}")
+
+    def save(self) -> None:
+        """Persist entries to disk."""
+        if not self.persist_path:
+            return
+
+        with self._lock:
+            data = {"entries": list(self._entries.items())}
+
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.persist_path)
+            logger.info(f"Saved {len(data['entries'])} cached LLM responses")
+        except OSError as e:
+            logger.warning(f"Could not save LLM cache: {str(e)}")
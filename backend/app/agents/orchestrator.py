@@ -1,26 +1,49 @@
-from typing import TypedDict, Annotated, Sequence
+from typing import TypedDict, Annotated, Sequence, Iterator, Callable
 import operator
-from langchain_openai import ChatOpenAI
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor, ToolInvocation
 import logging
 
 from app.core.config import settings
+from app.providers.llm import get_chat_model
 from app.rag.pipeline import get_rag_pipeline
+from app.rag.result_cache import SearchResultCache
+from app.services.data_service import get_data_service
+from app.agents.llm_cache import LLMResponseCache
+from app.agents.single_flight import SingleFlight
+from app.agents.fast_path import answer_lookup, extract_equipment_id
+from app.agents.admission import AdmissionController
+from app.models.schemas import AlertSeverity, QueryPriority
+from app.agents.context_builder import EquipmentContextBuilder
+from app.agents.intent_router import IntentRouter
+from app.agents.session_memory import SessionStore
+from app.agents.resilience import CircuitBreaker, HedgedCaller, LLMUnavailable
 
 logger = logging.getLogger(__name__)
 
+# Shorter analysis or synthesis output is treated as a failed small-model call
+MIN_OUTPUT_CHARS = 20
+
 
 class AgentState(TypedDict):
     """State for multi-agent workflow."""
     messages: Annotated[Sequence[BaseMessage], operator.add]
     query: str
     equipment_id: str | None
+    history: str | None
+    query_embedding: list | None
     analysis_result: str | None
     retrieved_docs: list | None
+    doc_sentences: list | None
     recommendations: list | None
     next_agent: str | None
+    deadline: float | None
+    degraded: Annotated[list, operator.add]
 
 
 class IndustrialAgentOrchestrator:
@@ -28,16 +51,61 @@ class IndustrialAgentOrchestrator:
     
     def __init__(self):
         """Initialize the agent orchestrator."""
-        self.llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL,
-            temperature=settings.AGENT_TEMPERATURE,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
+        # Large model: default for every node and the escalation target
+        self.llm = get_chat_model()
+        self.node_models = {
+            "analysis": self._node_model(settings.ANALYSIS_MODEL, settings.ANALYSIS_MAX_TOKENS),
+            "recommendation": self._node_model(settings.RECOMMENDATION_MODEL, settings.RECOMMENDATION_MAX_TOKENS),
+            "synthesizer": self._node_model(settings.SYNTHESIS_MODEL, settings.SYNTHESIS_MAX_TOKENS)
+        }
+        self.escalations = {node: 0 for node in self.node_models}
+        self._escalation_lock = threading.Lock()
         self.rag_pipeline = get_rag_pipeline()
+        self.data_service = get_data_service()
+        self.cache = LLMResponseCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            semantic_threshold=settings.LLM_CACHE_SEMANTIC_THRESHOLD,
+            persist_path=settings.LLM_CACHE_PATH
+        ) if settings.LLM_CACHE_ENABLED else None
+        self.single_flight = SingleFlight()
+        self.llm_executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_WORKERS)
+        self.llm_caller = HedgedCaller(
+            self.llm_executor,
+            CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_seconds=settings.CIRCUIT_RESET_SECONDS
+            ),
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+            max_in_flight=settings.LLM_MAX_WORKERS
+        )
+        self.admission = AdmissionController(
+            max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+            rate_per_second=settings.ADMISSION_RATE_PER_SECOND,
+            burst=settings.ADMISSION_BURST,
+            max_queue_depth=settings.ADMISSION_MAX_QUEUE_DEPTH,
+            max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS
+        ) if settings.ADMISSION_ENABLED else None
+        self.context_builder = EquipmentContextBuilder(
+            self.data_service,
+            max_tokens=settings.AGENT_CONTEXT_MAX_TOKENS
+        )
+        self.sessions = SessionStore(
+            max_sessions=settings.SESSION_MAX_SESSIONS,
+            recent_turns=settings.SESSION_RECENT_TURNS,
+            summary_max_tokens=settings.SESSION_SUMMARY_MAX_TOKENS
+        )
+        self.intent_router = IntentRouter(
+            self.rag_pipeline.embeddings,
+            min_similarity=settings.ROUTER_MIN_SIMILARITY
+        )
         self.workflow = self._build_workflow()
+        # Same graph, paused before synthesis so tokens can be streamed
+        self.streaming_workflow = self._build_workflow(interrupt_before=["synthesizer"])
         logger.info("Agent orchestrator initialized")
     
-    def _build_workflow(self) -> StateGraph:
+    def _build_workflow(self, interrupt_before: list[str] | None = None) -> StateGraph:
         """Build the multi-agent workflow graph."""
         workflow = StateGraph(AgentState)
         
@@ -51,29 +119,21 @@ class IndustrialAgentOrchestrator:
         # Define workflow edges
         workflow.set_entry_point("router")
         
-        # Router decides which agent to use first
-        workflow.add_conditional_edges(
-            "router",
-            self._route_decision,
-            {
-                "analysis": "analysis",
-                "retrieval": "retrieval",
-                "direct_answer": "synthesizer"
-            }
-        )
-        
-        # Analysis can lead to retrieval or recommendations
-        workflow.add_conditional_edges(
-            "analysis",
-            self._after_analysis,
-            {
-                "retrieval": "retrieval",
-                "recommendation": "recommendation"
-            }
-        )
-        
-        # Retrieval leads to recommendations
-        workflow.add_edge("retrieval", "recommendation")
+        # Analysis and retrieval are independent, so the router fans out to
+        # both and they run concurrently in the same step. Retrieval is
+        # speculative: it starts for every query instead of waiting for the
+        # analysis result to decide whether documentation is needed.
+        workflow.add_edge("router", "analysis")
+        workflow.add_edge("router", "retrieval")
+        
+        # Both branches join before recommendation. Each branch evaluates the
+        # same decision on the merged state, so the next node runs only once.
+        join_mapping = {
+            "recommendation": "recommendation",
+            "direct_answer": "synthesizer"
+        }
+        workflow.add_conditional_edges("analysis", self._after_fan_out, join_mapping)
+        workflow.add_conditional_edges("retrieval", self._after_fan_out, join_mapping)
         
         # Recommendations lead to synthesis
         workflow.add_edge("recommendation", "synthesizer")
@@ -81,80 +141,219 @@ class IndustrialAgentOrchestrator:
         # Synthesizer is the end
         workflow.add_edge("synthesizer", END)
         
-        return workflow.compile()
+        return workflow.compile(interrupt_before=interrupt_before)
     
-    def _router_agent(self, state: AgentState) -> AgentState:
-        """Route query to appropriate agent."""
-        query = state["query"].lower()
+    def get_model_stats(self) -> dict:
+        """Get each node's model and how often it escalated to the large model."""
+        with self._escalation_lock:
+            return {
+                "default_model": self.llm.model_name,
+                "adaptive_escalation": settings.AGENT_ADAPTIVE_ESCALATION,
+                "nodes": {
+                    node: {"model": model.model_name, "escalations": self.escalations[node]}
+                    for node, model in self.node_models.items()
+                }
+            }
+    
+    def _node_model(self, model: str, max_tokens: int) -> BaseChatModel:
+        """Create a node's model; an empty name uses the large model."""
+        if not model or model == settings.OPENAI_MODEL:
+            model = settings.OPENAI_MODEL
+        return get_chat_model(model=model, max_tokens=max_tokens or None)
+    
+    def _invoke_llm(self, messages: list[BaseMessage], state: AgentState, node: str) -> str:
+        """
+        Invoke the node's model, escalating to the large model on invalid output.
         
-        # Determine routing based on query type
-        if any(word in query for word in ["why", "cause", "analyze", "explain"]):
-            state["next_agent"] = "analysis"
-        elif any(word in query for word in ["manual", "documentation", "procedure", "history"]):
-            state["next_agent"] = "retrieval"
-        else:
-            state["next_agent"] = "analysis"
+        Raises:
+            LLMUnavailable: If the call misses its deadline or the circuit is open
+        """
+        model = self.node_models[node]
+        content = self._invoke_model(model, messages, state, node)
+        
+        if (
+            not settings.AGENT_ADAPTIVE_ESCALATION
+            or model.model_name == self.llm.model_name
+            or self._is_valid_output(node, content)
+        ):
+            return content
+        
+        logger.info(f"Escalating {node} from {model.model_name} to {self.llm.model_name}")
+        with self._escalation_lock:
+            self.escalations[node] += 1
+        return self._invoke_model(self.llm, messages, state, node)
+    
+    def _cache_version(self) -> tuple[str, str]:
+        """Identify the data cached answers are built from; stable across restarts."""
+        return self.data_service.fingerprint(), self.rag_pipeline.content_fingerprint()
+    
+    def _invoke_model(
+        self,
+        model: BaseChatModel,
+        messages: list[BaseMessage],
+        state: AgentState,
+        node: str
+    ) -> str:
+        """Invoke a model, serving repeated calls from the response cache."""
+        if self.cache is None:
+            return self._call_llm(model, messages, state, node)
+        
+        # Cached answers are only valid for the data they were generated from
+        version = self._cache_version()
+        key = LLMResponseCache.make_key(model.model_name, model.temperature, messages)
+        scope = LLMResponseCache.make_scope(
+            model.model_name,
+            model.temperature,
+            messages[0].content,
+            state.get("equipment_id")
+        )
+        embedding = state.get("query_embedding") if settings.LLM_CACHE_SEMANTIC_ENABLED else None
         
-        logger.info(f"Router: Directing to {state['next_agent']} agent")
-        return state
+        content = self.cache.get(key, version, scope=scope, embedding=embedding)
+        if content is None:
+            content = self._call_llm(model, messages, state, node)
+            self.cache.put(key, content, version, scope=scope, embedding=embedding)
+        return content
+    
+    def _call_llm(
+        self,
+        model: BaseChatModel,
+        messages: list[BaseMessage],
+        state: AgentState,
+        node: str
+    ) -> str:
+        """Call a model within the node timeout and the query's overall deadline."""
+        # Track latency per node and model so hedging adapts to each tier
+        name = f"{node}:{model.model_name}"
+        return self.llm_caller.call(name, lambda: model.invoke(messages).content, self._llm_timeout(state))
+    
+    @staticmethod
+    def _llm_timeout(state: AgentState) -> float:
+        """Seconds an LLM call may take: the node timeout, capped by the query's deadline."""
+        timeout = settings.LLM_NODE_TIMEOUT_SECONDS
+        if state.get("deadline") is not None:
+            timeout = min(timeout, state["deadline"] - time.monotonic())
+        return timeout
     
-    def _route_decision(self, state: AgentState) -> str:
-        """Decision function for routing."""
-        return state.get("next_agent", "analysis")
+    def _is_valid_output(self, node: str, content: str) -> bool:
+        """Check whether a node's output is usable or needs the large model."""
+        if node == "recommendation":
+            return bool(self._parse_recommendations(content))
+        return len(content.strip()) >= MIN_OUTPUT_CHARS
     
-    def _analysis_agent(self, state: AgentState) -> AgentState:
+    @staticmethod
+    def _parse_recommendations(content: str) -> list[str]:
+        """Extract numbered or bulleted lines from recommendation output."""
+        return [
+            line.strip()
+            for line in content.split("\n")
+            if line.strip() and (line.strip()[0].isdigit() or line.strip().startswith("-"))
+        ]
+    
+    def _router_agent(self, state: AgentState) -> dict:
+        """Route query to appropriate agent."""
+        # Embed the query once; retrieval and the semantic cache reuse it
+        query_embedding = state.get("query_embedding")
+        if query_embedding is None:
+            try:
+                query_embedding = self.rag_pipeline.embeddings.embed_query(state["query"])
+            except Exception as e:
+                # Routing must not depend on the embedding provider; retrieval
+                # embeds the query itself and handles its own failures
+                logger.warning(f"Router: query embedding failed, using default route: {str(e)}")
+                next_agent = self.intent_router.default_intent
+                return {"next_agent": next_agent, "query_embedding": None}
+        
+        next_agent, score = self.intent_router.route(query_embedding)
+        
+        logger.info(f"Router: Directing to {next_agent} agent (similarity {score:.2f})")
+        return {"next_agent": next_agent, "query_embedding": query_embedding}
+    
+    def _after_fan_out(self, state: AgentState) -> str:
+        """Decide next step once analysis and retrieval have joined."""
+        if state.get("next_agent") == "direct_answer":
+            return "direct_answer"
+        return "recommendation"
+    
+    def _analysis_agent(self, state: AgentState) -> dict:
         """Analyze equipment data and identify issues."""
+        if state.get("next_agent") != "analysis":
+            # Documentation-only queries skip the analysis LLM call
+            return {}
+        
         system_prompt = """You are an expert industrial equipment analyst. 
         Analyze the query and equipment data to identify issues, patterns, and anomalies.
         Provide clear, technical analysis focusing on root causes and operational impacts."""
         
+        # Compact, budgeted equipment data keeps the prompt short but grounded
+        equipment_context = self.context_builder.build(state["query"], state.get("equipment_id"))
+        prompt = ""
+        if state.get("history"):
+            prompt += f"Conversation History:\n{state['history']}\n\n"
+        prompt += f"Query: {state['query']}\n\n"
+        if equipment_context:
+            prompt += f"Equipment Data:\n{equipment_context}\n\n"
+        prompt += "Provide your analysis."
+        
         messages = [
             SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Query: {state['query']}\n\nProvide your analysis.")
+            HumanMessage(content=prompt)
         ]
         
-        response = self.llm.invoke(messages)
-        state["analysis_result"] = response.content
-        state["messages"].append(AIMessage(content=f"Analysis: {response.content}"))
+        try:
+            content = self._invoke_llm(messages, state, "analysis")
+        except LLMUnavailable as e:
+            # Continue without analysis; recommendations can still use the docs
+            logger.warning(f"Analysis agent skipped: {str(e)}")
+            return {"degraded": ["analysis"]}
         
         logger.info("Analysis agent completed")
-        return state
-    
-    def _after_analysis(self, state: AgentState) -> str:
-        """Decide next step after analysis."""
-        query = state["query"].lower()
-        if any(word in query for word in ["manual", "documentation", "procedure"]):
-            return "retrieval"
-        return "recommendation"
+        return {
+            "analysis_result": content,
+            "messages": [AIMessage(content=f"Analysis: {content}")]
+        }
     
-    def _retrieval_agent(self, state: AgentState) -> AgentState:
+    def _retrieval_agent(self, state: AgentState) -> dict:
         """Retrieve relevant documentation using RAG."""
         query = state["query"]
         equipment_id = state.get("equipment_id")
         
-        # Retrieve relevant documents
-        docs = self.rag_pipeline.search_equipment_docs(
-            query=query,
-            equipment_id=equipment_id,
-            k=3
-        )
+        # Retrieve relevant documents, unless they were provided up front
+        docs = state.get("retrieved_docs")
+        if docs is None:
+            docs = self.rag_pipeline.search_equipment_docs(
+                query=query,
+                equipment_id=equipment_id,
+                k=3,
+                query_embedding=state.get("query_embedding")
+            )
         
-        state["retrieved_docs"] = docs
+        update = {"retrieved_docs": docs}
         
         # Summarize retrieved information
         if docs:
-            doc_summary = "\n\n".join([
-                f"Source: {doc['source']}\n{doc['content'][:300]}..."
-                for doc in docs
-            ])
-            state["messages"].append(
+            compressor = self.rag_pipeline.compressor
+            if compressor is not None:
+                # Scored once here; the recommendation agent repacks into its own budget
+                scored = compressor.score(query, docs, state.get("query_embedding"))
+                excerpts = compressor.pack(docs, scored, settings.RETRIEVAL_CONTEXT_MAX_TOKENS)
+                update["doc_sentences"] = scored
+                doc_summary = "\n\n".join(
+                    f"Source: {excerpt['source']}\n{excerpt['content']}" for excerpt in excerpts
+                )
+            else:
+                doc_summary = "\n\n".join([
+                    f"Source: {doc['source']}\n{doc['content'][:300]}..."
+                    for doc in docs
+                ])
+            update["messages"] = [
                 AIMessage(content=f"Retrieved Documentation:\n{doc_summary}")
-            )
+            ]
         
         logger.info(f"Retrieval agent found {len(docs)} documents")
-        return state
+        return update
     
-    def _recommendation_agent(self, state: AgentState) -> AgentState:
+    def _recommendation_agent(self, state: AgentState) -> dict:
         """Generate actionable recommendations."""
         system_prompt = """You are an expert maintenance advisor for industrial equipment.
         Based on the analysis and documentation, provide specific, actionable recommendations.
@@ -165,10 +364,19 @@ class IndustrialAgentOrchestrator:
         if state.get("analysis_result"):
             context_parts.append(f"\nAnalysis: {state['analysis_result']}")
         
-        if state.get("retrieved_docs"):
+        docs = state.get("retrieved_docs")
+        compressor = self.rag_pipeline.compressor
+        if docs and compressor is not None:
+            scored = state.get("doc_sentences")
+            if scored is None:
+                scored = compressor.score(state["query"], docs, state.get("query_embedding"))
+            excerpts = compressor.pack(docs, scored, settings.RECOMMENDATION_CONTEXT_MAX_TOKENS)
+            doc_context = "\n".join(f"- {excerpt['source']}: {excerpt['content']}" for excerpt in excerpts)
+            context_parts.append(f"\nRelevant Documentation:\n{doc_context}")
+        elif docs:
             doc_context = "\n".join([
                 f"- {doc['source']}: {doc['content'][:200]}"
-                for doc in state["retrieved_docs"][:2]
+                for doc in docs[:2]
             ])
             context_parts.append(f"\nRelevant Documentation:\n{doc_context}")
         
@@ -177,30 +385,30 @@ class IndustrialAgentOrchestrator:
             HumanMessage(content="\n".join(context_parts))
         ]
         
-        response = self.llm.invoke(messages)
-        
-        # Parse recommendations
-        recommendations = [
-            line.strip() 
-            for line in response.content.split("\n") 
-            if line.strip() and (line.strip()[0].isdigit() or line.strip().startswith("-"))
-        ]
+        try:
+            content = self._invoke_llm(messages, state, "recommendation")
+        except LLMUnavailable as e:
+            logger.warning(f"Recommendation agent skipped: {str(e)}")
+            return {"degraded": ["recommendation"]}
         
-        state["recommendations"] = recommendations
-        state["messages"].append(
-            AIMessage(content=f"Recommendations:\n{response.content}")
-        )
+        recommendations = self._parse_recommendations(content)
         
         logger.info(f"Recommendation agent generated {len(recommendations)} recommendations")
-        return state
+        return {
+            "recommendations": recommendations,
+            "messages": [AIMessage(content=f"Recommendations:\n{content}")]
+        }
     
-    def _synthesizer_agent(self, state: AgentState) -> AgentState:
-        """Synthesize final response."""
+    def _synthesis_messages(self, state: AgentState) -> list[BaseMessage]:
+        """Build the synthesizer prompt from the accumulated state."""
         system_prompt = """You are a helpful AI assistant synthesizing information.
         Create a clear, concise final answer that combines analysis, documentation, and recommendations.
         Format your response in a user-friendly way."""
         
-        synthesis_context = f"Original Query: {state['query']}\n\n"
+        synthesis_context = ""
+        if state.get("history"):
+            synthesis_context += f"Conversation History:\n{state['history']}\n\n"
+        synthesis_context += f"Original Query: {state['query']}\n\n"
         
         if state.get("analysis_result"):
             synthesis_context += f"Analysis: {state['analysis_result']}\n\n"
@@ -208,21 +416,95 @@ class IndustrialAgentOrchestrator:
         if state.get("recommendations"):
             synthesis_context += "Recommendations:\n" + "\n".join(state["recommendations"])
         
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=synthesis_context)
         ]
-        
-        response = self.llm.invoke(messages)
-        state["messages"].append(AIMessage(content=f"Final Answer: {response.content}"))
+    
+    def _synthesizer_agent(self, state: AgentState) -> dict:
+        """Synthesize final response."""
+        messages = self._synthesis_messages(state)
+        try:
+            content = self._invoke_llm(messages, state, "synthesizer")
+        except LLMUnavailable as e:
+            # Skip synthesis and answer with what the earlier agents produced
+            logger.warning(f"Synthesizer skipped: {str(e)}")
+            return {
+                "messages": [AIMessage(content=f"Final Answer: {self._fallback_answer(state)}")],
+                "degraded": ["synthesizer"]
+            }
         
         logger.info("Synthesizer agent completed")
-        return state
+        return {"messages": [AIMessage(content=f"Final Answer: {content}")]}
+    
+    def _fallback_answer(self, state: AgentState) -> str:
+        """Compose an answer without the LLM from the results gathered so far."""
+        if state.get("recommendations"):
+            return "Recommended actions:\n" + "\n".join(state["recommendations"])
+        if state.get("analysis_result"):
+            return state["analysis_result"]
+        if state.get("retrieved_docs"):
+            sources = ", ".join(doc["source"] for doc in state["retrieved_docs"])
+            return f"The AI service is currently slow. Relevant documentation: {sources}"
+        return "The AI service is currently slow or unavailable. Please try again shortly."
+    
+    def _initial_state(
+        self,
+        query: str,
+        equipment_id: str | None,
+        retrieved_docs: list | None = None,
+        history: str = ""
+    ) -> dict:
+        """Build the initial workflow state for a query."""
+        return {
+            "messages": [HumanMessage(content=query)],
+            "query": query,
+            "equipment_id": equipment_id,
+            "history": history or None,
+            "query_embedding": None,
+            "analysis_result": None,
+            "retrieved_docs": retrieved_docs,
+            "doc_sentences": None,
+            "recommendations": None,
+            "next_agent": None,
+            "deadline": time.monotonic() + settings.QUERY_DEADLINE_SECONDS,
+            "degraded": []
+        }
+    
+    def _build_response(self, final_state: AgentState) -> dict:
+        """Compile the API response from the final workflow state."""
+        # Extract final answer
+        final_message = [
+            msg.content for msg in final_state["messages"] 
+            if isinstance(msg, AIMessage) and "Final Answer:" in msg.content
+        ]
+        
+        answer = final_message[-1].replace("Final Answer: ", "") if final_message else "Unable to process query."
+        
+        # Compile sources
+        sources = []
+        if final_state.get("retrieved_docs"):
+            sources = [doc["source"] for doc in final_state["retrieved_docs"]]
+        
+        # Get recommendations
+        recommendations = final_state.get("recommendations") or []
+        
+        return {
+            "answer": answer,
+            "sources": sources,
+            "recommendations": recommendations,
+            "confidence": 0.5 if final_state.get("degraded") else 0.85,
+            "agent_reasoning": self._extract_reasoning(final_state)
+        }
     
     def process_query(
         self, 
         query: str, 
-        equipment_id: str | None = None
+        equipment_id: str | None = None,
+        retrieved_docs: list | None = None,
+        priority: QueryPriority | None = None,
+        can_shed: bool = True,
+        session_id: str | None = None
     ) -> dict:
         """
         Process a query through the multi-agent system.
@@ -230,48 +512,88 @@ class IndustrialAgentOrchestrator:
         Args:
             query: User query
             equipment_id: Optional equipment ID for context
+            retrieved_docs: Optional pre-retrieved documents, skips retrieval
+            priority: Admission priority, inferred from open alerts if omitted
+            can_shed: False to wait for admission instead of being shed
+            session_id: Optional conversation session for follow-up questions
             
         Returns:
             Response with answer, sources, and recommendations
+            
+        Raises:
+            AdmissionRejected: If the query is shed under load
         """
+        history = ""
+        if session_id:
+            history = self.sessions.get_history(session_id)
+            # Follow-ups like "what about its bearings?" refer to the last equipment
+            equipment_id = equipment_id or self.sessions.get_last_equipment_id(session_id)
+        
+        # Lookup-style questions are answered from equipment data without the LLM
+        result = answer_lookup(query, equipment_id, self.data_service)
+        
+        if result is None:
+            # Identical concurrent queries (e.g. many operators reacting to the
+            # same alarm) share a single workflow execution
+            key = SingleFlight.make_key(query, equipment_id, context=history)
+            priority = priority or self.infer_priority(query, equipment_id)
+            result = self.single_flight.do(
+                key,
+                lambda: self._admitted_run(
+                    lambda: self._run_query(query, equipment_id, retrieved_docs, history),
+                    priority,
+                    can_shed
+                )
+            )
+            result = {**result, "recommendations": list(result["recommendations"])}
+        
+        self._record_turn(session_id, query, result["answer"], equipment_id)
+        return result
+    
+    def _record_turn(
+        self,
+        session_id: str | None,
+        query: str,
+        answer: str,
+        equipment_id: str | None
+    ) -> None:
+        """Add a completed turn to the conversation session, if any."""
+        if session_id:
+            equipment_id = extract_equipment_id(query, self.data_service) or equipment_id
+            self.sessions.add_turn(session_id, query, answer, equipment_id)
+    
+    def infer_priority(self, query: str, equipment_id: str | None) -> QueryPriority:
+        """Prioritize queries about equipment with open critical or high alerts."""
+        equipment_id = extract_equipment_id(query, self.data_service) or equipment_id
+        if equipment_id:
+            open_alerts = self.data_service.get_alerts(equipment_id=equipment_id, resolved=False)
+            if any(a.severity in (AlertSeverity.CRITICAL, AlertSeverity.HIGH) for a in open_alerts):
+                return QueryPriority.CRITICAL
+        return QueryPriority.NORMAL
+    
+    def _admitted_run(self, run: Callable[[], dict], priority: QueryPriority, can_shed: bool) -> dict:
+        """Run a query once the admission controller lets it through."""
+        if self.admission is None:
+            return run()
+        
+        with self.admission.admit(priority, can_shed=can_shed):
+            return run()
+    
+    def _run_query(
+        self,
+        query: str,
+        equipment_id: str | None,
+        retrieved_docs: list | None = None,
+        history: str = ""
+    ) -> dict:
+        """Run the workflow for a query and build the response."""
         try:
-            # Initialize state
-            initial_state = {
-                "messages": [HumanMessage(content=query)],
-                "query": query,
-                "equipment_id": equipment_id,
-                "analysis_result": None,
-                "retrieved_docs": None,
-                "recommendations": None,
-                "next_agent": None
-            }
+            initial_state = self._initial_state(query, equipment_id, retrieved_docs, history)
             
             # Run workflow
             final_state = self.workflow.invoke(initial_state)
             
-            # Extract final answer
-            final_message = [
-                msg.content for msg in final_state["messages"] 
-                if isinstance(msg, AIMessage) and "Final Answer:" in msg.content
-            ]
-            
-            answer = final_message[-1].replace("Final Answer: ", "") if final_message else "Unable to process query."
-            
-            # Compile sources
-            sources = []
-            if final_state.get("retrieved_docs"):
-                sources = [doc["source"] for doc in final_state["retrieved_docs"]]
-            
-            # Get recommendations
-            recommendations = final_state.get("recommendations", [])
-            
-            return {
-                "answer": answer,
-                "sources": sources,
-                "recommendations": recommendations,
-                "confidence": 0.85,
-                "agent_reasoning": self._extract_reasoning(final_state)
-            }
+            return self._build_response(final_state)
             
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
@@ -283,6 +605,207 @@ class IndustrialAgentOrchestrator:
                 "agent_reasoning": str(e)
             }
     
+    def process_batch(
+        self,
+        queries: list[dict],
+        max_concurrency: int = 8
+    ) -> Iterator[dict]:
+        """
+        Process many queries with bounded concurrency.
+        
+        Repeated queries on the same equipment share one retrieval, and
+        results are yielded as soon as each query finishes, not in input order.
+        
+        Args:
+            queries: Queries with "query" and optional "equipment_id"
+            max_concurrency: Maximum number of queries running at once
+            
+        Yields:
+            Responses with the "index" of the originating query
+        """
+        # Keyed on the normalized query and equipment: documents retrieved for
+        # one question must not answer another question on the same equipment
+        shared_docs: dict[str, list] = {}
+        query_locks: dict[str, threading.Lock] = {}
+        locks_guard = threading.Lock()
+        
+        def retrieve_shared(query: str, equipment_id: str) -> list:
+            key = SearchResultCache.make_key(query, 3, {"equipment_id": equipment_id})
+            with locks_guard:
+                lock = query_locks.setdefault(key, threading.Lock())
+            with lock:
+                if key not in shared_docs:
+                    shared_docs[key] = self.rag_pipeline.search_equipment_docs(
+                        query=query,
+                        equipment_id=equipment_id,
+                        k=3
+                    )
+                return shared_docs[key]
+        
+        def run(index: int, item: dict) -> dict:
+            query = item["query"]
+            equipment_id = item.get("equipment_id")
+            retrieved_docs = retrieve_shared(query, equipment_id) if equipment_id else None
+            # Batch work is low priority and waits rather than being shed
+            result = self.process_query(
+                query,
+                equipment_id,
+                retrieved_docs=retrieved_docs,
+                priority=QueryPriority.LOW,
+                can_shed=False
+            )
+            return {"index": index, "query": query, "equipment_id": equipment_id, **result}
+        
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        try:
+            futures = [executor.submit(run, i, item) for i, item in enumerate(queries)]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Stop queued work if the consumer goes away mid-batch
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        logger.info(f"Batch of {len(queries)} queries completed, {len(shared_docs)} shared retrievals")
+    
+    def stream_query(
+        self,
+        query: str,
+        equipment_id: str | None = None,
+        session_id: str | None = None
+    ) -> Iterator[dict]:
+        """
+        Process a query, yielding events as the workflow progresses.
+        
+        Node events are emitted as soon as each agent completes, followed by
+        the synthesizer output token by token and a final "done" event.
+        
+        Args:
+            query: User query
+            equipment_id: Optional equipment ID for context
+            session_id: Optional conversation session for follow-up questions
+            
+        Yields:
+            Events with an "event" name and a "data" payload
+        """
+        try:
+            history = ""
+            if session_id:
+                history = self.sessions.get_history(session_id)
+                equipment_id = equipment_id or self.sessions.get_last_equipment_id(session_id)
+            
+            fast_answer = self.direct_answer(query, equipment_id, session_id)
+            if fast_answer is not None:
+                yield from self.direct_answer_events(fast_answer)
+                return
+            
+            state = self._initial_state(query, equipment_id, history=history)
+            
+            for step in self.streaming_workflow.stream(state):
+                for node, update in step.items():
+                    if not isinstance(update, dict):
+                        continue
+                    
+                    for key, value in update.items():
+                        if key == "messages":
+                            state["messages"] = list(state["messages"]) + list(value)
+                        else:
+                            state[key] = value
+                    
+                    event = self._node_event(node, update)
+                    if event is not None:
+                        yield event
+            
+            # Stream the synthesizer outside the graph so tokens reach the client as generated
+            messages = self._synthesis_messages(state)
+            content = None
+            version = self._cache_version()
+            # Streamed tokens are already sent, so the synthesizer cannot escalate here
+            model = self.node_models["synthesizer"]
+            key = LLMResponseCache.make_key(model.model_name, model.temperature, messages)
+            if self.cache is not None:
+                content = self.cache.get(key, version)
+            
+            if content is not None:
+                yield {"event": "token", "data": {"content": content}}
+            else:
+                chunks = []
+                try:
+                    stream = self.llm_caller.stream(
+                        f"synthesizer-stream:{model.model_name}",
+                        lambda: model.stream(messages),
+                        self._llm_timeout(state)
+                    )
+                    for chunk in stream:
+                        if chunk.content:
+                            chunks.append(chunk.content)
+                            yield {"event": "token", "data": {"content": chunk.content}}
+                except LLMUnavailable as e:
+                    # Partial tokens may already be out; append the fallback after them
+                    logger.warning(f"Synthesizer stream failed: {str(e)}")
+                    fallback = self._fallback_answer(state)
+                    chunks.append(("\n\n" if chunks else "") + fallback)
+                    state["degraded"] = list(state["degraded"]) + ["synthesizer"]
+                    yield {"event": "token", "data": {"content": chunks[-1]}}
+                content = "".join(chunks)
+                if self.cache is not None and not state["degraded"]:
+                    self.cache.put(key, content, version)
+            
+            logger.info("Synthesizer agent completed (streaming)")
+            state["messages"] = list(state["messages"]) + [AIMessage(content=f"Final Answer: {content}")]
+            self._record_turn(session_id, query, content, equipment_id)
+            yield {"event": "done", "data": self._build_response(state)}
+            
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield {"event": "error", "data": {"message": str(e)}}
+    
+    def direct_answer(
+        self,
+        query: str,
+        equipment_id: str | None = None,
+        session_id: str | None = None
+    ) -> dict | None:
+        """
+        Answer a lookup-style question from equipment data without the LLM.
+        
+        Direct answers never run the agent workflow, so callers can check
+        for one before taking an admission slot.
+        
+        Args:
+            query: User query
+            equipment_id: Optional equipment ID for context
+            session_id: Optional conversation session for follow-up questions
+            
+        Returns:
+            Response like process_query's, or None if the workflow is needed
+        """
+        if session_id:
+            equipment_id = equipment_id or self.sessions.get_last_equipment_id(session_id)
+        
+        result = answer_lookup(query, equipment_id, self.data_service)
+        if result is not None:
+            self._record_turn(session_id, query, result["answer"], equipment_id)
+        return result
+    
+    @staticmethod
+    def direct_answer_events(answer: dict) -> Iterator[dict]:
+        """Stream a direct answer as the same events stream_query emits."""
+        yield {"event": "route", "data": {"next_agent": "direct_answer"}}
+        yield {"event": "done", "data": answer}
+    
+    def _node_event(self, node: str, update: dict) -> dict | None:
+        """Convert a node's state update into a client-facing event."""
+        if node == "router" and update.get("next_agent"):
+            return {"event": "route", "data": {"next_agent": update["next_agent"]}}
+        if node == "analysis" and update.get("analysis_result"):
+            return {"event": "analysis", "data": {"analysis": update["analysis_result"]}}
+        if node == "retrieval" and update.get("retrieved_docs") is not None:
+            sources = [doc["source"] for doc in update["retrieved_docs"]]
+            return {"event": "sources", "data": {"sources": sources}}
+        if node == "recommendation" and update.get("recommendations") is not None:
+            return {"event": "recommendations", "data": {"recommendations": update["recommendations"]}}
+        return None
+    
     def _extract_reasoning(self, state: AgentState) -> str:
         """Extract agent reasoning chain."""
         reasoning_parts = []
@@ -296,6 +819,9 @@ class IndustrialAgentOrchestrator:
         if state.get("recommendations"):
             reasoning_parts.append(f"Generated {len(state['recommendations'])} recommendations")
         
+        if state.get("degraded"):
+            reasoning_parts.append(f"Degraded: skipped {', '.join(state['degraded'])} (LLM timeout)")
+        
         return " → ".join(reasoning_parts) if reasoning_parts else "Direct response"
 
 
@@ -0,0 +1,312 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream relayed from the executor
+_STREAM_END = object()
+
+
+class LLMUnavailable(Exception):
+    """Raised when an LLM call times out or the circuit breaker is open."""
+
+
+class LatencyTracker:
+    """Rolling window of call latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of most recent latencies kept
+            min_samples: Samples needed before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record a call latency."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Get a latency percentile, or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Stop calling a failing or slow provider for a cool-down period."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Time before a trial call is allowed again
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Check whether a call may go through; half-open allows one trial."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                if self._opened_at is None:
+                    logger.warning(f"Circuit opened after {self._failures} consecutive LLM failures")
+                self._opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot of a call abandoned without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class HedgedCaller:
+    """Call an LLM with a deadline, hedging with a duplicate request on stragglers."""
+
+    def __init__(
+        self,
+        executor: Executor,
+        breaker: CircuitBreaker,
+        hedge_percentile: float = 95.0,
+        hedge_min_delay: float = 1.0,
+        max_in_flight: int = 32
+    ):
+        """
+        Initialize the caller.
+
+        Args:
+            executor: Executor running the LLM calls
+            breaker: Circuit breaker shared by all calls
+            hedge_percentile: Latency percentile after which a duplicate is sent (0 disables)
+            hedge_min_delay: Lower bound on the hedge delay in seconds
+            max_in_flight: Calls allowed on the executor at once, counting
+                timed-out calls that are still running; new calls are
+                rejected and hedges skipped beyond it. Match it to the
+                executor's worker count so calls never queue behind
+                abandoned ones.
+        """
+        self.executor = executor
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "rejected": 0}
+
+    def call(self, name: str, fn: Callable[[], Any], timeout: float) -> Any:
+        """
+        Run fn with a timeout, sending one hedged duplicate if it is slow.
+
+        Args:
+            name: Call site name; latency percentiles are tracked per name
+            fn: The LLM call
+            timeout: Seconds before giving up
+
+        Raises:
+            LLMUnavailable: On timeout, provider error or open circuit
+        """
+        if timeout <= 0 or not self.breaker.allow():
+            self._count("rejected")
+            raise LLMUnavailable(f"LLM unavailable for {name} (circuit {self.breaker.state})")
+
+        first = self._submit(fn)
+        if first is None:
+            self.breaker.release_trial()
+            self._count("rejected")
+            raise LLMUnavailable(f"LLM unavailable for {name} ({self.max_in_flight} calls in flight)")
+
+        self._count("calls")
+        tracker = self._tracker(name)
+        start = time.monotonic()
+        deadline = start + timeout
+        futures: Dict[Future, float] = {first: start}
+
+        hedge_at = None
+        threshold = tracker.percentile(self.hedge_percentile) if self.hedge_percentile > 0 else None
+        if threshold is not None:
+            hedge_at = start + max(threshold, self.hedge_min_delay)
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                # Timeouts are the tail the hedge delay must account for
+                tracker.record(now - start)
+                self._count("timeouts")
+                self.breaker.record_failure()
+                raise LLMUnavailable(f"LLM call for {name} timed out after {timeout:.1f}s")
+
+            wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, _ = wait(list(futures), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                started = futures.pop(future)
+                if future.exception() is not None:
+                    if not futures:
+                        self.breaker.record_failure()
+                        raise LLMUnavailable(f"LLM call for {name} failed: {future.exception()}")
+                    continue
+
+                tracker.record(time.monotonic() - started)
+                self.breaker.record_success()
+                if started != start:
+                    self._count("hedge_wins")
+                return future.result()
+
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                # Straggler: race a duplicate request against the original,
+                # unless the executor has no room left for it
+                hedge_at = None
+                hedge = self._submit(fn)
+                if hedge is not None:
+                    self._count("hedged")
+                    futures[hedge] = time.monotonic()
+
+    def stream(self, name: str, fn: Callable[[], Iterable[Any]], timeout: float) -> Iterator[Any]:
+        """
+        Relay a streaming call, failing if the whole stream misses its deadline.
+
+        The stream is consumed on the executor, so a provider that stalls
+        between chunks cannot block the caller past the deadline. Streams
+        are not hedged: their first chunks may already be delivered.
+
+        Args:
+            name: Call site name; latency percentiles are tracked per name
+            fn: Starts the streaming LLM call
+            timeout: Seconds the whole stream may take
+
+        Raises:
+            LLMUnavailable: On timeout, provider error or open circuit
+        """
+        if timeout <= 0 or not self.breaker.allow():
+            self._count("rejected")
+            raise LLMUnavailable(f"LLM unavailable for {name} (circuit {self.breaker.state})")
+
+        items: queue.Queue = queue.Queue()
+        abandoned = threading.Event()
+
+        def produce():
+            try:
+                for item in fn():
+                    if abandoned.is_set():
+                        return
+                    items.put((item, None))
+                items.put((_STREAM_END, None))
+            except Exception as e:
+                items.put((None, e))
+
+        if self._submit(produce) is None:
+            self.breaker.release_trial()
+            self._count("rejected")
+            raise LLMUnavailable(f"LLM unavailable for {name} ({self.max_in_flight} calls in flight)")
+
+        self._count("calls")
+        start = time.monotonic()
+        deadline = start + timeout
+        settled = False
+        try:
+            while True:
+                try:
+                    item, error = items.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    settled = True
+                    self._tracker(name).record(time.monotonic() - start)
+                    self._count("timeouts")
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(f"LLM stream for {name} timed out after {timeout:.1f}s")
+                if error is not None:
+                    settled = True
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(f"LLM stream for {name} failed: {error}")
+                if item is _STREAM_END:
+                    settled = True
+                    self._tracker(name).record(time.monotonic() - start)
+                    self.breaker.record_success()
+                    return
+                yield item
+        finally:
+            # Stops the producer at its next chunk once the caller gives up
+            abandoned.set()
+            if not settled:
+                # Closed early (e.g. client disconnect): no outcome to record,
+                # but a half-open trial must not stay claimed forever
+                self.breaker.release_trial()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get call, hedge and timeout counts plus the circuit state."""
+        with self._lock:
+            return {**self.stats, "in_flight": self._in_flight, "circuit": self.breaker.state}
+
+    def _submit(self, fn: Callable[[], Any]) -> Optional[Future]:
+        """Submit fn unless max_in_flight calls are already running."""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return None
+            self._in_flight += 1
+        future = self.executor.submit(fn)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _tracker(self, name: str) -> LatencyTracker:
+        with self._lock:
+            return self._trackers.setdefault(name, LatencyTracker())
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
@@ -0,0 +1,135 @@
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+from app.core.tokens import estimate_tokens
+
+MAX_QUERY_CHARS = 300
+MAX_ANSWER_CHARS = 600
+MAX_DIGEST_ANSWER_CHARS = 150
+
+
+class ConversationSession:
+    """Compact conversation state: a rolling summary plus the latest turns."""
+
+    __slots__ = ("summary", "recent", "last_equipment_id", "turn_count")
+
+    def __init__(self, recent_turns: int):
+        self.summary: deque = deque()
+        self.recent: deque = deque(maxlen=recent_turns)
+        self.last_equipment_id: Optional[str] = None
+        self.turn_count = 0
+
+
+class SessionStore:
+    """LRU-bounded store of conversation sessions with summarized history."""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        recent_turns: int = 3,
+        summary_max_tokens: int = 150
+    ):
+        """
+        Initialize the session store.
+
+        Args:
+            max_sessions: Maximum number of sessions kept (LRU eviction)
+            recent_turns: Number of latest turns kept verbatim
+            summary_max_tokens: Token budget for the summary of older turns
+        """
+        self.max_sessions = max_sessions
+        self.recent_turns = recent_turns
+        self.summary_max_tokens = summary_max_tokens
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_history(self, session_id: str) -> str:
+        """
+        Get the prompt-ready history for a session.
+
+        Returns:
+            Summary of older turns followed by the latest turns, or an empty
+            string for a new session
+        """
+        with self._lock:
+            session = self._get(session_id)
+            if session is None or session.turn_count == 0:
+                return ""
+
+            parts = []
+            if session.summary:
+                parts.append("Earlier in this conversation:")
+                parts.extend(f"- {line}" for line in session.summary)
+            parts.append("Recent turns:")
+            for query, answer in session.recent:
+                parts.append(f"User: {query}")
+                parts.append(f"Assistant: {answer}")
+            return "\n".join(parts)
+
+    def get_last_equipment_id(self, session_id: str) -> Optional[str]:
+        """Get the equipment discussed most recently in a session."""
+        with self._lock:
+            session = self._get(session_id)
+            return session.last_equipment_id if session else None
+
+    def add_turn(
+        self,
+        session_id: str,
+        query: str,
+        answer: str,
+        equipment_id: Optional[str] = None
+    ) -> None:
+        """Record a turn, folding the oldest recent turn into the summary."""
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                session = ConversationSession(self.recent_turns)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+            if len(session.recent) == session.recent.maxlen:
+                session.summary.append(self._digest(*session.recent[0]))
+                self._trim_summary(session)
+
+            session.recent.append((
+                self._truncate(query, MAX_QUERY_CHARS),
+                self._truncate(answer, MAX_ANSWER_CHARS)
+            ))
+            if equipment_id:
+                session.last_equipment_id = equipment_id
+            session.turn_count += 1
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the number of stored sessions."""
+        with self._lock:
+            return {"sessions": len(self._sessions), "max_sessions": self.max_sessions}
+
+    def _get(self, session_id: str) -> Optional[ConversationSession]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _trim_summary(self, session: ConversationSession) -> None:
+        """Drop the oldest summary lines until the summary fits its budget."""
+        while session.summary and sum(estimate_tokens(line) for line in session.summary) > self.summary_max_tokens:
+            session.summary.popleft()
+
+    @staticmethod
+    def _digest(query: str, answer: str) -> str:
+        """Summarize a turn as the question and the answer's first sentence."""
+        first_sentence = re.split(r"(?<=[.!?])\s|\n", answer.strip(), maxsplit=1)[0]
+        return f"Asked: {query} Answer: {SessionStore._truncate(first_sentence, MAX_DIGEST_ANSWER_CHARS)}"
+
+    @staticmethod
+    def _truncate(text: str, max_chars: int) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
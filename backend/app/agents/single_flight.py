@@ -0,0 +1,81 @@
+import hashlib
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """An in-flight execution shared by concurrent callers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        """Initialize with no in-flight calls."""
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    @staticmethod
+    def make_key(query: str, equipment_id: Optional[str] = None, context: str = "") -> str:
+        """Build a key from normalized query text, equipment ID and extra context."""
+        normalized = re.sub(r"\s+", " ", query.lower()).strip(" ?!.")
+        key = f"{equipment_id or ''}|{normalized}"
+        if context:
+            # Queries with different conversation history must not share results
+            key += "|" + hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+        return key
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn, or wait for an identical in-flight call to finish.
+
+        Args:
+            key: Deduplication key
+            fn: Function executed by the first caller for the key
+
+        Returns:
+            The result of the shared execution
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get call, execution and coalesced counts."""
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._calls)}
@@ -1,9 +1,16 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+import json
 import logging
 
-from app.models.schemas import QueryRequest, QueryResponse
+from app.core.config import settings
+from app.models.schemas import QueryRequest, QueryResponse, BatchQueryRequest, BatchQueryResult
 from app.agents.orchestrator import get_orchestrator
+from app.agents.admission import AdmissionRejected
+from app.rag.pipeline import get_rag_pipeline
+from app.providers.embedding_cache import CachedEmbeddings
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 logger = logging.getLogger(__name__)
@@ -21,14 +28,21 @@ async def process_query(request: QueryRequest):
     """
     try:
         orchestrator = get_orchestrator()
+        session_id = _session_id(request)
         
-        result = orchestrator.process_query(
+        # Run in a worker thread so concurrent queries don't block the event loop
+        result = await run_in_threadpool(
+            orchestrator.process_query,
             query=request.query,
-            equipment_id=request.equipment_id
+            equipment_id=request.equipment_id,
+            priority=request.priority,
+            session_id=session_id
         )
         
-        return QueryResponse(**result)
+        return QueryResponse(**result, session_id=session_id)
         
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(
@@ -37,6 +51,204 @@ async def process_query(request: QueryRequest):
         )
 
 
+@router.post("/query/stream")
+async def stream_query(request: QueryRequest):
+    """
+    Process an AI query and stream progress as Server-Sent Events.
+    
+    Events are emitted as each agent completes:
+    - route: Routing decision
+    - analysis: Analysis result
+    - sources: Retrieved documentation sources
+    - recommendations: Generated recommendations
+    - token: Synthesizer output, streamed as it is generated
+    - done: Final response (same shape as /ai/query)
+    """
+    session_id = _session_id(request)
+    
+    try:
+        orchestrator = get_orchestrator()
+        # Lookup-style questions are answered directly and skip admission
+        direct_answer = await run_in_threadpool(
+            orchestrator.direct_answer,
+            request.query,
+            request.equipment_id,
+            session_id
+        )
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing query: {str(e)}"
+        )
+    
+    # Hold an admission slot for the lifetime of a workflow stream
+    admission = orchestrator.admission if direct_answer is None else None
+    if admission is not None:
+        priority = request.priority or orchestrator.infer_priority(request.query, request.equipment_id)
+        try:
+            await run_in_threadpool(admission.acquire, priority)
+        except AdmissionRejected as e:
+            raise _too_many_requests(e)
+    
+    def event_stream():
+        if direct_answer is not None:
+            events = orchestrator.direct_answer_events(direct_answer)
+        else:
+            events = orchestrator.stream_query(
+                query=request.query,
+                equipment_id=request.equipment_id,
+                session_id=session_id
+            )
+        try:
+            for event in events:
+                data = event["data"]
+                if event["event"] == "done":
+                    data = {**data, "session_id": session_id}
+                yield f"event: {event['event']}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            if admission is not None:
+                admission.release()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/query/batch")
+async def process_batch(request: BatchQueryRequest):
+    """
+    Process many AI queries with bounded concurrency.
+    
+    Results are streamed as newline-delimited JSON in completion order;
+    each line carries the index of the query it answers. Repeated queries
+    on the same equipment share documentation retrieval.
+    """
+    if len(request.queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds maximum of {settings.BATCH_MAX_QUERIES} queries"
+        )
+    
+    max_concurrency = min(
+        request.max_concurrency or settings.BATCH_MAX_CONCURRENCY,
+        settings.BATCH_MAX_CONCURRENCY
+    )
+    
+    try:
+        orchestrator = get_orchestrator()
+    except Exception as e:
+        logger.error(f"Error initializing orchestrator: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing batch: {str(e)}"
+        )
+    
+    def result_stream():
+        for result in orchestrator.process_batch(
+            [q.model_dump() for q in request.queries],
+            max_concurrency=max_concurrency
+        ):
+            yield BatchQueryResult(**result).model_dump_json() + "\n"
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get LLM response cache hit/miss statistics."""
+    orchestrator = get_orchestrator()
+    
+    if orchestrator.cache is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **orchestrator.cache.get_stats()}
+
+
+@router.get("/embeddings/cache/stats")
+async def get_embedding_cache_stats():
+    """Get embedding cache hit/miss statistics."""
+    embeddings = get_rag_pipeline().embeddings
+    
+    if not isinstance(embeddings, CachedEmbeddings):
+        return {"enabled": False}
+    
+    return {"enabled": True, **embeddings.get_stats()}
+
+
+@router.get("/retrieval/cache/stats")
+async def get_retrieval_cache_stats():
+    """Get retrieval result cache hit/miss statistics."""
+    result_cache = get_rag_pipeline().result_cache
+    
+    if result_cache is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **result_cache.get_stats()}
+
+
+@router.get("/retrieval/compression/stats")
+async def get_compression_stats():
+    """Get how much context compression shrinks retrieved documentation."""
+    compressor = get_rag_pipeline().compressor
+    
+    if compressor is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **compressor.get_stats()}
+
+
+@router.get("/retrieval/startup")
+async def get_retrieval_startup():
+    """Get how long the retrieval index took to load at startup."""
+    return get_rag_pipeline().startup_timings
+
+
+@router.get("/coalescing/stats")
+async def get_coalescing_stats():
+    """Get statistics on identical concurrent queries that shared one execution."""
+    orchestrator = get_orchestrator()
+    return orchestrator.single_flight.get_stats()
+
+
+@router.get("/admission/stats")
+async def get_admission_stats():
+    """Get admission queue depth, shed counts and queue-wait metrics."""
+    orchestrator = get_orchestrator()
+    
+    if orchestrator.admission is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **orchestrator.admission.get_stats()}
+
+
+@router.get("/resilience/stats")
+async def get_resilience_stats():
+    """Get hedged request, timeout and circuit breaker statistics."""
+    orchestrator = get_orchestrator()
+    return orchestrator.llm_caller.get_stats()
+
+
+@router.get("/models/stats")
+async def get_model_stats():
+    """Get the model used by each agent node and its escalation count."""
+    orchestrator = get_orchestrator()
+    return orchestrator.get_model_stats()
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a conversation session."""
+    orchestrator = get_orchestrator()
+    
+    if not orchestrator.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {"message": "Session deleted successfully", "session_id": session_id}
+
+
 @router.get("/health")
 async def ai_health_check():
     """Check if AI services are operational."""
@@ -52,3 +264,24 @@ async def ai_health_check():
             "status": "unhealthy",
             "message": str(e)
         }
+
+
+def _session_id(request: QueryRequest) -> Optional[str]:
+    """
+    Get the conversation session ID supplied by the client.
+
+    Requests without one are stateless: a server-generated session would
+    never be reused, and storing it would evict real conversations.
+    """
+    context_session = (request.context or {}).get("session_id")
+    return request.session_id or context_session or None
+
+
+def _too_many_requests(error: AdmissionRejected) -> HTTPException:
+    """Convert an admission rejection into a 429 response."""
+    logger.warning(f"Query rejected by admission control: {str(error)}")
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(int(error.retry_after + 0.5))}
+    )
@@ -10,18 +10,123 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Industrial AI Platform"
     VERSION: str = "1.0.0"
     
+    # Provider Settings ("openai" or "fake" for deterministic offline runs;
+    # embeddings also support "local" for CPU sentence-transformers)
+    LLM_PROVIDER: str = "openai"
+    EMBEDDING_PROVIDER: str = "openai"
+    
     # OpenAI Settings
-    OPENAI_API_KEY: str
+    OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     
+    # Fake Provider Settings (simulated latency for load tests)
+    FAKE_LLM_LATENCY_MS: float = 0.0
+    FAKE_LLM_TOKENS_PER_SECOND: float = 0.0
+    FAKE_EMBEDDING_DIMENSIONS: int = 256
+    FAKE_EMBEDDING_LATENCY_MS: float = 0.0
+    
+    # Local Embedding Settings (vectors are always float32; shrink the
+    # index with NUMPY_INDEX_DTYPE=float16 instead, int8 is not supported)
+    LOCAL_EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    LOCAL_EMBEDDING_BATCH_SIZE: int = 32
+    LOCAL_EMBEDDING_MAX_WAIT_MS: float = 5.0
+    LOCAL_EMBEDDING_FALLBACK_DIMENSIONS: int = 384
+    
+    # Embedding Cache Settings (vectors keyed by model and content hash)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: Optional[str] = "./data/embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 50000
+    
+    # Vector Store Settings ("chroma" or "numpy" for the in-process index)
+    VECTOR_BACKEND: str = "chroma"
+    NUMPY_INDEX_PATH: Optional[str] = "./data/numpy_index"
+    NUMPY_INDEX_DTYPE: str = "float32"
+    NUMPY_IVF_LISTS: int = 256
+    NUMPY_IVF_PROBES: int = 16
+    NUMPY_IVF_MIN_ROWS: int = 50000
+    # Metadata field splitting the index into partitions, e.g. "site" or
+    # "equipment_type"; empty keeps one index. Changing it requires re-ingesting.
+    VECTOR_PARTITION_KEY: str = ""
+    
     # ChromaDB Settings
-    CHROMA_PERSIST_DIRECTORY: str = "./data/chroma"
+    CHROMA_PERSIST_DIRECTORY: Optional[str] = "./data/chroma"
     COLLECTION_NAME: str = "industrial_docs"
     
+    # Retrieval Settings (mode: vector, lexical or hybrid)
+    RETRIEVAL_MODE: str = "hybrid"
+    RETRIEVAL_CANDIDATES: int = 20
+    RETRIEVAL_RRF_K: int = 60
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 1000
+    
+    # Context Compression Settings (token budgets for retrieved documentation in prompts)
+    CONTEXT_COMPRESSION_ENABLED: bool = True
+    RETRIEVAL_CONTEXT_MAX_TOKENS: int = 200
+    RECOMMENDATION_CONTEXT_MAX_TOKENS: int = 120
+    RAG_CONTEXT_MAX_TOKENS: int = 500
+    
+    # Ingestion Settings (chunk sizes in characters)
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    INGEST_EMBEDDING_BATCH_SIZE: int = 64
+    INGEST_EMBEDDING_CONCURRENCY: int = 4
+    INGEST_EMBEDDING_MAX_RETRIES: int = 3
+    INGEST_CHUNK_WORKERS: int = 4
+    INGEST_BATCH_DOCUMENTS: int = 32
+    INGEST_QUEUE_BATCHES: int = 4
+    INGEST_CHECKPOINT_SECONDS: float = 30.0
+    INGEST_CHECKPOINT_MIN_CHUNKS: int = 10000
+    
     # Agent Settings
     MAX_AGENT_ITERATIONS: int = 5
     AGENT_TEMPERATURE: float = 0.7
+    AGENT_CONTEXT_MAX_TOKENS: int = 400
+    ROUTER_MIN_SIMILARITY: float = 0.25
+    
+    # Per-Node Model Settings (empty model uses OPENAI_MODEL, 0 max tokens means no cap)
+    ANALYSIS_MODEL: str = ""
+    ANALYSIS_MAX_TOKENS: int = 800
+    RECOMMENDATION_MODEL: str = "gpt-3.5-turbo"
+    RECOMMENDATION_MAX_TOKENS: int = 400
+    SYNTHESIS_MODEL: str = "gpt-3.5-turbo"
+    SYNTHESIS_MAX_TOKENS: int = 600
+    AGENT_ADAPTIVE_ESCALATION: bool = True
+    
+    # Admission Control Settings (rate in queries/s, ~provider RPM / LLM calls per query)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 16
+    ADMISSION_RATE_PER_SECOND: float = 2.0
+    ADMISSION_BURST: int = 10
+    ADMISSION_MAX_QUEUE_DEPTH: int = 100
+    ADMISSION_MAX_WAIT_SECONDS: float = 30.0
+    
+    # Conversation Session Settings
+    SESSION_MAX_SESSIONS: int = 1000
+    SESSION_RECENT_TURNS: int = 3
+    SESSION_SUMMARY_MAX_TOKENS: int = 150
+    
+    # LLM Resilience Settings
+    LLM_NODE_TIMEOUT_SECONDS: float = 20.0
+    QUERY_DEADLINE_SECONDS: float = 45.0
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    # Also caps LLM calls in flight; calls beyond it fail fast instead of queueing
+    LLM_MAX_WORKERS: int = 32
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+    
+    # Batch Query Settings
+    BATCH_MAX_CONCURRENCY: int = 8
+    BATCH_MAX_QUERIES: int = 10000
+    
+    # LLM Cache Settings
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_SEMANTIC_ENABLED: bool = False
+    LLM_CACHE_SEMANTIC_THRESHOLD: float = 0.95
+    LLM_CACHE_PATH: Optional[str] = "./data/llm_cache.json"
     
     # Data Settings
     EQUIPMENT_DATA_PATH: str = "./data/equipment_data.json"
@@ -0,0 +1,3 @@
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text (roughly 4 characters per token)."""
+    return len(text) // 4 + 1
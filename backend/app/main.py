@@ -4,6 +4,8 @@ import logging
 
 from app.core.config import settings
 from app.api import equipment, ai, dashboard
+from app.agents import orchestrator as orchestrator_module
+from app.rag import pipeline as pipeline_module
 
 # Configure logging
 logging.basicConfig(
@@ -59,6 +61,13 @@ async def startup_event():
     """Initialize services on startup."""
     logger.info("Starting Industrial AI Platform...")
     logger.info(f"API Version: {settings.VERSION}")
+    
+    # Open the persisted index now so the first query does not pay for it
+    try:
+        pipeline_module.get_rag_pipeline()
+    except Exception as e:
+        logger.warning(f"RAG pipeline not initialized at startup: {str(e)}")
+    
     logger.info("Services initialized successfully")
 
 
@@ -66,3 +75,10 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down Industrial AI Platform...")
+    
+    # Persist cached LLM responses so they survive restarts
+    if orchestrator_module.orchestrator is not None and orchestrator_module.orchestrator.cache is not None:
+        orchestrator_module.orchestrator.cache.save()
+    
+    if pipeline_module.rag_pipeline is not None:
+        pipeline_module.rag_pipeline.save_index()
@@ -21,6 +21,13 @@ class AlertSeverity(str, Enum):
     CRITICAL = "critical"
 
 
+class QueryPriority(str, Enum):
+    """AI query priority classes for admission control."""
+    CRITICAL = "critical"
+    NORMAL = "normal"
+    LOW = "low"
+
+
 class Equipment(BaseModel):
     """Equipment model."""
     id: str
@@ -72,6 +79,8 @@ class QueryRequest(BaseModel):
     query: str
     equipment_id: Optional[str] = None
     context: Optional[Dict[str, Any]] = None
+    priority: Optional[QueryPriority] = None
+    session_id: Optional[str] = None
 
 
 class QueryResponse(BaseModel):
@@ -81,6 +90,20 @@ class QueryResponse(BaseModel):
     recommendations: List[str] = []
     confidence: float = Field(..., ge=0, le=1)
     agent_reasoning: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+class BatchQueryRequest(BaseModel):
+    """Batch AI query request."""
+    queries: List[QueryRequest] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+
+
+class BatchQueryResult(QueryResponse):
+    """Result for a single query in a batch."""
+    index: int
+    query: str
+    equipment_id: Optional[str] = None
 
 
 class DashboardMetrics(BaseModel):
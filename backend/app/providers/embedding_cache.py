@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+KEYS_FILE = "keys.txt"
+VECTORS_FILE = "vectors.f32"
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that reuses vectors for previously seen text."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_dir: Optional[str] = None,
+        max_entries: int = 50000
+    ):
+        """
+        Initialize the embedding cache.
+
+        Vectors are keyed by content hash and stored per model as an
+        append-only float32 matrix, with the dimensions and one hex key per
+        row in a sidecar file. The least recently used vectors are evicted
+        beyond max_entries, and the files are rewritten with only the live
+        vectors once evicted rows make up half of them.
+
+        Args:
+            embeddings: Underlying embedding model
+            model_name: Model identifier; each model gets its own cache
+            cache_dir: Directory for the on-disk cache, or None for memory only
+            max_entries: Maximum number of cached vectors (LRU eviction)
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk_rows = 0
+        self._lock = threading.Lock()
+        # Serializes file writes so lookups never wait on disk I/O
+        self._io_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "compactions": 0}
+
+        self.path = None
+        if cache_dir:
+            self.path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9._-]", "_", model_name))
+            self._load()
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        """Hash text content into a cache key."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, calling the model only for unseen texts."""
+        keys = [self.make_key(text) for text in texts]
+
+        with self._lock:
+            found = {key: self._vectors[key] for key in set(keys) if key in self._vectors}
+            for key in found:
+                self._vectors.move_to_end(key)
+
+        # Embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, vectors)
+            }
+            self._store(new)
+            found.update(new)
+
+        with self._lock:
+            self.stats["misses"] += len(missing)
+            self.stats["hits"] += len(texts) - len(missing)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the vector of an identical earlier text."""
+        key = self.make_key(text)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+            self.stats["hits" if vector is not None else "misses"] += 1
+
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            self._store({key: vector})
+        return vector.tolist()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get hit/miss counts and the hit rate."""
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / total if total else 0.0,
+                "entries": len(self._vectors),
+                "model": self.model_name
+            }
+
+    def _store(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Add vectors to memory and append them to the on-disk cache."""
+        snapshot = None
+        with self._lock:
+            new = {key: vector for key, vector in vectors.items() if key not in self._vectors}
+            self._vectors.update(new)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+                self.stats["evictions"] += 1
+            if not new or self.path is None:
+                return
+
+            if self._disk_rows + len(new) > 2 * self.max_entries:
+                # Evicted rows would otherwise accumulate on disk forever
+                snapshot = OrderedDict(self._vectors)
+                self._disk_rows = len(snapshot)
+                self.stats["compactions"] += 1
+            else:
+                self._disk_rows += len(new)
+
+        # Disk writes happen outside the lock; the vectors are never mutated
+        try:
+            with self._io_lock:
+                if snapshot is not None:
+                    self._compact(snapshot)
+                else:
+                    self._append(self.path, new)
+        except OSError as e:
+            logger.warning(f"Could not persist embedding cache: {str(e)}")
+
+    @staticmethod
+    def _append(path: str, vectors: Dict[str, np.ndarray]) -> None:
+        """Append vectors and their keys to the cache files in path."""
+        if not vectors:
+            return
+        os.makedirs(path, exist_ok=True)
+        matrix = np.stack(list(vectors.values())).astype(np.float32)
+        keys_path = os.path.join(path, KEYS_FILE)
+        header = "" if os.path.exists(keys_path) else f"dimensions={matrix.shape[1]}\n"
+        # Vectors first: rows without a key are dropped on load
+        with open(os.path.join(path, VECTORS_FILE), "ab") as f:
+            matrix.tofile(f)
+        with open(keys_path, "a", encoding="utf-8") as f:
+            f.write(header + "".join(f"{key}\n" for key in vectors))
+
+    def _compact(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Rewrite the cache files with only the given vectors, replacing them as a whole."""
+        tmp_path = f"{self.path}.tmp"
+        old_path = f"{self.path}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        self._append(tmp_path, vectors)
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        # A crash here leaves no cache directory, which only costs a cold cache
+        os.rename(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def _load(self) -> None:
+        """Load cached vectors written by earlier runs."""
+        keys_path = os.path.join(self.path, KEYS_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if not os.path.exists(keys_path) or not os.path.exists(vectors_path):
+            return
+
+        try:
+            with open(keys_path, encoding="utf-8") as f:
+                header, *keys = f.read().split()
+            dimensions = int(header.split("=", 1)[1])
+
+            data = np.fromfile(vectors_path, dtype=np.float32)
+            # An interrupted write can leave vectors or keys unmatched; drop them
+            rows = min(len(keys), len(data) // dimensions)
+            mismatched = len(keys) != rows or len(data) != rows * dimensions
+            keys = keys[:rows]
+            matrix = data[:rows * dimensions].reshape(rows, dimensions)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load embedding cache from {self.path}: {str(e)}")
+            return
+
+        # Later rows were written more recently; keep the newest max_entries
+        self._vectors = OrderedDict((key, matrix[i]) for i, key in enumerate(keys))
+        while len(self._vectors) > self.max_entries:
+            self._vectors.popitem(last=False)
+        self._disk_rows = rows
+
+        if mismatched:
+            # Rewrite both files so later appends stay aligned with their keys
+            try:
+                self._compact(self._vectors)
+                self._disk_rows = len(self._vectors)
+            except OSError as e:
+                logger.warning(f"Could not repair embedding cache in {self.path}: {str(e)}")
+        logger.info(f"Loaded {len(self._vectors)} cached embeddings for {self.model_name}")
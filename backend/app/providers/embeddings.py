@@ -0,0 +1,88 @@
+import hashlib
+import math
+import re
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from app.core.config import settings
+from app.providers.embedding_cache import CachedEmbeddings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic local embeddings based on feature hashing of word tokens."""
+
+    def __init__(self, dimensions: int = 256, latency_ms: float = 0.0):
+        """
+        Initialize fake embeddings.
+
+        Args:
+            dimensions: Embedding vector size
+            latency_ms: Simulated latency per embedding request
+        """
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        """Hash word tokens into a signed, L2-normalized vector."""
+        vector = [0.0] * self.dimensions
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm == 0:
+            return vector
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of documents."""
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        return self.embed_documents([text])[0]
+
+
+def get_embeddings() -> Embeddings:
+    """Create an embedding model for the configured embedding provider."""
+    if settings.EMBEDDING_PROVIDER == "fake":
+        embeddings = FakeEmbeddings(
+            dimensions=settings.FAKE_EMBEDDING_DIMENSIONS,
+            latency_ms=settings.FAKE_EMBEDDING_LATENCY_MS
+        )
+        model_name = f"fake-{settings.FAKE_EMBEDDING_DIMENSIONS}"
+    elif settings.EMBEDDING_PROVIDER == "openai":
+        embeddings = OpenAIEmbeddings(
+            model=settings.EMBEDDING_MODEL,
+            openai_api_key=settings.OPENAI_API_KEY
+        )
+        model_name = settings.EMBEDDING_MODEL
+    elif settings.EMBEDDING_PROVIDER == "local":
+        # Imported here: the local backend builds on FakeEmbeddings for its fallback
+        from app.providers.local_embeddings import LocalEmbeddings
+        embeddings = LocalEmbeddings(
+            model=settings.LOCAL_EMBEDDING_MODEL,
+            batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE,
+            max_wait_ms=settings.LOCAL_EMBEDDING_MAX_WAIT_MS,
+            fallback_dimensions=settings.LOCAL_EMBEDDING_FALLBACK_DIMENSIONS
+        )
+        model_name = embeddings.model_name
+    else:
+        raise ValueError(f"Unknown embedding provider: {settings.EMBEDDING_PROVIDER}")
+    
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        model_name,
+        cache_dir=settings.EMBEDDING_CACHE_DIR,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+    )
@@ -0,0 +1,125 @@
+import hashlib
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from app.core.config import settings
+
+FAKE_VOCABULARY = [
+    "inspect", "bearing", "alignment", "vibration", "temperature", "pressure",
+    "lubrication", "seal", "filter", "coupling", "sensor", "calibrate",
+    "schedule", "replace", "monitor", "trend", "baseline", "threshold",
+    "efficiency", "load", "fluid", "cooling", "motor", "pump",
+]
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic local chat model for offline runs, tests and load tests."""
+
+    model_name: str = "fake-chat"
+    temperature: float = 0.0
+    max_tokens: Optional[int] = None
+    # Simulated time to first token, in milliseconds
+    latency_ms: float = 0.0
+    # Simulated generation speed; 0 means instant
+    tokens_per_second: float = 0.0
+    # Number of tokens generated per response
+    output_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        """Generate a deterministic numbered-list response for the prompt."""
+        prompt = "\n".join(f"{msg.type}:{msg.content}" for msg in messages)
+        seed = hashlib.sha256(f"{self.model_name}:{prompt}".encode("utf-8")).digest()
+
+        count = self.output_tokens
+        if self.max_tokens is not None:
+            count = min(count, self.max_tokens)
+
+        tokens = []
+        for i in range(count):
+            if i % 8 == 0:
+                tokens.append(f"\n{i // 8 + 1}." if i else "1.")
+            tokens.append(" " + FAKE_VOCABULARY[seed[i % len(seed)] % len(FAKE_VOCABULARY)])
+        return tokens
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        tokens = self._tokens(messages)
+        self._sleep(self.latency_ms / 1000 + self._generation_seconds(len(tokens)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        self._sleep(self.latency_ms / 1000)
+        for token in self._tokens(messages):
+            self._sleep(self._generation_seconds(1))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _generation_seconds(self, token_count: int) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return token_count / self.tokens_per_second
+
+    @staticmethod
+    def _sleep(seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def get_chat_model(
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None
+) -> BaseChatModel:
+    """
+    Create a chat model for the configured LLM provider.
+
+    Args:
+        model: Model name, defaults to settings.OPENAI_MODEL
+        temperature: Sampling temperature, defaults to settings.AGENT_TEMPERATURE
+        max_tokens: Optional cap on generated tokens
+
+    Returns:
+        Chat model instance
+    """
+    model = model or settings.OPENAI_MODEL
+    temperature = settings.AGENT_TEMPERATURE if temperature is None else temperature
+
+    if settings.LLM_PROVIDER == "fake":
+        return FakeChatModel(
+            model_name=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND
+        )
+    if settings.LLM_PROVIDER == "openai":
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            openai_api_key=settings.OPENAI_API_KEY
+        )
+    raise ValueError(f"Unknown LLM provider: {settings.LLM_PROVIDER}")
@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.providers.embeddings import FakeEmbeddings
+
+logger = logging.getLogger(__name__)
+
+
+class DynamicBatcher:
+    """Group concurrent single-text requests into one model batch."""
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            encode: Function embedding a list of texts into a matrix
+            max_batch_size: Largest batch sent to the model
+            max_wait_ms: How long the first request waits for others to join
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0}
+
+    def submit(self, text: str) -> Future:
+        """Queue a text; the future resolves to its vector."""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+
+            try:
+                vectors = self.encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+class LocalEmbeddings(Embeddings):
+    """CPU sentence-transformers embeddings, with a hashing fallback when unavailable."""
+
+    def __init__(
+        self,
+        model: str = "all-MiniLM-L6-v2",
+        batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        fallback_dimensions: int = 384
+    ):
+        """
+        Initialize local embeddings.
+
+        Args:
+            model: sentence-transformers model name or path
+            batch_size: Maximum texts per model call
+            max_wait_ms: Time a query waits for concurrent queries to batch with
+            fallback_dimensions: Vector size of the hashing fallback
+        """
+        self.batch_size = batch_size
+        self._model = self._load_model(model)
+        if self._model is not None:
+            self.model_name = f"local-{model}"
+        else:
+            self._fallback = FakeEmbeddings(dimensions=fallback_dimensions)
+            self.model_name = f"hashing-{fallback_dimensions}"
+
+        self.batcher = DynamicBatcher(self.encode, max_batch_size=batch_size, max_wait_ms=max_wait_ms)
+
+    @staticmethod
+    def _load_model(model: str):
+        """Load a sentence-transformers model on CPU, or None if not installed or not loadable."""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            logger.warning("sentence-transformers is not installed, using hashing embeddings")
+            return None
+        try:
+            return SentenceTransformer(model, device="cpu")
+        except Exception as e:
+            # Offline hosts and failed downloads raise OSError or hub errors
+            logger.warning(f"Could not load embedding model {model}, using hashing embeddings: {str(e)}")
+            return None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into a float32 matrix of L2-normalized vectors.
+
+        Returns:
+            Array of shape (len(texts), dimensions)
+        """
+        if self._model is not None:
+            vectors = self._model.encode(
+                texts,
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+        else:
+            vectors = np.asarray(self._fallback.embed_documents(texts), dtype=np.float32)
+        return vectors.astype(np.float32, copy=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of documents."""
+        if not texts:
+            return []
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, batched with concurrent queries."""
+        return self.batcher.submit(text).result().tolist()
@@ -0,0 +1,199 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.rag.filters import matches_filter
+
+logger = logging.getLogger(__name__)
+
+# Keeps identifiers like "PUMP-007", "v2.3" and "550f" as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for lexical matching.
+
+    Compound identifiers are indexed whole and by their parts, so
+    "PUMP-007" matches both "pump-007" and "pump". Degree signs are
+    dropped so "550°F" becomes "550f".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower().replace("°", "")):
+        terms.append(token)
+        parts = re.split(r"[-./]", token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+def is_lexical_query(query: str) -> bool:
+    """Check whether a query consists only of identifiers such as part numbers or codes."""
+    tokens = TOKEN_PATTERN.findall(query.lower().replace("°", ""))
+    return bool(tokens) and all(any(char.isdigit() for char in token) for token in tokens)
+
+
+class BM25Index:
+    """In-process inverted index scoring chunks with Okapi BM25."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """Index a chunk, replacing any chunk with the same id."""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove([chunk_id])
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[chunk_id] = count
+            self._terms[chunk_id] = terms
+            self._lengths[chunk_id] = sum(terms.values())
+            self._documents[chunk_id] = (text, metadata)
+            self._total_length += self._lengths[chunk_id]
+
+    def remove(self, chunk_ids: List[str]) -> None:
+        """Remove chunks from the index."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                terms = self._terms.pop(chunk_id, None)
+                if terms is None:
+                    continue
+                for term in terms:
+                    postings = self._postings[term]
+                    del postings[chunk_id]
+                    if not postings:
+                        del self._postings[term]
+                self._total_length -= self._lengths.pop(chunk_id)
+                del self._documents[chunk_id]
+
+    def save(self, path: str) -> None:
+        """
+        Write the postings to a JSON file, replacing it atomically.
+
+        Texts and metadata are not written; load() takes them from the
+        vector store, which already holds them.
+        """
+        with self._lock:
+            data = json.dumps({"postings": self._postings})
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, chunks: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """
+        Restore postings saved by save() for the chunks of the vector store.
+
+        Chunk ids hash their content, so a chunk found in the snapshot needs
+        no tokenizing. Chunks missing from the snapshot are tokenized, and
+        snapshot entries for chunks no longer stored are dropped, so a
+        snapshot older than the vector store is still usable.
+
+        Args:
+            path: File written by save()
+            chunks: Every stored chunk as (id, text, metadata)
+
+        Returns:
+            Number of chunks that had to be tokenized
+        """
+        with open(path, encoding="utf-8") as f:
+            postings: Dict[str, Dict[str, int]] = json.load(f)["postings"]
+
+        terms: Dict[str, Counter] = {}
+        for term, chunk_counts in postings.items():
+            for chunk_id, count in chunk_counts.items():
+                terms.setdefault(chunk_id, Counter())[term] = count
+
+        tokenized = 0
+        with self._lock:
+            self._postings, self._terms, self._lengths, self._documents = postings, {}, {}, {}
+            self._total_length = 0
+            for chunk_id, text, metadata in chunks:
+                chunk_terms = terms.pop(chunk_id, None)
+                if chunk_terms is None:
+                    self.add(chunk_id, text, metadata)
+                    tokenized += 1
+                    continue
+                self._terms[chunk_id] = chunk_terms
+                self._lengths[chunk_id] = sum(chunk_terms.values())
+                self._documents[chunk_id] = (text, metadata)
+                self._total_length += self._lengths[chunk_id]
+
+            # Left over: chunks deleted from the store after the snapshot
+            for chunk_id, chunk_terms in terms.items():
+                for term in chunk_terms:
+                    del postings[term][chunk_id]
+                    if not postings[term]:
+                        del postings[term]
+        return tokenized
+
+    def chunk_ids(self) -> List[str]:
+        """Get the ids of all indexed chunks."""
+        with self._lock:
+            return list(self._documents)
+
+    def get(self, chunk_id: str) -> Tuple[str, Dict[str, Any]]:
+        """Get a chunk's text and metadata."""
+        with self._lock:
+            return self._documents[chunk_id]
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Score chunks against the query.
+
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Metadata filter (see app.rag.filters)
+
+        Returns:
+            (chunk id, score) pairs, best first
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._documents)
+            if count == 0 or not query_terms:
+                return []
+            avg_length = self._total_length / count
+
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            if filter_dict:
+                scores = {
+                    chunk_id: score for chunk_id, score in scores.items()
+                    if matches_filter(self._documents[chunk_id][1], filter_dict)
+                }
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
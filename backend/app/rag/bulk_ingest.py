@@ -0,0 +1,322 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.rag.chunking import Chunks, chunk_file, init_chunk_worker
+from app.rag.pipeline import RAGPipeline
+
+logger = logging.getLogger(__name__)
+
+# Plain text, Markdown and text extracted from PDF manuals
+SUPPORTED_EXTENSIONS = (".txt", ".md", ".markdown")
+
+# File size and modification time; a changed file is re-ingested
+Fingerprint = Tuple[int, int]
+
+# (source, fingerprint, chunks) for one chunked file
+ChunkedFile = Tuple[str, Fingerprint, Chunks]
+
+
+def iter_files(root: str, extensions: Tuple[str, ...] = SUPPORTED_EXTENSIONS) -> Iterator[Tuple[str, str]]:
+    """
+    Walk a directory lazily, yielding (path, source) in a stable order.
+
+    Sources are paths relative to root with forward slashes, so they stay
+    the same across machines and mount points.
+    """
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                path = os.path.join(directory, name)
+                yield path, os.path.relpath(path, root).replace(os.sep, "/")
+
+
+class IngestCheckpoint:
+    """Append-only record of files whose chunks are safely indexed."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Load the checkpoint.
+
+        Args:
+            path: JSON-lines checkpoint file; None keeps it in memory only
+        """
+        self.path = path
+        self._done: Dict[str, Fingerprint] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash mid-write leaves at most one partial line
+                        continue
+                    self._done[entry["source"]] = (entry["size"], entry["mtime_ns"])
+            logger.info(f"Checkpoint loaded with {len(self._done)} completed files")
+
+    def is_done(self, source: str, fingerprint: Fingerprint) -> bool:
+        """Check whether a file was indexed and has not changed since."""
+        return self._done.get(source) == fingerprint
+
+    def commit(self, files: List[Tuple[str, Fingerprint]]) -> None:
+        """Durably record files as indexed."""
+        if not files:
+            return
+        for source, fingerprint in files:
+            self._done[source] = fingerprint
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for source, (size, mtime_ns) in files:
+                f.write(json.dumps({"source": source, "size": size, "mtime_ns": mtime_ns}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+
+class BulkIngestor:
+    """
+    Streaming ingestion of a directory of manuals.
+
+    A reader thread walks the directory and hands files to a process pool
+    for reading and chunking, with a bounded number of files in flight.
+    Chunked files are grouped into batches on a bounded queue, and the
+    calling thread drains it into RAGPipeline.upsert_chunks, which embeds
+    and indexes them. Every stage is bounded, so memory stays flat however
+    large the library is; a slow embedding provider back-pressures the
+    reader instead of piling up chunks.
+
+    Snapshot indexes (NumPy) are rewritten and re-clustered on every save,
+    so mid-run checkpoints only save once the index has grown by its size
+    at the last save (and at least checkpoint_min_chunks). Total save work
+    stays linear in the index size; a crash loses at most the files
+    indexed since the last save, which a re-run picks up again.
+    """
+
+    def __init__(
+        self,
+        pipeline: RAGPipeline,
+        checkpoint_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_documents: Optional[int] = None,
+        queue_batches: Optional[int] = None,
+        checkpoint_seconds: Optional[float] = None,
+        checkpoint_min_chunks: Optional[int] = None
+    ):
+        """
+        Initialize the ingestor.
+
+        Args:
+            pipeline: Pipeline to index into
+            checkpoint_path: Checkpoint file for resuming; None disables resume
+            workers: Chunking processes (default settings.INGEST_CHUNK_WORKERS)
+            batch_documents: Files per indexing batch (default settings.INGEST_BATCH_DOCUMENTS)
+            queue_batches: Batches buffered between chunking and indexing (default settings.INGEST_QUEUE_BATCHES)
+            checkpoint_seconds: Minimum time between checkpoints (default settings.INGEST_CHECKPOINT_SECONDS)
+            checkpoint_min_chunks: Minimum growth of a snapshot index between mid-run saves
+                (default settings.INGEST_CHECKPOINT_MIN_CHUNKS)
+        """
+        self.pipeline = pipeline
+        self.checkpoint = IngestCheckpoint(checkpoint_path)
+        self.workers = workers or settings.INGEST_CHUNK_WORKERS
+        self.batch_documents = batch_documents or settings.INGEST_BATCH_DOCUMENTS
+        self.queue_batches = queue_batches or settings.INGEST_QUEUE_BATCHES
+        self.checkpoint_seconds = (
+            settings.INGEST_CHECKPOINT_SECONDS if checkpoint_seconds is None else checkpoint_seconds
+        )
+        self.checkpoint_min_chunks = (
+            settings.INGEST_CHECKPOINT_MIN_CHUNKS if checkpoint_min_chunks is None else checkpoint_min_chunks
+        )
+        self.stats = {"index_saves": 0}
+        self._saved_chunks = 0
+
+    def ingest_directory(self, root: str, extensions: Tuple[str, ...] = SUPPORTED_EXTENSIONS) -> Dict[str, Any]:
+        """
+        Ingest every supported file under root, skipping checkpointed files.
+
+        Args:
+            root: Library directory
+            extensions: File extensions to ingest
+
+        Returns:
+            Counts of documents, chunks and files skipped or failed, with
+            elapsed time and throughput in docs/s and chunks/s
+        """
+        if not os.path.isdir(root):
+            raise ValueError(f"Not a directory: {root}")
+
+        start = time.perf_counter()
+        batches: "queue.Queue[Optional[List[ChunkedFile]]]" = queue.Queue(maxsize=self.queue_batches)
+        stop = threading.Event()
+        reader_stats = {"skipped": 0, "failed_documents": 0}
+        reader_errors: List[BaseException] = []
+
+        def read():
+            try:
+                self._read(root, extensions, batches, stop, reader_stats)
+            except BaseException as e:
+                reader_errors.append(e)
+            finally:
+                self._put(batches, None, stop)
+
+        reader = threading.Thread(target=read, name="ingest-reader", daemon=True)
+        reader.start()
+
+        totals = {"documents": 0, "chunks": 0, "added": 0, "unchanged": 0, "deleted": 0, "failed": 0}
+        uncommitted: List[Tuple[str, Fingerprint]] = []
+        last_checkpoint = time.perf_counter()
+        self._saved_chunks = self.pipeline.store.count()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+
+                chunks: Chunks = {}
+                for _, _, file_chunks in batch:
+                    chunks.update(file_chunks)
+                report = self.pipeline.upsert_chunks(chunks, {source for source, _, _ in batch}, len(batch))
+
+                totals["documents"] += len(batch)
+                totals["chunks"] += len(chunks)
+                for key in ("added", "unchanged", "deleted", "failed"):
+                    totals[key] += report[key]
+                # Files with failed chunks stay out of the checkpoint so a re-run retries them
+                if not report["failed"]:
+                    uncommitted.extend((source, fingerprint) for source, fingerprint, _ in batch)
+
+                if time.perf_counter() - last_checkpoint >= self.checkpoint_seconds:
+                    if self._should_save():
+                        self._checkpoint(uncommitted)
+                        uncommitted = []
+                    last_checkpoint = time.perf_counter()
+                    self._log_progress(totals, reader_stats, start)
+        finally:
+            stop.set()
+            reader.join()
+
+        if reader_errors:
+            raise reader_errors[0]
+
+        self._checkpoint(uncommitted, lexical=totals["documents"] > 0)
+        elapsed = time.perf_counter() - start
+        report = {
+            **totals,
+            **reader_stats,
+            "seconds": round(elapsed, 3),
+            "docs_per_second": round(totals["documents"] / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_second": round(totals["chunks"] / elapsed, 2) if elapsed else 0.0,
+            "index_saves": self.stats["index_saves"]
+        }
+        logger.info(
+            f"Ingested {report['documents']} documents ({report['chunks']} chunks, {report['added']} added) "
+            f"in {report['seconds']:.1f}s: {report['docs_per_second']:.1f} docs/s, "
+            f"{report['chunks_per_second']:.1f} chunks/s; {report['skipped']} skipped, "
+            f"{report['failed_documents']} unreadable, {report['failed']} chunks failed"
+        )
+        return report
+
+    def _read(
+        self,
+        root: str,
+        extensions: Tuple[str, ...],
+        batches: queue.Queue,
+        stop: threading.Event,
+        stats: Dict[str, int]
+    ) -> None:
+        """Chunk files in the process pool and queue them in batches."""
+        max_pending = self.workers * 2
+        pending: Dict[Any, Tuple[str, Fingerprint]] = {}
+        batch: List[ChunkedFile] = []
+
+        def collect(return_when):
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                source, fingerprint = pending.pop(future)
+                try:
+                    batch.append((source, fingerprint, future.result()))
+                except Exception as e:
+                    logger.error(f"Failed to chunk {source}: {str(e)}")
+                    stats["failed_documents"] += 1
+
+        def flush(minimum: int):
+            nonlocal batch
+            while len(batch) >= minimum and batch:
+                self._put(batches, batch[:self.batch_documents], stop)
+                batch = batch[self.batch_documents:]
+
+        # Spawned workers only import the chunking module, not the pipeline's clients
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_chunk_worker,
+            initargs=(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+        ) as pool:
+            for path, source in iter_files(root, extensions):
+                if stop.is_set():
+                    return
+                stat = os.stat(path)
+                fingerprint = (stat.st_size, stat.st_mtime_ns)
+                if self.checkpoint.is_done(source, fingerprint):
+                    stats["skipped"] += 1
+                    continue
+
+                pending[pool.submit(chunk_file, path, source)] = (source, fingerprint)
+                if len(pending) >= max_pending:
+                    collect(FIRST_COMPLETED)
+                    flush(self.batch_documents)
+
+            if pending:
+                collect(ALL_COMPLETED)
+            flush(1)
+
+    @staticmethod
+    def _put(batches: queue.Queue, item: Any, stop: threading.Event) -> None:
+        """Block until the queue has room, unless ingestion was stopped."""
+        while True:
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    return
+
+    def _should_save(self) -> bool:
+        """Check whether a mid-run checkpoint is worth saving the index for."""
+        if self.pipeline.index_writes_through:
+            return True
+        grown = self.pipeline.store.count() - self._saved_chunks
+        return grown >= max(self._saved_chunks, self.checkpoint_min_chunks)
+
+    def _checkpoint(self, files: List[Tuple[str, Fingerprint]], lexical: bool = False) -> None:
+        """Persist the index, then record its files as done."""
+        if not files and not lexical:
+            return
+        # The index must be durable before the checkpoint claims its files; the
+        # lexical snapshot may lag, as chunks it lacks are tokenized on load
+        self.pipeline.save_index(lexical=lexical)
+        self.stats["index_saves"] += 1
+        self._saved_chunks = self.pipeline.store.count()
+        self.checkpoint.commit(files)
+
+    @staticmethod
+    def _log_progress(totals: Dict[str, int], reader_stats: Dict[str, int], start: float) -> None:
+        """Log running throughput."""
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Ingested {totals['documents']} documents, {totals['chunks']} chunks "
+            f"({totals['documents'] / elapsed:.1f} docs/s, {totals['chunks'] / elapsed:.1f} chunks/s), "
+            f"{reader_stats['skipped']} skipped"
+        )
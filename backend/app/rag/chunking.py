@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.rag.filters import normalize_metadata
+
+# Equipment ids in file names such as COMP-001_Manual_v2.3.txt
+FILENAME_EQUIPMENT_PATTERN = re.compile(r"(?<![A-Z])[A-Z]{2,}-\d{2,}(?!\d)")
+
+Chunks = Dict[str, Tuple[str, Dict[str, Any]]]
+
+# Per-process splitter for chunking workers, set by init_chunk_worker
+_worker_splitter: Optional[RecursiveCharacterTextSplitter] = None
+
+
+def make_text_splitter(chunk_size: int = 1000, chunk_overlap: int = 200) -> RecursiveCharacterTextSplitter:
+    """Create the splitter used to chunk documents."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+
+
+def chunk_id(source: str, text: str, metadata: Dict[str, Any]) -> str:
+    """Derive a stable chunk id from its source, content and metadata."""
+    payload = json.dumps([source, text, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def split_document(
+    content: str,
+    source: str,
+    metadata: Dict[str, Any],
+    splitter: RecursiveCharacterTextSplitter
+) -> Chunks:
+    """
+    Split a document into chunks keyed by chunk id.
+
+    Args:
+        content: Document text
+        source: Document source, stored in every chunk's metadata
+        metadata: Document metadata; dates are stored as YYYYMMDD integers
+        splitter: Text splitter
+
+    Returns:
+        Mapping of chunk id to (text, metadata)
+    """
+    metadata = {**normalize_metadata(metadata), "source": source}
+    return {
+        chunk_id(source, text, metadata): (text, metadata)
+        for text in splitter.split_text(content)
+    }
+
+
+def file_metadata(source: str) -> Dict[str, Any]:
+    """
+    Infer chunk metadata from a file's path relative to the library root.
+
+    The equipment id comes from the file name and the category from the
+    top-level directory, so a library laid out as
+    maintenance/COMP-001_Manual.txt needs no sidecar metadata.
+    """
+    metadata: Dict[str, Any] = {"doc_type": "manual"}
+    match = FILENAME_EQUIPMENT_PATTERN.search(os.path.basename(source))
+    if match:
+        metadata["equipment_id"] = match.group()
+    if "/" in source:
+        metadata["category"] = source.split("/", 1)[0]
+    return metadata
+
+
+def init_chunk_worker(chunk_size: int, chunk_overlap: int) -> None:
+    """Process pool initializer: build the worker's splitter once."""
+    global _worker_splitter
+    _worker_splitter = make_text_splitter(chunk_size, chunk_overlap)
+
+
+def chunk_file(path: str, source: str) -> Chunks:
+    """Read and chunk one file inside a chunking worker process."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    return split_document(content, source, file_metadata(source), _worker_splitter)
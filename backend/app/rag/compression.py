@@ -0,0 +1,195 @@
+import logging
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.tokens import estimate_tokens
+from app.rag.bm25 import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends (not list numbers like "1."), and line breaks between list items and headings
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])(?<!\d\.)\s+|\s*\n\s*")
+MIN_SENTENCE_CHARS = 4
+# Marks sentences dropped between two kept ones
+GAP_MARKER = " ... "
+
+# (score, document index, position in document, sentence)
+ScoredSentence = Tuple[float, int, int, str]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a chunk into sentences and list items."""
+    return [
+        sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text)
+        if len(sentence.strip()) >= MIN_SENTENCE_CHARS
+    ]
+
+
+class ContextCompressor:
+    """
+    Extractive compression of retrieved documents for LLM prompts.
+
+    Instead of cutting chunks at fixed offsets, every sentence is scored
+    against the query and the best ones are packed into a token budget,
+    kept in document order so excerpts still read naturally. Scoring is
+    separate from packing, so one scoring pass can feed prompts with
+    different budgets.
+    """
+
+    def __init__(self, embeddings: Embeddings, lexical_weight: float = 0.2):
+        """
+        Initialize the compressor.
+
+        Args:
+            embeddings: Embedding model used for the query and sentences
+            lexical_weight: Weight of query term overlap added to the cosine
+                similarity, so exact identifiers and codes are kept
+        """
+        self.embeddings = embeddings
+        self.lexical_weight = lexical_weight
+        self._lock = threading.Lock()
+        self.stats = {"compressions": 0, "input_tokens": 0, "output_tokens": 0, "embedding_failures": 0}
+
+    def score(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None
+    ) -> List[ScoredSentence]:
+        """
+        Score the sentences of retrieved documents against a query.
+
+        Sentences repeated across documents, such as chunk overlaps, are
+        scored once. If embedding fails, sentences are scored on term
+        overlap alone.
+
+        Args:
+            query: User query
+            documents: Search results with 'content'
+            query_embedding: Precomputed query embedding, skips re-embedding
+
+        Returns:
+            Scored sentences, best first
+        """
+        sentences: List[Tuple[int, int, str]] = []
+        seen = set()
+        for doc_index, doc in enumerate(documents):
+            for position, sentence in enumerate(split_sentences(doc["content"])):
+                if sentence not in seen:
+                    seen.add(sentence)
+                    sentences.append((doc_index, position, sentence))
+        if not sentences:
+            return []
+
+        texts = [sentence for _, _, sentence in sentences]
+        scores = self.lexical_weight * self._term_overlap(query, texts)
+        try:
+            if query_embedding is None:
+                query_embedding = self.embeddings.embed_query(query)
+            scores += self._similarity(query_embedding, self.embeddings.embed_documents(texts))
+        except Exception as e:
+            logger.warning(f"Sentence embedding failed, compressing on term overlap only: {str(e)}")
+            with self._lock:
+                self.stats["embedding_failures"] += 1
+
+        scored = [
+            (float(score), doc_index, position, sentence)
+            for score, (doc_index, position, sentence) in zip(scores, sentences)
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+        return scored
+
+    def pack(
+        self,
+        documents: List[Dict[str, Any]],
+        scored: List[ScoredSentence],
+        max_tokens: int
+    ) -> List[Dict[str, str]]:
+        """
+        Pack the best sentences into a token budget.
+
+        Args:
+            documents: Search results the sentences were scored from
+            scored: Output of score()
+            max_tokens: Budget for excerpts, including a source line per document
+
+        Returns:
+            Excerpts with 'source' and 'content' for documents that kept at
+            least one sentence, in retrieval order
+        """
+        selected: Dict[int, List[Tuple[int, str]]] = {}
+        remaining = max_tokens
+        for _, doc_index, position, sentence in scored:
+            # Charged with a separator, so the joined excerpt stays within budget
+            cost = estimate_tokens(GAP_MARKER + sentence)
+            if doc_index not in selected:
+                cost += estimate_tokens(f"Source: {documents[doc_index]['source']}")
+            if cost > remaining:
+                continue
+            selected.setdefault(doc_index, []).append((position, sentence))
+            remaining -= cost
+
+        excerpts = []
+        for doc_index in sorted(selected):
+            parts, previous = [], None
+            for position, sentence in sorted(selected[doc_index]):
+                if previous is not None:
+                    parts.append(" " if position == previous + 1 else GAP_MARKER)
+                parts.append(sentence)
+                previous = position
+            excerpts.append({"source": documents[doc_index]["source"], "content": "".join(parts)})
+
+        with self._lock:
+            self.stats["compressions"] += 1
+            self.stats["input_tokens"] += sum(estimate_tokens(doc["content"]) for doc in documents)
+            self.stats["output_tokens"] += max_tokens - remaining
+        return excerpts
+
+    def compress(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        max_tokens: int,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, str]]:
+        """Score and pack in one step; see score() and pack()."""
+        return self.pack(documents, self.score(query, documents, query_embedding), max_tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get compression counts and the overall output to input token ratio."""
+        with self._lock:
+            return {
+                **self.stats,
+                "ratio": self.stats["output_tokens"] / self.stats["input_tokens"] if self.stats["input_tokens"] else 0.0
+            }
+
+    @staticmethod
+    def _similarity(query_embedding: List[float], embeddings: List[List[float]]) -> np.ndarray:
+        """Cosine similarity of each sentence embedding to the query."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        return matrix @ query / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _term_overlap(query: str, texts: List[str]) -> np.ndarray:
+        """Share of the query's IDF weight each sentence covers; common words count little."""
+        query_terms = set(tokenize(query))
+        sentence_terms = [set(tokenize(text)) for text in texts]
+        if not query_terms:
+            return np.zeros(len(texts), dtype=np.float32)
+
+        idf = {
+            term: math.log(1 + len(texts) / (1 + sum(term in terms for terms in sentence_terms)))
+            for term in query_terms
+        }
+        total = sum(idf.values())
+        return np.asarray(
+            [sum(idf[term] for term in query_terms & terms) / total for terms in sentence_terms],
+            dtype=np.float32
+        )
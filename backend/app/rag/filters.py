@@ -0,0 +1,152 @@
+import operator
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+# Field conditions supported by every backend, in Chroma's where syntax
+COMPARISON_OPERATORS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+MEMBERSHIP_OPERATORS = ("$in", "$nin")
+LOGICAL_OPERATORS = ("$and", "$or")
+
+# Dates are stored as YYYYMMDD integers, since Chroma only range-compares numbers
+DATE_FIELDS = ("date",)
+
+
+def to_date_number(value: Any) -> int:
+    """
+    Convert a date to its YYYYMMDD integer form.
+
+    Args:
+        value: date, datetime, ISO string or YYYYMMDD integer
+
+    Raises:
+        ValueError: If the value is not a recognizable date
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Not a date: {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, (date, datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    raise ValueError(f"Not a date: {value!r}")
+
+
+def normalize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Store date fields as YYYYMMDD integers so they can be range-filtered."""
+    dates = {field: to_date_number(metadata[field]) for field in DATE_FIELDS if metadata.get(field) is not None}
+    return {**metadata, **dates} if dates else metadata
+
+
+def normalize_filter(filter_dict: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validate a filter and rewrite it in canonical form.
+
+    Filters use Chroma's where syntax: {"field": value} for equality,
+    {"field": {"$in": [...]}} and the other operators for conditions, and
+    "$and"/"$or" lists to combine them; several fields in one dict are
+    implicitly and-ed. The canonical form has exactly one key per dict,
+    an explicit operator on every field and dates as YYYYMMDD integers,
+    which Chroma accepts as-is and the in-process indexes can push down.
+
+    Args:
+        filter_dict: Filter, or None
+
+    Returns:
+        Canonical filter, or None for an empty filter
+
+    Raises:
+        ValueError: On unknown operators or malformed operands
+    """
+    if not filter_dict:
+        return None
+
+    conditions = []
+    for key, value in filter_dict.items():
+        if key in LOGICAL_OPERATORS:
+            if not isinstance(value, list):
+                raise ValueError(f"{key} expects a list of filters")
+            children = [child for child in (normalize_filter(item) for item in value) if child]
+            if len(children) > 1:
+                conditions.append({key: children})
+            elif children:
+                conditions.append(children[0])
+        elif key.startswith("$"):
+            raise ValueError(f"Unknown filter operator: {key}")
+        else:
+            conditions.extend(_normalize_field(key, value))
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def _normalize_field(field: str, condition: Any) -> List[Dict[str, Any]]:
+    """Rewrite one field's condition as single-operator conditions."""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+
+    normalized = []
+    for op, operand in condition.items():
+        if op in MEMBERSHIP_OPERATORS:
+            if not isinstance(operand, (list, tuple, set)) or not operand:
+                raise ValueError(f"{op} on {field} expects a non-empty list")
+            operand = [to_date_number(item) if field in DATE_FIELDS else item for item in operand]
+        elif op in COMPARISON_OPERATORS:
+            if field in DATE_FIELDS:
+                operand = to_date_number(operand)
+        else:
+            raise ValueError(f"Unknown filter operator: {op}")
+        normalized.append({field: {op: operand}})
+    return normalized
+
+
+def matches_filter(metadata: Dict[str, Any], filter_dict: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check metadata against a filter.
+
+    Accepts raw or canonical filters, though dates in raw filters must
+    already be YYYYMMDD integers. As in Chroma, a condition on a field the
+    metadata lacks never matches, including $ne and $nin.
+    """
+    if not filter_dict:
+        return True
+
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            matched = all(matches_filter(metadata, child) for child in condition)
+        elif key == "$or":
+            matched = any(matches_filter(metadata, child) for child in condition)
+        else:
+            matched = key in metadata and _matches_condition(metadata[key], condition)
+        if not matched:
+            return False
+    return True
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    """Check one field value against its condition."""
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for op, operand in condition.items():
+        if op == "$in":
+            matched = value in operand
+        elif op == "$nin":
+            matched = value not in operand
+        else:
+            try:
+                matched = COMPARISON_OPERATORS[op](value, operand)
+            except TypeError:
+                # Range comparison across types, e.g. a string against a number
+                matched = False
+        if not matched:
+            return False
+    return True
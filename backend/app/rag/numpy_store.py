@@ -0,0 +1,483 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.rag.filters import COMPARISON_OPERATORS, DATE_FIELDS, matches_filter, normalize_filter
+from app.rag.vector_store import Chunk
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.jsonl"
+CENTROIDS_FILE = "centroids.npy"
+ASSIGNMENTS_FILE = "assignments.npy"
+
+# Rows scored per block, bounds the float32 temporary for float16 matrices
+SCORE_BLOCK_ROWS = 8192
+MIN_CAPACITY = 1024
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 256
+
+# Fields with a precomputed row mask per value; equality and $in/$nin
+# conditions on them never touch chunk metadata
+MASKED_FIELDS = ("equipment_id", "equipment_type", "site", "doc_type", "category")
+# Date columns use 0 for rows without a date
+MISSING_DATE = 0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class NumpyVectorStore:
+    """In-process vector index over a contiguous matrix of normalized embeddings."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dtype: str = "float32",
+        ivf_lists: int = 256,
+        ivf_probes: int = 16,
+        ivf_min_rows: int = 50000
+    ):
+        """
+        Initialize the index, loading the snapshot at path if one exists.
+
+        Args:
+            path: Snapshot directory, or None for a memory-only index
+            dtype: Matrix precision, "float32" or "float16"
+            ivf_lists: Number of IVF partitions; 0 always searches brute force
+            ivf_probes: Partitions scanned per query
+            ivf_min_rows: Below this size the IVF partitions are not built
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.ivf_min_rows = ivf_min_rows
+
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._sources: Dict[str, Set[str]] = {}
+        # Precomputed row masks and date columns, so filters are pushed down
+        self._value_masks: Dict[str, Dict[Any, np.ndarray]] = {field: {} for field in MASKED_FIELDS}
+        self._dates: Dict[str, np.ndarray] = {field: np.zeros(0, dtype=np.int64) for field in DATE_FIELDS}
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lock = threading.RLock()
+
+        if path and os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            self.load(path)
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Insert or replace chunks with precomputed embeddings."""
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            new_rows = sum(1 for chunk_id in ids if chunk_id not in self._rows)
+            self._reserve(self._size + new_rows, vectors.shape[1])
+
+            rows = []
+            for chunk_id, text, metadata in zip(ids, documents, metadatas):
+                row = self._rows.get(chunk_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(chunk_id)
+                    self._texts.append(text)
+                    self._metadatas.append(metadata)
+                    self._rows[chunk_id] = row
+                else:
+                    self._unindex(row)
+                    self._texts[row] = text
+                    self._metadatas[row] = metadata
+                self._index(row)
+                rows.append(row)
+
+            rows = np.asarray(rows)
+            self._matrix[rows] = vectors.astype(self.dtype)
+            if self._centroids is not None:
+                self._assignments[rows] = np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks by id; their rows are reclaimed on the next save."""
+        with self._lock:
+            for chunk_id in ids:
+                row = self._rows.pop(chunk_id, None)
+                if row is not None:
+                    self._unindex(row)
+
+    def ids_for_sources(self, sources: Set[str]) -> Set[str]:
+        """Get the ids of stored chunks belonging to the given sources."""
+        with self._lock:
+            return set().union(*(self._sources.get(source, set()) for source in sources))
+
+    def iter_chunks(self) -> Iterator[Chunk]:
+        """Iterate over all stored chunks as (id, text, metadata)."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+        for row in rows:
+            yield self._ids[row], self._texts[row], self._metadatas[row]
+
+    def query(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Chunk]:
+        """Get the k nearest chunks as (id, text, metadata), best first."""
+        return [chunk for chunk, _ in self.query_with_scores(embedding, k, filter_dict)]
+
+    def query_with_scores(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Chunk, float]]:
+        """
+        Get the k nearest chunks by cosine similarity.
+
+        Filters are applied before scoring, so filtered searches only score
+        matching rows. With IVF partitions built, only the ivf_probes
+        partitions nearest to the query are scanned.
+
+        Args:
+            embedding: Query embedding
+            k: Number of results
+            filter_dict: Metadata filter (see app.rag.filters)
+
+        Returns:
+            ((id, text, metadata), cosine similarity) pairs, best first
+        """
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            if self._matrix is None or k <= 0:
+                return []
+            # Compaction and load rebind these rather than mutate them, so the
+            # references stay consistent with the rows scored outside the lock
+            matrix, size = self._matrix, self._size
+            ids, texts, metadatas = self._ids, self._texts, self._metadatas
+            mask = self._filter_mask(filter_dict)
+            if self._centroids is not None:
+                probes = np.argsort(-(self._centroids @ query))[:self.ivf_probes]
+                mask &= np.isin(self._assignments[:size], probes)
+
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return []
+
+        if rows.size > size // 2:
+            # Dense selection: scoring the contiguous block beats gathering rows
+            scores = self._scores(matrix[:size], query)
+            scores[~mask] = -np.inf
+            candidates = np.arange(size)
+        else:
+            scores = self._scores(matrix[rows], query)
+            candidates = rows
+
+        k = min(k, rows.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            ((ids[row], texts[row], metadatas[row]), float(scores[i]))
+            for i, row in zip(top, candidates[top])
+        ]
+
+    def count(self) -> int:
+        """Get the number of stored chunks."""
+        with self._lock:
+            return len(self._rows)
+
+    def build_ivf(self) -> None:
+        """Partition the rows with k-means; small indexes stay brute force."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            if self.ivf_lists <= 0 or rows.size < max(self.ivf_min_rows, self.ivf_lists):
+                self._centroids = None
+                return
+
+            rng = np.random.default_rng(0)
+            sample_size = min(rows.size, self.ivf_lists * KMEANS_SAMPLES_PER_LIST)
+            sample = self._matrix[rng.choice(rows, sample_size, replace=False)].astype(np.float32)
+            centroids = sample[rng.choice(sample_size, self.ivf_lists, replace=False)]
+            for _ in range(KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for i in range(self.ivf_lists):
+                    members = sample[labels == i]
+                    if len(members):
+                        centroids[i] = members.mean(axis=0)
+                centroids = _normalize(centroids)
+
+            assignments = np.zeros(len(self._alive), dtype=np.int32)
+            for start in range(0, self._size, SCORE_BLOCK_ROWS):
+                block = self._matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+                assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+            self._centroids = centroids
+            self._assignments = assignments
+            logger.info(f"Built {self.ivf_lists} IVF partitions over {rows.size} vectors")
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Write a compacted snapshot, replacing the previous one atomically.
+
+        Args:
+            path: Snapshot directory, defaults to the index path
+        """
+        path = path or self.path
+        if not path:
+            return
+
+        with self._lock:
+            self._compact()
+            self.build_ivf()
+            tmp_path = f"{path}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+
+            dimensions = self._matrix.shape[1] if self._matrix is not None else 0
+            np.save(os.path.join(tmp_path, VECTORS_FILE), self._vectors())
+            with open(os.path.join(tmp_path, CHUNKS_FILE), "w", encoding="utf-8") as f:
+                for row in range(self._size):
+                    f.write(json.dumps([self._ids[row], self._texts[row], self._metadatas[row]]) + "\n")
+            if self._centroids is not None:
+                np.save(os.path.join(tmp_path, CENTROIDS_FILE), self._centroids)
+                np.save(os.path.join(tmp_path, ASSIGNMENTS_FILE), self._assignments[:self._size])
+            with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+                json.dump({"count": self._size, "dimensions": dimensions, "dtype": self.dtype.name}, f)
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        logger.info(f"Saved vector index snapshot with {self._size} vectors to {path}")
+
+    def load(self, path: str) -> None:
+        """Load a snapshot; the matrix is memory-mapped rather than read."""
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        # An empty matrix cannot be memory-mapped
+        matrix = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r") if manifest["count"] else None
+        with open(os.path.join(path, CHUNKS_FILE), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+
+        with self._lock:
+            self.dtype = np.dtype(manifest["dtype"])
+            self._matrix = matrix
+            self._size = len(chunks)
+            self._alive = np.zeros(self._size, dtype=bool)
+            self._ids = [chunk[0] for chunk in chunks]
+            self._texts = [chunk[1] for chunk in chunks]
+            self._metadatas = [chunk[2] for chunk in chunks]
+            self._rows = {}
+            self._sources = {}
+            self._value_masks = {field: {} for field in MASKED_FIELDS}
+            self._dates = {field: np.zeros(self._size, dtype=np.int64) for field in DATE_FIELDS}
+            for row in range(self._size):
+                self._rows[self._ids[row]] = row
+                self._index(row)
+
+            self._centroids = None
+            self._assignments = np.zeros(self._size, dtype=np.int32)
+            if os.path.exists(os.path.join(path, CENTROIDS_FILE)):
+                self._centroids = np.load(os.path.join(path, CENTROIDS_FILE))
+                self._assignments = np.load(os.path.join(path, ASSIGNMENTS_FILE))
+        logger.info(f"Loaded vector index snapshot with {self._size} vectors from {path}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, precision and partitioning details."""
+        with self._lock:
+            return {
+                "count": len(self._rows),
+                "dimensions": self._matrix.shape[1] if self._matrix is not None else 0,
+                "dtype": self.dtype.name,
+                "bytes": self._size * self._matrix.shape[1] * self.dtype.itemsize if self._matrix is not None else 0,
+                "memory_mapped": isinstance(self._matrix, np.memmap),
+                "ivf_lists": len(self._centroids) if self._centroids is not None else 0
+            }
+
+    def _scores(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Score rows block by block in float32."""
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+        return scores
+
+    def _filter_mask(self, filter_dict: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Build the row mask for a filter, pushing conditions down where possible."""
+        mask = self._alive[:self._size].copy()
+        filter_dict = normalize_filter(filter_dict)
+        if filter_dict:
+            mask = self._condition_mask(filter_dict, mask)
+        return mask
+
+    def _condition_mask(self, condition: Dict[str, Any], candidates: np.ndarray) -> np.ndarray:
+        """Narrow the candidate rows to those matching one canonical condition."""
+        (key, value), = condition.items()
+        if key == "$and":
+            # Indexed conditions first, so any metadata scan sees the fewest rows
+            for child in sorted(value, key=lambda child: not self._is_indexed(child)):
+                candidates = self._condition_mask(child, candidates)
+            return candidates
+        if key == "$or":
+            matched = np.zeros_like(candidates)
+            for child in value:
+                matched |= self._condition_mask(child, candidates)
+            return matched
+
+        (op, operand), = value.items()
+        if key in self._value_masks and op in ("$eq", "$ne", "$in", "$nin"):
+            return candidates & self._values_mask(key, op, operand)
+        if key in self._dates:
+            dates = self._dates[key][:self._size]
+            if op in ("$in", "$nin"):
+                matched = np.isin(dates, operand)
+                matched = matched if op == "$in" else ~matched
+            else:
+                matched = COMPARISON_OPERATORS[op](dates, operand)
+            return candidates & matched & (dates != MISSING_DATE)
+
+        # Unindexed field: scan the metadata of the remaining rows
+        matched = candidates.copy()
+        for row in np.flatnonzero(candidates):
+            if not matches_filter(self._metadatas[row], condition):
+                matched[row] = False
+        return matched
+
+    def _values_mask(self, field: str, op: str, operand: Any) -> np.ndarray:
+        """Union the precomputed masks of the values an equality or membership condition selects."""
+        masks = self._value_masks[field]
+        if op == "$eq":
+            selected = [operand]
+        elif op == "$in":
+            selected = operand
+        else:
+            excluded = {operand} if op == "$ne" else set(operand)
+            selected = [value for value in masks if value not in excluded]
+
+        mask = np.zeros(self._size, dtype=bool)
+        for value in selected:
+            value_mask = masks.get(value)
+            if value_mask is not None:
+                mask |= value_mask[:self._size]
+        return mask
+
+    def _is_indexed(self, condition: Dict[str, Any]) -> bool:
+        """Check whether a condition is answered from masks and columns alone."""
+        (key, value), = condition.items()
+        if key in ("$and", "$or"):
+            return all(self._is_indexed(child) for child in value)
+        (op, _), = value.items()
+        return key in self._dates or (key in self._value_masks and op in ("$eq", "$ne", "$in", "$nin"))
+
+    def _reserve(self, rows: int, dimensions: int) -> None:
+        """Grow the matrix and row arrays to hold at least rows entries."""
+        if self._matrix is not None and self._matrix.shape[1] != dimensions:
+            raise ValueError(f"Embedding dimensions {dimensions} do not match index ({self._matrix.shape[1]})")
+
+        capacity = len(self._matrix) if self._matrix is not None else 0
+        writable = self._matrix is not None and not isinstance(self._matrix, np.memmap)
+        if rows <= capacity and writable:
+            return
+
+        # A memory-mapped snapshot is read-only; the first write copies it to memory
+        capacity = max(rows, capacity * 2 if writable else rows, MIN_CAPACITY)
+        matrix = np.zeros((capacity, dimensions), dtype=self.dtype)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+        self._alive = self._resized(self._alive, capacity)
+        self._assignments = self._resized(self._assignments, capacity)
+        for masks in self._value_masks.values():
+            for value, value_mask in masks.items():
+                masks[value] = self._resized(value_mask, capacity)
+        for field, dates in self._dates.items():
+            self._dates[field] = self._resized(dates, capacity)
+
+    def _index(self, row: int) -> None:
+        """Mark a row live in the masks, date columns and source lookup."""
+        metadata = self._metadatas[row]
+        self._alive[row] = True
+        self._sources.setdefault(metadata.get("source", "unknown"), set()).add(self._ids[row])
+        for field, masks in self._value_masks.items():
+            value = metadata.get(field)
+            if value is not None:
+                if value not in masks:
+                    masks[value] = np.zeros(len(self._alive), dtype=bool)
+                masks[value][row] = True
+        for field, dates in self._dates.items():
+            value = metadata.get(field)
+            dates[row] = value if isinstance(value, int) and not isinstance(value, bool) else MISSING_DATE
+
+    def _unindex(self, row: int) -> None:
+        """Remove a row from the masks, date columns and source lookup."""
+        metadata = self._metadatas[row]
+        self._alive[row] = False
+        self._sources.get(metadata.get("source", "unknown"), set()).discard(self._ids[row])
+        for field, masks in self._value_masks.items():
+            value_mask = masks.get(metadata.get(field))
+            if value_mask is not None:
+                value_mask[row] = False
+        for dates in self._dates.values():
+            dates[row] = MISSING_DATE
+
+    def _compact(self) -> None:
+        """Drop deleted rows so snapshots only hold live chunks."""
+        rows = np.flatnonzero(self._alive[:self._size])
+        if rows.size == self._size:
+            return
+
+        matrix = self._matrix[rows] if self._matrix is not None else None
+        ids = [self._ids[row] for row in rows]
+        texts = [self._texts[row] for row in rows]
+        metadatas = [self._metadatas[row] for row in rows]
+
+        self._matrix = matrix if rows.size else None
+        self._size = 0
+        self._alive = np.zeros(rows.size, dtype=bool)
+        self._assignments = np.zeros(rows.size, dtype=np.int32)
+        self._ids, self._texts, self._metadatas = [], [], []
+        self._rows, self._sources = {}, {}
+        self._value_masks = {field: {} for field in MASKED_FIELDS}
+        self._dates = {field: np.zeros(rows.size, dtype=np.int64) for field in DATE_FIELDS}
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            row = self._size
+            self._size += 1
+            self._ids.append(chunk_id)
+            self._texts.append(text)
+            self._metadatas.append(metadata)
+            self._rows[chunk_id] = row
+            self._index(row)
+
+    def _vectors(self) -> np.ndarray:
+        """Get the used part of the matrix."""
+        if self._matrix is None:
+            return np.zeros((0, 0), dtype=self.dtype)
+        return np.ascontiguousarray(self._matrix[:self._size])
+
+    @staticmethod
+    def _resized(array: np.ndarray, capacity: int) -> np.ndarray:
+        resized = np.zeros(capacity, dtype=array.dtype)
+        resized[:min(len(array), capacity)] = array[:capacity]
+        return resized
@@ -0,0 +1,220 @@
+import heapq
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.rag.filters import normalize_filter
+from app.rag.vector_store import Chunk
+
+logger = logging.getLogger(__name__)
+
+# Partition for chunks without a partition key, such as general guides
+SHARED_PARTITION = "shared"
+# Fields whose values are tracked per partition for routing, besides the partition key
+ROUTED_FIELDS = ("equipment_id",)
+# Chroma caps collection names at 63 characters, leaving room for the prefix
+MAX_PARTITION_NAME_LENGTH = 40
+
+
+def partition_name(value: Any) -> str:
+    """Turn a partition key value into a name safe for collections and directories."""
+    if value is None or value == "":
+        return SHARED_PARTITION
+    name = re.sub(r"[^a-z0-9_-]+", "_", str(value).lower()).strip("_-")
+    return name[:MAX_PARTITION_NAME_LENGTH] or SHARED_PARTITION
+
+
+class PartitionedVectorStore:
+    """
+    Vector store split into one underlying store per partition key value.
+
+    Chunks are routed to a partition by a metadata field such as site or
+    equipment_type. Searches whose filter pins the partition key, or an
+    equipment id, only scan the partitions holding matching chunks; other
+    searches scan every partition and merge by score. The filter is still
+    applied inside each partition, so results match an unpartitioned store.
+    """
+
+    def __init__(
+        self,
+        partition_key: str,
+        create_partition: Callable[[str], Any],
+        existing_partitions: Iterable[str] = ()
+    ):
+        """
+        Initialize the store, reopening existing partitions.
+
+        Args:
+            partition_key: Metadata field that selects a chunk's partition
+            create_partition: Factory opening or creating the store for a partition name
+            existing_partitions: Names of partitions already persisted
+        """
+        self.partition_key = partition_key
+        self._create_partition = create_partition
+        self.partitions: Dict[str, Any] = {}
+        # Chunk id -> (partition, routed field values)
+        self._chunks: Dict[str, Tuple[str, Tuple[Any, ...]]] = {}
+        self._routed_fields = (partition_key,) + tuple(f for f in ROUTED_FIELDS if f != partition_key)
+        # Field -> value -> chunk count per partition
+        self._routes: Dict[str, Dict[Any, Counter]] = {field: {} for field in self._routed_fields}
+        self._lock = threading.RLock()
+
+        for name in existing_partitions:
+            store = self._partition(name)
+            for chunk_id, _, metadata in store.iter_chunks():
+                self._track(chunk_id, name, metadata)
+        if self.partitions:
+            logger.info(f"Opened {len(self.partitions)} partitions by {partition_key} with {len(self._chunks)} chunks")
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Insert or replace chunks, each in the partition of its key value."""
+        groups: Dict[str, Tuple[list, list, list, list]] = {}
+        for chunk in zip(ids, embeddings, documents, metadatas):
+            group = groups.setdefault(partition_name(chunk[3].get(self.partition_key)), ([], [], [], []))
+            for column, value in zip(group, chunk):
+                column.append(value)
+
+        with self._lock:
+            for name, (group_ids, group_embeddings, group_documents, group_metadatas) in groups.items():
+                self._partition(name).upsert(group_ids, group_embeddings, group_documents, group_metadatas)
+                for chunk_id, metadata in zip(group_ids, group_metadatas):
+                    self._untrack(chunk_id)
+                    self._track(chunk_id, name, metadata)
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks by id from their partitions."""
+        with self._lock:
+            groups: Dict[str, List[str]] = {}
+            for chunk_id in ids:
+                location = self._chunks.get(chunk_id)
+                if location is not None:
+                    groups.setdefault(location[0], []).append(chunk_id)
+            for name, group_ids in groups.items():
+                self.partitions[name].delete(group_ids)
+                for chunk_id in group_ids:
+                    self._untrack(chunk_id)
+
+    def ids_for_sources(self, sources: Set[str]) -> Set[str]:
+        """Get the ids of stored chunks belonging to the given sources."""
+        existing = set()
+        for store in list(self.partitions.values()):
+            existing |= store.ids_for_sources(sources)
+        return existing
+
+    def iter_chunks(self) -> Iterator[Chunk]:
+        """Iterate over all stored chunks as (id, text, metadata)."""
+        for store in list(self.partitions.values()):
+            yield from store.iter_chunks()
+
+    def query(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Chunk]:
+        """Get the k nearest chunks as (id, text, metadata), best first."""
+        return [chunk for chunk, _ in self.query_with_scores(embedding, k, filter_dict)]
+
+    def query_with_scores(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Chunk, float]]:
+        """
+        Search only the partitions the filter can match.
+
+        Returns:
+            ((id, text, metadata), score) pairs, best first
+        """
+        filter_dict = normalize_filter(filter_dict)
+        with self._lock:
+            names = self._route(filter_dict)
+            stores = [self.partitions[name] for name in (self.partitions if names is None else names)]
+
+        if len(stores) == 1:
+            return stores[0].query_with_scores(embedding, k, filter_dict)
+        hits = [hit for store in stores for hit in store.query_with_scores(embedding, k, filter_dict)]
+        return heapq.nlargest(k, hits, key=lambda hit: hit[1])
+
+    def count(self) -> int:
+        """Get the number of stored chunks."""
+        return sum(store.count() for store in list(self.partitions.values()))
+
+    def save(self) -> None:
+        """Persist every partition."""
+        for store in list(self.partitions.values()):
+            store.save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the partition key and chunk count per partition."""
+        with self._lock:
+            counts = Counter(name for name, _ in self._chunks.values())
+            return {
+                "partition_key": self.partition_key,
+                "partitions": {name: counts.get(name, 0) for name in sorted(self.partitions)}
+            }
+
+    def _partition(self, name: str) -> Any:
+        """Get a partition's store, creating it on first use."""
+        store = self.partitions.get(name)
+        if store is None:
+            store = self.partitions[name] = self._create_partition(name)
+        return store
+
+    def _route(self, condition: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+        """
+        Get the partitions a canonical filter can match.
+
+        Returns:
+            Partition names, or None when every partition must be scanned
+        """
+        if not condition:
+            return None
+        (key, value), = condition.items()
+        if key in ("$and", "$or"):
+            routes = [self._route(child) for child in value]
+            if key == "$and":
+                bounded = [route for route in routes if route is not None]
+                return set.intersection(*bounded) if bounded else None
+            return None if any(route is None for route in routes) else set().union(*routes)
+
+        (op, operand), = value.items()
+        if key not in self._routes or op not in ("$eq", "$in"):
+            return None
+        values = [operand] if op == "$eq" else operand
+        names = set()
+        for field_value in values:
+            names.update(name for name, count in self._routes[key].get(field_value, {}).items() if count > 0)
+        return names
+
+    def _track(self, chunk_id: str, name: str, metadata: Dict[str, Any]) -> None:
+        """Record a chunk's partition and routed field values."""
+        values = tuple(metadata.get(field) for field in self._routed_fields)
+        self._chunks[chunk_id] = (name, values)
+        for field, value in zip(self._routed_fields, values):
+            if value is not None:
+                self._routes[field].setdefault(value, Counter())[name] += 1
+
+    def _untrack(self, chunk_id: str) -> None:
+        """Forget a chunk's partition and routed field values."""
+        location = self._chunks.pop(chunk_id, None)
+        if location is None:
+            return
+        name, values = location
+        for field, value in zip(self._routed_fields, values):
+            if value is not None:
+                partitions = self._routes[field][value]
+                partitions[name] -= 1
+                if partitions[name] <= 0:
+                    del partitions[name]
+                if not partitions:
+                    del self._routes[field][value]
@@ -1,88 +1,376 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from langchain_openai import OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import hashlib
 import logging
+import os
+import time
 
 from app.core.config import settings
+from app.providers.embeddings import get_embeddings
+from app.rag.bm25 import BM25Index, is_lexical_query
+from app.rag.chunking import Chunks, make_text_splitter, split_document
+from app.rag.compression import ContextCompressor
+from app.rag.result_cache import SearchResultCache
+from app.rag.vector_store import ChromaVectorStore
+from app.rag.filters import normalize_filter
+from app.rag.numpy_store import MANIFEST_FILE, NumpyVectorStore
+from app.rag.partitioned_store import PartitionedVectorStore
 
 logger = logging.getLogger(__name__)
 
+# Base delay before retrying a failed embedding batch, doubled per attempt
+EMBEDDING_RETRY_BACKOFF_SECONDS = 0.5
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Fuse ranked id lists by summing 1 / (k + rank) across rankings.
+    
+    Args:
+        rankings: Ranked lists of ids, best first
+        k: Damping constant; higher values flatten the rank contribution
+        
+    Returns:
+        Ids ordered by fused score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
 
 class RAGPipeline:
     """RAG pipeline for industrial documentation."""
     
     def __init__(self):
-        """Initialize RAG pipeline with ChromaDB."""
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
+        """Initialize RAG pipeline with the configured vector store."""
+        start = time.perf_counter()
+        self.embeddings = get_embeddings()
+        embeddings_ready = time.perf_counter()
+        
+        # Opens the persisted index; nothing is re-embedded on restart
+        self.store = self._create_store()
+        store_ready = time.perf_counter()
+        
+        # Text splitter for document chunking
+        self.text_splitter = make_text_splitter(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+        
+        # Bumped on every ingestion so dependent caches can invalidate
+        self.collection_version = 0
+        self._fingerprint: Optional[Tuple[int, str]] = None
+        
+        # Lexical index over the same chunks, for exact identifiers and codes
+        self.bm25 = BM25Index()
+        lexical_source, tokenized = self._load_lexical_index()
+        lexical_ready = time.perf_counter()
+        
+        self.result_cache = SearchResultCache(
+            max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES
+        ) if settings.RETRIEVAL_CACHE_ENABLED else None
+        
+        # Packs the query-relevant sentences of results into prompt budgets
+        self.compressor = ContextCompressor(
+            self.embeddings
+        ) if settings.CONTEXT_COMPRESSION_ENABLED else None
+        
+        self.startup_timings = {
+            "embeddings_seconds": round(embeddings_ready - start, 3),
+            "store_seconds": round(store_ready - embeddings_ready, 3),
+            "lexical_index_seconds": round(lexical_ready - store_ready, 3),
+            "lexical_index_source": lexical_source,
+            "lexical_chunks_tokenized": tokenized,
+            "total_seconds": round(time.perf_counter() - start, 3),
+            "chunks": self.store.count()
+        }
+        logger.info(
+            f"RAG Pipeline initialized in {self.startup_timings['total_seconds']:.2f}s with "
+            f"{self.startup_timings['chunks']} chunks (store {self.startup_timings['store_seconds']:.2f}s, "
+            f"lexical index {self.startup_timings['lexical_index_seconds']:.2f}s from {lexical_source}, "
+            f"{tokenized} chunks tokenized)"
         )
+    
+    def content_fingerprint(self) -> str:
+        """
+        Get an order-independent digest of the stored chunk ids.
         
-        # Initialize ChromaDB client
-        self.chroma_client = chromadb.Client(
-            ChromaSettings(
-                persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
-                anonymized_telemetry=False
+        Chunk ids hash their content, so the digest identifies the indexed
+        corpus across restarts, unlike collection_version. Recomputed only
+        when collection_version changes.
+        """
+        fingerprint = self._fingerprint
+        if fingerprint is None or fingerprint[0] != self.collection_version:
+            version = self.collection_version
+            digest = 0
+            for chunk_id in self.bm25.chunk_ids():
+                digest ^= int.from_bytes(hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=16).digest(), "big")
+            fingerprint = self._fingerprint = (version, f"{digest:032x}")
+        return fingerprint[1]
+    
+    @property
+    def index_writes_through(self) -> bool:
+        """Whether writes are durable without save_index, so saving is free."""
+        return settings.VECTOR_BACKEND == "chroma"
+    
+    def save_index(self, lexical: bool = True) -> None:
+        """
+        Persist the vector index; Chroma writes through, the NumPy index snapshots.
+        
+        Args:
+            lexical: Also write the lexical index snapshot. It may lag the
+                vector index: chunks it is missing are tokenized on load.
+        """
+        self.store.save()
+        path = self.lexical_index_path()
+        if lexical and path:
+            self.bm25.save(path)
+    
+    @staticmethod
+    def lexical_index_path() -> Optional[str]:
+        """Get the lexical index snapshot file, next to the persisted vector index."""
+        if settings.VECTOR_BACKEND == "numpy" and settings.NUMPY_INDEX_PATH:
+            return f"{settings.NUMPY_INDEX_PATH.rstrip('/')}.lexical.json"
+        if settings.VECTOR_BACKEND == "chroma" and settings.CHROMA_PERSIST_DIRECTORY:
+            return os.path.join(settings.CHROMA_PERSIST_DIRECTORY, "lexical_index.json")
+        return None
+    
+    @classmethod
+    def _create_store(cls):
+        """Create the vector store for settings.VECTOR_BACKEND, partitioned if configured."""
+        if settings.VECTOR_BACKEND not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector backend: {settings.VECTOR_BACKEND}")
+        
+        chroma_client = cls._create_chroma_client() if settings.VECTOR_BACKEND == "chroma" else None
+        if not settings.VECTOR_PARTITION_KEY:
+            if chroma_client is not None:
+                return ChromaVectorStore(chroma_client, settings.COLLECTION_NAME)
+            return cls._create_numpy_store(settings.NUMPY_INDEX_PATH)
+        
+        if chroma_client is not None:
+            prefix = f"{settings.COLLECTION_NAME}__"
+            existing = [
+                collection.name[len(prefix):] for collection in chroma_client.list_collections()
+                if collection.name.startswith(prefix)
+            ]
+            return PartitionedVectorStore(
+                settings.VECTOR_PARTITION_KEY,
+                lambda name: ChromaVectorStore(chroma_client, f"{prefix}{name}"),
+                existing
             )
-        )
         
-        # Initialize vector store
-        self.vectorstore = Chroma(
-            client=self.chroma_client,
-            collection_name=settings.COLLECTION_NAME,
-            embedding_function=self.embeddings,
-            persist_directory=settings.CHROMA_PERSIST_DIRECTORY
+        root = settings.NUMPY_INDEX_PATH
+        existing = []
+        if root and os.path.isdir(root):
+            existing = sorted(
+                name for name in os.listdir(root)
+                if os.path.exists(os.path.join(root, name, MANIFEST_FILE))
+            )
+        return PartitionedVectorStore(
+            settings.VECTOR_PARTITION_KEY,
+            lambda name: cls._create_numpy_store(os.path.join(root, name) if root else None),
+            existing
         )
-        
-        # Text splitter for document chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+    
+    @staticmethod
+    def _create_chroma_client() -> chromadb.ClientAPI:
+        """Create a persistent Chroma client, or an in-memory one without a directory."""
+        chroma_settings = ChromaSettings(anonymized_telemetry=False)
+        if settings.CHROMA_PERSIST_DIRECTORY:
+            return chromadb.PersistentClient(
+                path=settings.CHROMA_PERSIST_DIRECTORY,
+                settings=chroma_settings
+            )
+        return chromadb.EphemeralClient(settings=chroma_settings)
+    
+    @staticmethod
+    def _create_numpy_store(path: Optional[str]) -> NumpyVectorStore:
+        """Create a NumPy index persisted at path."""
+        return NumpyVectorStore(
+            path=path,
+            dtype=settings.NUMPY_INDEX_DTYPE,
+            ivf_lists=settings.NUMPY_IVF_LISTS,
+            ivf_probes=settings.NUMPY_IVF_PROBES,
+            ivf_min_rows=settings.NUMPY_IVF_MIN_ROWS
         )
-        
-        logger.info("RAG Pipeline initialized successfully")
     
-    def add_documents(self, documents: List[Dict[str, Any]]) -> None:
+    def add_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        delete_missing: bool = True
+    ) -> Dict[str, int]:
         """
-        Add documents to the vector store.
+        Upsert documents into the vector store.
+        
+        Chunks get deterministic ids from their source, content and metadata,
+        so re-ingesting unchanged documents neither duplicates nor re-embeds
+        them. Each source in the batch is treated as complete: its chunks that
+        no longer appear are deleted.
         
         Args:
             documents: List of documents with 'content' and 'metadata'
+            delete_missing: Delete stored chunks missing from their source
+            
+        Returns:
+            Counts of added, unchanged, deleted and failed chunks
+        """
+        chunks: Chunks = {}
+        sources = set()
+        for doc in documents:
+            source = doc.get("source", "unknown")
+            sources.add(source)
+            chunks.update(split_document(doc["content"], source, doc.get("metadata", {}), self.text_splitter))
+        
+        return self.upsert_chunks(chunks, sources, len(documents), delete_missing)
+    
+    def upsert_chunks(
+        self,
+        chunks: Chunks,
+        sources: Set[str],
+        document_count: int,
+        delete_missing: bool = True
+    ) -> Dict[str, int]:
+        """
+        Upsert already-split chunks, embedding only the ones not yet stored.
+        
+        Args:
+            chunks: Mapping of chunk id to (text, metadata), from split_document
+            sources: Sources the chunks were split from, each treated as complete
+            document_count: Number of documents the chunks came from
+            delete_missing: Delete stored chunks missing from their source
+            
+        Returns:
+            Counts of added, unchanged, deleted and failed chunks
         """
         try:
-            texts = []
-            metadatas = []
+            existing = self.store.ids_for_sources(sources)
+            new_ids = [chunk_id for chunk_id in chunks if chunk_id not in existing]
+            stale_ids = list(existing - chunks.keys()) if delete_missing else []
             
-            for doc in documents:
-                # Split document into chunks
-                chunks = self.text_splitter.split_text(doc["content"])
-                texts.extend(chunks)
-                
-                # Add metadata to each chunk
-                for _ in chunks:
-                    metadatas.append({
-                        **doc.get("metadata", {}),
-                        "source": doc.get("source", "unknown")
-                    })
+            added, failed = self._write_chunks(new_ids, chunks)
+            if stale_ids:
+                self.store.delete(stale_ids)
+                self.bm25.remove(stale_ids)
+            if added or stale_ids:
+                self.collection_version += 1
             
-            # Add to vector store
-            self.vectorstore.add_texts(texts=texts, metadatas=metadatas)
-            logger.info(f"Added {len(texts)} chunks from {len(documents)} documents")
+            report = {
+                "documents": document_count,
+                "sources": len(sources),
+                "added": added,
+                "unchanged": len(chunks) - len(new_ids),
+                "deleted": len(stale_ids),
+                "failed": failed
+            }
+            logger.info(
+                f"Upserted {document_count} documents: {report['added']} chunks added, "
+                f"{report['unchanged']} unchanged, {report['deleted']} deleted, "
+                f"{report['failed']} failed"
+            )
+            return report
             
         except Exception as e:
             logger.error(f"Error adding documents: {str(e)}")
             raise
     
+    def _write_chunks(
+        self,
+        chunk_ids: List[str],
+        chunks: Chunks
+    ) -> Tuple[int, int]:
+        """
+        Embed chunks in concurrent batches and write each batch as it completes.
+        
+        At most twice the concurrency of batches are in flight, so writes to
+        the vector store overlap with embedding while memory stays bounded.
+        Batches that still fail after retries are skipped; their deterministic
+        ids let a re-run pick them up.
+        
+        Returns:
+            Number of chunks written and number that failed
+        """
+        batch_size = settings.INGEST_EMBEDDING_BATCH_SIZE
+        batches = [chunk_ids[i:i + batch_size] for i in range(0, len(chunk_ids), batch_size)]
+        max_in_flight = settings.INGEST_EMBEDDING_CONCURRENCY * 2
+        written = failed = 0
+        
+        with ThreadPoolExecutor(max_workers=settings.INGEST_EMBEDDING_CONCURRENCY) as executor:
+            pending = {}
+            next_batch = 0
+            while next_batch < len(batches) or pending:
+                while next_batch < len(batches) and len(pending) < max_in_flight:
+                    batch = batches[next_batch]
+                    texts = [chunks[chunk_id][0] for chunk_id in batch]
+                    pending[executor.submit(self._embed_batch, texts)] = batch
+                    next_batch += 1
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    try:
+                        embeddings = future.result()
+                    except Exception as e:
+                        logger.error(f"Embedding batch of {len(batch)} chunks failed: {str(e)}")
+                        failed += len(batch)
+                        continue
+                    
+                    self.store.upsert(
+                        ids=batch,
+                        embeddings=embeddings,
+                        documents=[chunks[chunk_id][0] for chunk_id in batch],
+                        metadatas=[chunks[chunk_id][1] for chunk_id in batch]
+                    )
+                    for chunk_id in batch:
+                        self.bm25.add(chunk_id, *chunks[chunk_id])
+                    written += len(batch)
+        
+        return written, failed
+    
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying with exponential backoff."""
+        for attempt in range(settings.INGEST_EMBEDDING_MAX_RETRIES + 1):
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == settings.INGEST_EMBEDDING_MAX_RETRIES:
+                    raise
+                delay = EMBEDDING_RETRY_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning(f"Embedding batch failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _load_lexical_index(self) -> Tuple[str, int]:
+        """
+        Index the chunks already stored in the vector store.
+        
+        Returns:
+            Where the index came from ("snapshot" or "rebuilt") and how many
+            chunks had to be tokenized
+        """
+        path = self.lexical_index_path()
+        if path and os.path.exists(path):
+            try:
+                tokenized = self.bm25.load(path, self.store.iter_chunks())
+                logger.info(f"Lexical index loaded with {len(self.bm25)} chunks, {tokenized} tokenized")
+                return "snapshot", tokenized
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load lexical index snapshot, rebuilding: {str(e)}")
+                self.bm25 = BM25Index()
+        
+        for chunk_id, text, metadata in self.store.iter_chunks():
+            self.bm25.add(chunk_id, text, metadata)
+        
+        if len(self.bm25):
+            logger.info(f"Lexical index rebuilt with {len(self.bm25)} chunks")
+        return "rebuilt", len(self.bm25)
+    
     def search(
         self, 
         query: str, 
         k: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+        mode: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant documents.
@@ -90,78 +378,158 @@ class RAGPipeline:
         Args:
             query: Search query
             k: Number of results to return
-            filter_dict: Metadata filters
+            filter_dict: Metadata filter in Chroma's where syntax, e.g.
+                {"equipment_id": {"$in": [...]}, "date": {"$gte": "2024-01-01"}};
+                evaluated inside the indexes, see app.rag.filters
+            query_embedding: Precomputed query embedding, skips re-embedding
+            mode: "vector", "lexical" or "hybrid", defaults to settings.RETRIEVAL_MODE
             
         Returns:
             List of relevant documents with content and metadata
+            
+        Raises:
+            ValueError: If the filter is malformed
         """
+        mode = mode or settings.RETRIEVAL_MODE
+        filter_dict = normalize_filter(filter_dict)
+        key = SearchResultCache.make_key(query, k, filter_dict, mode)
+        version = self.collection_version
+        if self.result_cache is not None:
+            cached = self.result_cache.get(key, version)
+            if cached is not None:
+                return cached
+        
         try:
-            # Perform similarity search
-            if filter_dict:
-                results = self.vectorstore.similarity_search(
-                    query, 
-                    k=k,
-                    filter=filter_dict
-                )
-            else:
-                results = self.vectorstore.similarity_search(query, k=k)
-            
-            # Format results
-            formatted_results = []
-            for doc in results:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "source": doc.metadata.get("source", "unknown")
-                })
-            
-            logger.info(f"Retrieved {len(formatted_results)} results for query: {query[:50]}...")
-            return formatted_results
-            
+            results = self._search(query, k, filter_dict, query_embedding, mode)
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
             return []
+        
+        if self.result_cache is not None:
+            self.result_cache.put(key, results, version)
+        return results
+    
+    def _search(
+        self,
+        query: str,
+        k: int,
+        filter_dict: Optional[Dict[str, Any]],
+        query_embedding: Optional[List[float]],
+        mode: str
+    ) -> List[Dict[str, Any]]:
+        """Run a search without the result cache."""
+        if mode == "hybrid" and query_embedding is None and is_lexical_query(query):
+            # Identifier-only queries ("PUMP-007", "E-4521") need no embedding call
+            mode = "lexical"
+        
+        candidates = max(k, settings.RETRIEVAL_CANDIDATES) if mode == "hybrid" else k
+        rankings = []
+        documents: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        
+        if mode in ("lexical", "hybrid"):
+            hits = self.bm25.search(query, k=candidates, filter_dict=filter_dict)
+            rankings.append([chunk_id for chunk_id, _ in hits])
+            for chunk_id, _ in hits:
+                documents[chunk_id] = self.bm25.get(chunk_id)
+        
+        if mode in ("vector", "hybrid"):
+            if query_embedding is None:
+                query_embedding = self.embeddings.embed_query(query)
+            hits = self.store.query(query_embedding, candidates, filter_dict)
+            rankings.append([chunk_id for chunk_id, _, _ in hits])
+            for chunk_id, text, metadata in hits:
+                documents[chunk_id] = (text, metadata)
+        
+        if not rankings:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        
+        if len(rankings) > 1:
+            ranked_ids = reciprocal_rank_fusion(rankings, k=settings.RETRIEVAL_RRF_K)
+        else:
+            ranked_ids = rankings[0]
+        
+        # Format results
+        formatted_results = []
+        for chunk_id in ranked_ids[:k]:
+            text, metadata = documents[chunk_id]
+            formatted_results.append({
+                "id": chunk_id,
+                "content": text,
+                "metadata": metadata,
+                "source": metadata.get("source", "unknown")
+            })
+        
+        logger.info(f"Retrieved {len(formatted_results)} results ({mode}) for query: {query[:50]}...")
+        return formatted_results
     
     def search_equipment_docs(
         self, 
         query: str, 
-        equipment_id: Optional[str] = None,
-        k: int = 5
+        equipment_id: Optional[Union[str, List[str]]] = None,
+        k: int = 5,
+        query_embedding: Optional[List[float]] = None,
+        filter_dict: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search equipment-specific documentation.
         
         Args:
             query: Search query
-            equipment_id: Filter by equipment ID
+            equipment_id: Filter by equipment ID, or any of a list of IDs
             k: Number of results
+            query_embedding: Precomputed query embedding, skips re-embedding
+            filter_dict: Further metadata conditions, such as doc_type or date
             
         Returns:
             Relevant equipment documentation
         """
-        filter_dict = {"equipment_id": equipment_id} if equipment_id else None
-        return self.search(query, k=k, filter_dict=filter_dict)
+        conditions = [filter_dict] if filter_dict else []
+        if isinstance(equipment_id, (list, tuple, set)):
+            conditions.append({"equipment_id": {"$in": sorted(equipment_id)}})
+        elif equipment_id:
+            conditions.append({"equipment_id": equipment_id})
+        return self.search(
+            query,
+            k=k,
+            filter_dict={"$and": conditions} if conditions else None,
+            query_embedding=query_embedding
+        )
     
     def get_context_for_query(
         self, 
         query: str,
-        equipment_id: Optional[str] = None
+        equipment_id: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> str:
         """
         Get formatted context for LLM query.
         
+        With compression enabled, only the sentences most relevant to the
+        query are kept, within a token budget.
+        
         Args:
             query: User query
             equipment_id: Equipment ID filter
+            max_tokens: Token budget, defaults to settings.RAG_CONTEXT_MAX_TOKENS
+            query_embedding: Precomputed query embedding, skips re-embedding
             
         Returns:
             Formatted context string
         """
-        results = self.search_equipment_docs(query, equipment_id, k=3)
+        results = self.search_equipment_docs(query, equipment_id, k=3, query_embedding=query_embedding)
         
         if not results:
             return "No relevant documentation found."
         
+        if self.compressor is not None:
+            results = self.compressor.compress(
+                query,
+                results,
+                max_tokens or settings.RAG_CONTEXT_MAX_TOKENS,
+                query_embedding=query_embedding
+            )
+        
         context_parts = []
         for i, result in enumerate(results, 1):
             context_parts.append(
@@ -0,0 +1,83 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SearchResultCache:
+    """LRU cache for retrieval results, invalidated by the collection version."""
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        Initialize the result cache.
+
+        Args:
+            max_entries: Maximum number of cached searches (LRU eviction)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(
+        query: str,
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        mode: str = ""
+    ) -> str:
+        """Build a key from the normalized query, filters, k and retrieval mode."""
+        normalized = re.sub(r"\s+", " ", query.lower()).strip(" ?!.")
+        return json.dumps([normalized, k, filter_dict or {}, mode], sort_keys=True, default=str)
+
+    def get(self, key: str, version: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results.
+
+        Args:
+            key: Key from make_key
+            version: Current collection version; older entries are stale
+
+        Returns:
+            The cached results, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[0] != version:
+                del self._entries[key]
+                self.stats["stale"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return list(entry[1])
+
+    def put(self, key: str, results: List[Dict[str, Any]], version: int) -> None:
+        """Cache results for the given collection version."""
+        with self._lock:
+            self._entries[key] = (version, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts, hit rate and size."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
@@ -0,0 +1,97 @@
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import chromadb
+
+from app.rag.filters import normalize_filter
+
+# Sources per existing-id lookup, keeps the $in filter bounded
+ID_LOOKUP_BATCH_SIZE = 500
+
+Chunk = Tuple[str, str, Dict[str, Any]]
+
+
+class ChromaVectorStore:
+    """Vector store backed by a Chroma collection."""
+
+    def __init__(self, client: chromadb.ClientAPI, collection_name: str):
+        """
+        Initialize the store.
+
+        Args:
+            client: Chroma client
+            collection_name: Collection holding the chunks
+        """
+        self.client = client
+        # Embeddings are always precomputed, so no embedding function is attached
+        self.collection = client.get_or_create_collection(collection_name, embedding_function=None)
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Insert or replace chunks with precomputed embeddings."""
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks by id."""
+        self.collection.delete(ids=ids)
+
+    def ids_for_sources(self, sources: Set[str]) -> Set[str]:
+        """Get the ids of stored chunks belonging to the given sources."""
+        sources = sorted(sources)
+        existing = set()
+        for i in range(0, len(sources), ID_LOOKUP_BATCH_SIZE):
+            batch = sources[i:i + ID_LOOKUP_BATCH_SIZE]
+            result = self.collection.get(where={"source": {"$in": batch}}, include=[])
+            existing.update(result["ids"])
+        return existing
+
+    def iter_chunks(self, page_size: int = 5000) -> Iterator[Chunk]:
+        """Iterate over all stored chunks as (id, text, metadata)."""
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            yield from zip(page["ids"], page["documents"], page["metadatas"])
+            if len(page["ids"]) < page_size:
+                return
+            offset += page_size
+
+    def query(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Chunk]:
+        """Get the k nearest chunks as (id, text, metadata), best first."""
+        return [chunk for chunk, _ in self.query_with_scores(embedding, k, filter_dict)]
+
+    def query_with_scores(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Chunk, float]]:
+        """
+        Get the k nearest chunks with the filter evaluated inside Chroma.
+
+        Returns:
+            ((id, text, metadata), negated distance) pairs, best first
+        """
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            where=normalize_filter(filter_dict),
+            include=["documents", "metadatas", "distances"]
+        )
+        chunks = zip(results["ids"][0], results["documents"][0], results["metadatas"][0])
+        return [(chunk, -distance) for chunk, distance in zip(chunks, results["distances"][0])]
+
+    def count(self) -> int:
+        """Get the number of stored chunks."""
+        return self.collection.count()
+
+    def save(self) -> None:
+        """Chroma persists on its own; nothing to do."""
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import random
 from datetime import datetime, timedelta
@@ -21,6 +22,9 @@ class DataService:
         self.sensor_readings: List[SensorReading] = []
         self.maintenance_logs: List[MaintenanceLog] = []
         self.alerts: List[Alert] = []
+        # Bumped on every data change so dependent caches can invalidate
+        self.version = 0
+        self._fingerprint: Optional[tuple] = None
         self._initialize_sample_data()
     
     def _initialize_sample_data(self):
@@ -165,6 +169,22 @@ class DataService:
         
         logger.info(f"Initialized {len(self.equipment)} equipment items")
     
+    def fingerprint(self) -> str:
+        """
+        Get a digest of the current data.
+        
+        Unlike version, which restarts at 0 in every process, the digest
+        identifies the data itself, so persisted caches can tell whether
+        their entries were built from it. Recomputed only when version changes.
+        """
+        if self._fingerprint is None or self._fingerprint[0] != self.version:
+            digest = hashlib.sha256()
+            for items in (self.equipment.values(), self.maintenance_logs, self.alerts):
+                for item in items:
+                    digest.update(item.model_dump_json().encode("utf-8"))
+            self._fingerprint = (self.version, digest.hexdigest())
+        return self._fingerprint[1]
+    
     def get_all_equipment(self) -> List[Equipment]:
         """Get all equipment."""
         return list(self.equipment.values())
@@ -196,9 +216,9 @@ class DataService:
     def get_maintenance_logs(
         self,
         equipment_id: Optional[str] = None,
-        limit: int = 10
+        limit: Optional[int] = 10
     ) -> List[MaintenanceLog]:
-        """Get maintenance logs."""
+        """Get maintenance logs, newest first; limit=None returns all of them."""
         logs = self.maintenance_logs
         
         if equipment_id:
@@ -297,6 +317,7 @@ class DataService:
         for alert in self.alerts:
             if alert.id == alert_id:
                 alert.resolved = resolved
+                self.version += 1
                 return True
         return False
 
@@ -0,0 +1,128 @@
+"""
+Benchmark the NumPy vector index against Chroma on the same synthetic corpus.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import uuid
+
+import chromadb
+import numpy as np
+
+from app.rag.numpy_store import NumpyVectorStore
+from app.rag.vector_store import ChromaVectorStore
+
+EQUIPMENT_IDS = [f"EQ-{i:03d}" for i in range(50)]
+# Chroma rejects larger upserts
+CHROMA_BATCH_SIZE = 5000
+
+
+def make_corpus(count: int, dimensions: int, seed: int = 0):
+    """Generate clustered unit vectors with equipment metadata."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.normal(size=(count, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"c{i}" for i in range(count)]
+    metadatas = [
+        {"source": f"doc{i // 20}.txt", "equipment_id": EQUIPMENT_IDS[i % len(EQUIPMENT_IDS)]}
+        for i in range(count)
+    ]
+    return ids, vectors, metadatas
+
+
+def load(store, ids, vectors, metadatas) -> float:
+    """Upsert the corpus in batches and return the elapsed seconds."""
+    start = time.perf_counter()
+    for i in range(0, len(ids), CHROMA_BATCH_SIZE):
+        batch = slice(i, i + CHROMA_BATCH_SIZE)
+        store.upsert(ids[batch], vectors[batch].tolist(), [""] * len(ids[batch]), metadatas[batch])
+    return time.perf_counter() - start
+
+
+def time_queries(store, queries, k, filters):
+    """Run every query and return latencies in ms and the result ids."""
+    latencies, results = [], []
+    for query, filter_dict in zip(queries, filters):
+        start = time.perf_counter()
+        hits = store.query(query.tolist(), k, filter_dict)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([chunk_id for chunk_id, _, _ in hits])
+    return np.asarray(latencies), results
+
+
+def recall(results, truth) -> float:
+    """Average overlap of each result list with the exact top-k."""
+    return float(np.mean([len(set(found) & set(exact)) / len(exact) for found, exact in zip(results, truth)]))
+
+
+def exact_top_k(vectors, metadatas, queries, k, filters):
+    """Exact nearest neighbours, honouring the equipment filter."""
+    truth = []
+    for query, filter_dict in zip(queries, filters):
+        scores = vectors @ query
+        if filter_dict:
+            allowed = np.array([m["equipment_id"] == filter_dict["equipment_id"] for m in metadatas])
+            scores[~allowed] = -np.inf
+        truth.append([f"c{i}" for i in np.argsort(-scores)[:k]])
+    return truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--ivf-lists", type=int, default=256)
+    parser.add_argument("--ivf-probes", type=int, default=16)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    ids, vectors, metadatas = make_corpus(args.chunks, args.dimensions)
+    queries = make_corpus(args.queries, args.dimensions, seed=1)[1]
+    rng = np.random.default_rng(2)
+    unfiltered = [None] * args.queries
+    filtered = [{"equipment_id": EQUIPMENT_IDS[i]} for i in rng.integers(0, len(EQUIPMENT_IDS), args.queries)]
+
+    configs = [
+        ("numpy float32 brute", lambda: NumpyVectorStore(dtype="float32", ivf_lists=0)),
+        ("numpy float16 brute", lambda: NumpyVectorStore(dtype="float16", ivf_lists=0)),
+        ("numpy float32 ivf", lambda: NumpyVectorStore(
+            dtype="float32", ivf_lists=args.ivf_lists, ivf_probes=args.ivf_probes, ivf_min_rows=0
+        )),
+    ]
+    if not args.skip_chroma:
+        configs.append(("chroma", lambda: ChromaVectorStore(
+            chromadb.EphemeralClient(), f"bench_{uuid.uuid4().hex}"
+        )))
+
+    truth = {
+        "all": exact_top_k(vectors, metadatas, queries, args.k, unfiltered),
+        "filtered": exact_top_k(vectors, metadatas, queries, args.k, filtered),
+    }
+
+    print(f"{args.chunks} chunks x {args.dimensions} dims, {args.queries} queries, k={args.k}")
+    print(f"{'backend':<22}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}{'recall':>8}{'filt p50':>10}{'filt p99':>10}{'filt rec':>10}")
+    for name, factory in configs:
+        store = factory()
+        load_seconds = load(store, ids, vectors, metadatas)
+        if isinstance(store, NumpyVectorStore):
+            store.build_ivf()
+
+        latencies, results = time_queries(store, queries, args.k, unfiltered)
+        filtered_latencies, filtered_results = time_queries(store, queries, args.k, filtered)
+        print(
+            f"{name:<22}{load_seconds:>8.1f}"
+            f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}"
+            f"{recall(results, truth['all']):>8.3f}"
+            f"{np.percentile(filtered_latencies, 50):>10.2f}{np.percentile(filtered_latencies, 99):>10.2f}"
+            f"{recall(filtered_results, truth['filtered']):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Snapshot or restore the retrieval index, lexical index and embedding cache.
+
+A snapshot taken after seeding lets new pods start serving retrieval
+without re-embedding anything:
+
+    python scripts/index_snapshot.py snapshot /snapshots/2024-06-01
+    python scripts/index_snapshot.py restore /snapshots/2024-06-01
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import shutil
+import time
+
+from app.core.config import settings
+from app.rag.numpy_store import NumpyVectorStore
+from app.rag.pipeline import RAGPipeline
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def index_path() -> str:
+    """Get the on-disk location of the configured vector index."""
+    path = settings.NUMPY_INDEX_PATH if settings.VECTOR_BACKEND == "numpy" else settings.CHROMA_PERSIST_DIRECTORY
+    if not path:
+        raise SystemExit(f"The {settings.VECTOR_BACKEND} index is not configured to persist")
+    return path
+
+
+def snapshot(destination: str) -> None:
+    """Copy the index and embedding cache into a snapshot directory."""
+    if os.path.exists(destination):
+        raise SystemExit(f"Snapshot destination already exists: {destination}")
+
+    start = time.perf_counter()
+    source = index_path()
+    if settings.VECTOR_BACKEND == "numpy" and not settings.VECTOR_PARTITION_KEY:
+        # Re-save rather than copy, so the snapshot is compacted and consistent
+        NumpyVectorStore(path=source, dtype=settings.NUMPY_INDEX_DTYPE).save(os.path.join(destination, "index"))
+    else:
+        shutil.copytree(source, os.path.join(destination, "index"))
+
+    # Chroma keeps it inside its directory; the NumPy index keeps it alongside
+    lexical_path = RAGPipeline.lexical_index_path()
+    if settings.VECTOR_BACKEND == "numpy" and lexical_path and os.path.exists(lexical_path):
+        shutil.copy2(lexical_path, os.path.join(destination, "lexical_index.json"))
+
+    if settings.EMBEDDING_CACHE_DIR and os.path.exists(settings.EMBEDDING_CACHE_DIR):
+        shutil.copytree(settings.EMBEDDING_CACHE_DIR, os.path.join(destination, "embedding_cache"))
+
+    logger.info(f"Snapshot of {settings.VECTOR_BACKEND} index written to {destination} in {time.perf_counter() - start:.1f}s")
+
+
+def restore(source: str, force: bool = False) -> None:
+    """Replace the index and embedding cache with a snapshot."""
+    targets = [(os.path.join(source, "index"), index_path())]
+    if settings.EMBEDDING_CACHE_DIR:
+        targets.append((os.path.join(source, "embedding_cache"), settings.EMBEDDING_CACHE_DIR))
+
+    if not os.path.exists(targets[0][0]):
+        raise SystemExit(f"No index found in snapshot: {source}")
+
+    start = time.perf_counter()
+    for snapshot_path, target in targets:
+        if not os.path.exists(snapshot_path):
+            continue
+        if os.path.exists(target):
+            if not force:
+                raise SystemExit(f"{target} already exists, use --force to replace it")
+            shutil.rmtree(target)
+        shutil.copytree(snapshot_path, target)
+
+    lexical_path = RAGPipeline.lexical_index_path()
+    lexical_snapshot = os.path.join(source, "lexical_index.json")
+    if settings.VECTOR_BACKEND == "numpy" and lexical_path and os.path.exists(lexical_snapshot):
+        shutil.copy2(lexical_snapshot, lexical_path)
+
+    logger.info(f"Restored {settings.VECTOR_BACKEND} index from {source} in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot or restore the retrieval index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    snapshot_parser = subparsers.add_parser("snapshot", help="Copy the index into a snapshot directory")
+    snapshot_parser.add_argument("destination")
+    restore_parser = subparsers.add_parser("restore", help="Replace the index with a snapshot")
+    restore_parser.add_argument("source")
+    restore_parser.add_argument("--force", action="store_true", help="Overwrite an existing index")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        snapshot(args.destination)
+    else:
+        restore(args.source, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Ingest a directory of manuals (text, Markdown or text extracted from PDFs).
+
+Large libraries stream through chunking, embedding and indexing with flat
+memory use. Interrupted runs resume from the checkpoint, and files that
+have not changed since are skipped:
+
+    python scripts/ingest_directory.py /mnt/manuals --checkpoint ./data/ingest_checkpoint.jsonl
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+
+from app.rag.bulk_ingest import SUPPORTED_EXTENSIONS, BulkIngestor
+from app.rag.pipeline import get_rag_pipeline
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a directory of manuals into the retrieval index")
+    parser.add_argument("root", help="Library directory")
+    parser.add_argument("--checkpoint", default="./data/ingest_checkpoint.jsonl", help="Resume checkpoint file")
+    parser.add_argument("--workers", type=int, help="Chunking processes")
+    parser.add_argument("--batch-documents", type=int, help="Files per indexing batch")
+    parser.add_argument(
+        "--extensions", nargs="+", default=list(SUPPORTED_EXTENSIONS), help="File extensions to ingest"
+    )
+    args = parser.parse_args()
+
+    rag = get_rag_pipeline()
+    ingestor = BulkIngestor(
+        rag,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        batch_documents=args.batch_documents
+    )
+    report = ingestor.ingest_directory(args.root, tuple(ext.lower() for ext in args.extensions))
+
+    logger.info(
+        f"Done: {report['documents']} documents, {report['chunks']} chunks in {report['seconds']:.1f}s "
+        f"({report['docs_per_second']:.1f} docs/s, {report['chunks_per_second']:.1f} chunks/s)"
+    )
+    if hasattr(rag.embeddings, "get_stats"):
+        stats = rag.embeddings.get_stats()
+        logger.info(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+
+
+if __name__ == "__main__":
+    main()
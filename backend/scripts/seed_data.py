@@ -12,10 +12,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def seed_documents():
-    """Seed the vector store with industrial documentation."""
-    
-    documents = [
+def get_seed_documents():
+    """Get the industrial documentation to seed."""
+    return [
         {
             "content": """
             Air Compressor Unit 1 (COMP-001) - Maintenance Manual
@@ -48,6 +47,7 @@ def seed_documents():
             """,
             "metadata": {
                 "equipment_id": "COMP-001",
+                "equipment_type": "Compressor",
                 "doc_type": "manual",
                 "category": "maintenance"
             },
@@ -94,6 +94,7 @@ def seed_documents():
             """,
             "metadata": {
                 "equipment_id": "TURB-003",
+                "equipment_type": "Turbine",
                 "doc_type": "procedures",
                 "category": "operations"
             },
@@ -157,6 +158,7 @@ def seed_documents():
             """,
             "metadata": {
                 "equipment_id": "PUMP-007",
+                "equipment_type": "Pump",
                 "doc_type": "troubleshooting",
                 "category": "maintenance"
             },
@@ -289,16 +291,33 @@ def seed_documents():
             "source": "Predictive_Maintenance_Program_Overview.pdf"
         }
     ]
+
+
+def seed_documents():
+    """Seed the vector store with industrial documentation."""
+    documents = get_seed_documents()
     
     try:
         logger.info("Initializing RAG pipeline...")
         rag = get_rag_pipeline()
         
         logger.info(f"Adding {len(documents)} documents to vector store...")
-        rag.add_documents(documents)
+        report = rag.add_documents(documents)
+        rag.save_index()
+        logger.info(
+            f"Chunks added: {report['added']}, unchanged: {report['unchanged']}, "
+            f"deleted: {report['deleted']}"
+        )
         
         logger.info("Document seeding completed successfully!")
         
+        if hasattr(rag.embeddings, "get_stats"):
+            stats = rag.embeddings.get_stats()
+            logger.info(
+                f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate)"
+            )
+        
         # Test search
         logger.info("\nTesting search functionality...")
         test_query = "What causes high vibration in pumps?"
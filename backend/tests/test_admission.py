@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from app.agents.admission import AdmissionController, AdmissionRejected
+from app.models.schemas import QueryPriority
+
+
+def _start_waiter(controller, priority, order, errors):
+    def run():
+        try:
+            with controller.admit(priority):
+                order.append(priority)
+        except AdmissionRejected:
+            errors.append(priority)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(0.05)
+    return thread
+
+
+def test_critical_queries_admitted_first():
+    """Test waiting critical queries are admitted before earlier low ones."""
+    controller = AdmissionController(max_concurrent=1, rate_per_second=100, burst=10)
+    order, errors = [], []
+
+    controller.acquire(QueryPriority.NORMAL)
+    threads = [
+        _start_waiter(controller, QueryPriority.LOW, order, errors),
+        _start_waiter(controller, QueryPriority.CRITICAL, order, errors),
+    ]
+    controller.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == [QueryPriority.CRITICAL, QueryPriority.LOW]
+    assert controller.get_stats()["priorities"]["low"]["max_wait_seconds"] > 0
+
+
+def test_full_queue_sheds_lowest_priority():
+    """Test a full queue sheds low priority waiters, then rejects new arrivals."""
+    controller = AdmissionController(max_concurrent=1, rate_per_second=100, max_queue_depth=1)
+    order, errors = [], []
+
+    controller.acquire(QueryPriority.NORMAL)
+    low = _start_waiter(controller, QueryPriority.LOW, order, errors)
+    critical = _start_waiter(controller, QueryPriority.CRITICAL, order, errors)
+    low.join()
+    assert errors == [QueryPriority.LOW]
+
+    with pytest.raises(AdmissionRejected):
+        controller.acquire(QueryPriority.NORMAL)
+
+    controller.release()
+    critical.join()
+    assert order == [QueryPriority.CRITICAL]
+
+
+def test_token_bucket_limits_rate():
+    """Test admissions beyond the burst wait for token refill."""
+    controller = AdmissionController(max_concurrent=10, rate_per_second=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        with controller.admit(QueryPriority.NORMAL):
+            pass
+    assert time.monotonic() - start >= 0.09
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,47 @@
+import pytest
+
+from app.rag.bm25 import BM25Index, is_lexical_query, tokenize
+
+
+def test_tokenize_keeps_identifiers():
+    """Test identifiers are indexed whole and by their parts."""
+    terms = tokenize("PUMP-007 shut down at 550°F")
+    assert "pump-007" in terms
+    assert "pump" in terms
+    assert "550f" in terms
+
+
+def test_exact_identifier_ranks_first():
+    """Test a chunk containing the exact part number outranks related chunks."""
+    index = BM25Index()
+    index.add("a", "Pump bearing replacement procedure", {"equipment_id": "PUMP-007"})
+    index.add("b", "Part BRG-6205 is the PUMP-007 bearing", {"equipment_id": "PUMP-007"})
+    index.add("c", "Turbine shutdown at 550°F exhaust temperature", {"equipment_id": "TURB-003"})
+
+    assert index.search("BRG-6205")[0][0] == "b"
+    assert index.search("550°F shutdown")[0][0] == "c"
+    assert [chunk_id for chunk_id, _ in index.search("bearing", filter_dict={"equipment_id": "TURB-003"})] == []
+
+
+def test_remove_updates_index():
+    """Test removed chunks no longer match and replacing an id reindexes it."""
+    index = BM25Index()
+    index.add("a", "seal leak", {})
+    index.add("b", "seal wear", {})
+    index.remove(["a"])
+    index.add("b", "bearing wear", {})
+
+    assert index.search("seal") == []
+    assert len(index) == 1
+
+
+def test_is_lexical_query():
+    """Test identifier-only queries are detected."""
+    assert is_lexical_query("PUMP-007")
+    assert is_lexical_query("E-4521 550°F")
+    assert not is_lexical_query("PUMP-007 bearing")
+    assert not is_lexical_query("")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+import os
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.rag.bulk_ingest import BulkIngestor, IngestCheckpoint, iter_files
+from app.rag.chunking import file_metadata
+from app.rag.pipeline import RAGPipeline
+
+
+@pytest.fixture
+def rag(monkeypatch, tmp_path):
+    """RAG pipeline on fake embeddings with an isolated collection."""
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIRECTORY", None)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", None)
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+    return RAGPipeline()
+
+
+@pytest.fixture
+def library(tmp_path):
+    """A small manual library with nested directories and an ignored file."""
+    root = tmp_path / "manuals"
+    (root / "maintenance").mkdir(parents=True)
+    (root / "operations").mkdir()
+    for i in range(12):
+        (root / "maintenance" / f"PUMP-{i:03d}_Manual.txt").write_text(f"Pump {i} bearing service. " * 100)
+    (root / "operations" / "TURB-003_Procedures.md").write_text("# Startup\n\nPurge for 10 minutes.")
+    (root / "operations" / "diagram.png").write_bytes(b"\x89PNG")
+    return root
+
+
+def test_iter_files_is_ordered_and_relative(library):
+    """Test files are walked in a stable order with relative sources."""
+    sources = [source for _, source in iter_files(str(library))]
+
+    assert sources[0] == "maintenance/PUMP-000_Manual.txt"
+    assert sources[-1] == "operations/TURB-003_Procedures.md"
+    assert len(sources) == 13
+
+
+def test_file_metadata_from_path():
+    """Test equipment id and category are inferred from the path."""
+    assert file_metadata("maintenance/COMP-001_Manual_v2.3.txt") == {
+        "doc_type": "manual", "equipment_id": "COMP-001", "category": "maintenance"
+    }
+    assert file_metadata("Vibration_Guide.md") == {"doc_type": "manual"}
+
+
+def test_ingests_directory_in_batches(rag, library, tmp_path):
+    """Test every file is chunked, indexed and reported with throughput."""
+    ingestor = BulkIngestor(rag, str(tmp_path / "checkpoint.jsonl"), workers=2, batch_documents=5, queue_batches=1)
+
+    report = ingestor.ingest_directory(str(library))
+
+    assert report["documents"] == 13
+    assert report["added"] == report["chunks"] == rag.store.count()
+    assert report["skipped"] == report["failed"] == 0
+    assert report["docs_per_second"] > 0 and report["chunks_per_second"] > 0
+    results = rag.search("startup purge", k=1, filter_dict={"equipment_id": "TURB-003"})
+    assert results[0]["source"] == "operations/TURB-003_Procedures.md"
+
+
+def test_resumes_from_checkpoint(rag, library, tmp_path):
+    """Test a re-run skips indexed files and picks up changed ones."""
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    BulkIngestor(rag, checkpoint, workers=2).ingest_directory(str(library))
+    chunks = rag.store.count()
+
+    changed = library / "maintenance" / "PUMP-003_Manual.txt"
+    changed.write_text("Replaced with a short revision.")
+    report = BulkIngestor(rag, checkpoint, workers=2).ingest_directory(str(library))
+
+    assert report["documents"] == 1
+    assert report["skipped"] == 12
+    assert report["deleted"] > report["added"] == 1
+    assert rag.store.count() == chunks - report["deleted"] + 1
+
+
+def test_failed_chunks_are_not_checkpointed(rag, library, tmp_path, monkeypatch):
+    """Test files whose chunks failed to embed are retried on the next run."""
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    monkeypatch.setattr(rag, "_write_chunks", lambda ids, chunks: (0, len(ids)))
+
+    report = BulkIngestor(rag, checkpoint, workers=1).ingest_directory(str(library))
+
+    assert report["failed"] > 0
+    assert len(IngestCheckpoint(checkpoint)) == 0
+
+
+def test_snapshot_index_saves_grow_geometrically(rag, library, tmp_path, monkeypatch):
+    """Test a snapshot index is not rewritten at every checkpoint interval."""
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_INDEX_PATH", str(tmp_path / "index"))
+    numpy_rag = RAGPipeline()
+    saved_sizes = []
+    save = numpy_rag.save_index
+    monkeypatch.setattr(numpy_rag, "save_index", lambda **kwargs: saved_sizes.append(numpy_rag.store.count()) or save(**kwargs))
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    ingestor = BulkIngestor(
+        numpy_rag, checkpoint, workers=1, batch_documents=1, checkpoint_seconds=0, checkpoint_min_chunks=5
+    )
+
+    report = ingestor.ingest_directory(str(library))
+
+    assert report["index_saves"] == len(saved_sizes) < report["documents"]
+    # Each mid-run save at least doubles the index since the previous one
+    assert all(later >= 2 * earlier for earlier, later in zip(saved_sizes, saved_sizes[1:-1]))
+    assert len(IngestCheckpoint(checkpoint)) == 13
+
+
+def test_checkpoint_ignores_partial_line(tmp_path):
+    """Test a checkpoint torn by a crash still loads its complete entries."""
+    path = str(tmp_path / "checkpoint.jsonl")
+    IngestCheckpoint(path).commit([("a.txt", (10, 1))])
+    with open(path, "a") as f:
+        f.write('{"source": "b.t')
+
+    checkpoint = IngestCheckpoint(path)
+
+    assert checkpoint.is_done("a.txt", (10, 1))
+    assert not checkpoint.is_done("a.txt", (11, 1))
+    assert len(checkpoint) == 1
+
+
+def test_rejects_missing_directory(rag, tmp_path):
+    """Test a missing library directory is reported."""
+    with pytest.raises(ValueError):
+        BulkIngestor(rag).ingest_directory(os.path.join(str(tmp_path), "missing"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+import pytest
+
+from app.core.tokens import estimate_tokens
+from app.providers.embeddings import FakeEmbeddings
+from app.rag.compression import GAP_MARKER, ContextCompressor, split_sentences
+
+PUMP_MANUAL = """
+Hydraulic Pump 7 (PUMP-007) - Troubleshooting Guide
+
+Overview:
+Hydraulic Pump 7 is a variable displacement piston pump serving the hydraulic press system.
+It operates at high pressure and requires careful monitoring.
+
+Problem: Pressure Fluctuations
+1. Air in system - Bleed system, check for suction leaks
+2. Worn pump components - Inspect pistons, valve plate, cylinder block
+
+Problem: Cavitation
+Cavitation causes noise, reduced flow and erratic pressure. Check the suction line and inspect filters.
+"""
+
+
+def make_doc(source, content):
+    """Build a search result."""
+    return {"source": source, "content": content, "metadata": {}}
+
+
+@pytest.fixture
+def compressor():
+    """Compressor on deterministic fake embeddings."""
+    return ContextCompressor(FakeEmbeddings())
+
+
+def test_split_sentences_keeps_list_items():
+    """Test chunks split on sentence ends and line breaks, dropping blank fragments."""
+    assert split_sentences("Overview:\n  First. Second!\n- Item one\n\n1. Step") == [
+        "Overview:", "First.", "Second!", "- Item one", "1. Step"
+    ]
+
+
+def test_keeps_relevant_sentences_past_fixed_offsets(compressor):
+    """Test the sentence answering the query survives even at the end of a chunk."""
+    docs = [make_doc("pump.pdf", PUMP_MANUAL)]
+
+    excerpts = compressor.compress("What causes cavitation noise?", docs, max_tokens=40)
+
+    assert "cavitation" not in PUMP_MANUAL[:300].lower()
+    assert len(excerpts) == 1
+    assert "Cavitation causes noise, reduced flow and erratic pressure." in excerpts[0]["content"]
+    assert "variable displacement" not in excerpts[0]["content"]
+
+
+def test_respects_token_budget_and_document_order(compressor):
+    """Test excerpts fit the budget, keep retrieval order and mark dropped sentences."""
+    docs = [make_doc("pump.pdf", PUMP_MANUAL), make_doc("other.pdf", "Cavitation damages impellers. Paint the guard.")]
+
+    excerpts = compressor.compress("cavitation pressure pump", docs, max_tokens=60)
+
+    used = sum(estimate_tokens(e["content"]) + estimate_tokens(f"Source: {e['source']}") for e in excerpts)
+    assert used <= 60
+    assert [e["source"] for e in excerpts] == ["pump.pdf", "other.pdf"]
+    assert GAP_MARKER in excerpts[0]["content"]
+    assert compressor.get_stats()["ratio"] < 1
+
+
+def test_overlapping_chunks_score_shared_sentences_once(compressor, monkeypatch):
+    """Test sentences repeated by chunk overlap are embedded and kept once."""
+    query_embedding = compressor.embeddings.embed_query("replace bearing")
+    embedded = []
+    embed_documents = compressor.embeddings.embed_documents
+    monkeypatch.setattr(
+        compressor.embeddings, "embed_documents", lambda texts: embedded.extend(texts) or embed_documents(texts)
+    )
+    docs = [
+        make_doc("a.pdf", "Check the seals. Replace the bearing."),
+        make_doc("a.pdf", "Replace the bearing. Align the shaft.")
+    ]
+
+    excerpts = compressor.compress("replace bearing", docs, max_tokens=100, query_embedding=query_embedding)
+
+    assert sorted(embedded) == ["Align the shaft.", "Check the seals.", "Replace the bearing."]
+    assert sum(e["content"].count("Replace the bearing.") for e in excerpts) == 1
+
+
+def test_embedding_failure_falls_back_to_term_overlap(compressor, monkeypatch):
+    """Test compression still selects matching sentences when embedding fails."""
+    def fail(texts):
+        raise RuntimeError("embedding service down")
+
+    monkeypatch.setattr(compressor.embeddings, "embed_documents", fail)
+
+    excerpts = compressor.compress("suction leaks", [make_doc("pump.pdf", PUMP_MANUAL)], max_tokens=25)
+
+    assert "check for suction leaks" in excerpts[0]["content"]
+    assert compressor.get_stats()["embedding_failures"] == 1
+
+
+def test_empty_documents_compress_to_nothing(compressor):
+    """Test documents without sentences produce no excerpts."""
+    assert compressor.compress("pump", [make_doc("empty.pdf", "  \n ")], max_tokens=50) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
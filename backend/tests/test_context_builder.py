@@ -0,0 +1,48 @@
+import pytest
+
+from app.agents.context_builder import EquipmentContextBuilder
+from app.core.tokens import estimate_tokens
+from app.services.data_service import DataService
+
+data_service = DataService()
+
+
+def test_context_includes_equipment_data():
+    """Test context covers record, statistics, alerts and maintenance."""
+    context = EquipmentContextBuilder(data_service, max_tokens=1000).build("Why is PUMP-007 vibrating?")
+    assert "PUMP-007 Hydraulic Pump 7" in context
+    assert "open_alerts=1 (critical=1)" in context
+    assert "High Vibration" in context
+    assert "Replaced worn bearing assembly" in context
+
+
+def test_context_respects_token_budget():
+    """Test lower priority sections are dropped to fit the budget."""
+    context = EquipmentContextBuilder(data_service, max_tokens=60).build("Analyze", "PUMP-007")
+    assert estimate_tokens(context) <= 60
+    assert "Equipment:" in context
+    assert "Maintenance History:" not in context
+
+
+def test_statistics_cover_all_maintenance_logs():
+    """Test maintenance totals are not capped at the most recent logs."""
+    service = DataService()
+    template = service.get_maintenance_logs(equipment_id="PUMP-007", limit=None)[0]
+    service.maintenance_logs.extend(
+        template.model_copy(update={"id": f"EXTRA-{i}", "cost": 100.0}) for i in range(15)
+    )
+    logs = service.get_maintenance_logs(equipment_id="PUMP-007", limit=None)
+
+    context = EquipmentContextBuilder(service, max_tokens=1000).build("Analyze", "PUMP-007")
+
+    assert len(logs) > 10
+    assert f"maintenance_events={len(logs)} total_cost=${sum(log.cost for log in logs):,.0f}" in context
+
+
+def test_no_context_without_equipment():
+    """Test queries without known equipment get no context."""
+    assert EquipmentContextBuilder(data_service).build("Explain vibration analysis") == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
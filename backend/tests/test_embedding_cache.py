@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from app.providers.embedding_cache import CachedEmbeddings, KEYS_FILE, VECTORS_FILE
+from app.providers.embeddings import FakeEmbeddings
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings that count how many texts reach the model."""
+
+    def __init__(self):
+        super().__init__(dimensions=16)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def test_repeated_texts_hit_cache():
+    """Test unchanged texts and repeated queries are not re-embedded."""
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "fake-16")
+
+    first = cache.embed_documents(["pump manual", "turbine manual", "pump manual"])
+    assert model.embedded == 2
+
+    second = cache.embed_documents(["pump manual", "compressor manual"])
+    assert model.embedded == 3
+    assert second[0] == first[0]
+
+    assert cache.embed_query("turbine manual") == first[1]
+    assert model.embedded == 3
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 3
+    assert stats["entries"] == 3
+
+
+def test_cache_persists_as_float32(tmp_path):
+    """Test vectors survive a restart and are stored as float32."""
+    cache = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path))
+    vectors = cache.embed_documents(["pump manual", "turbine manual"])
+
+    vectors_path = tmp_path / "fake-16" / VECTORS_FILE
+    assert vectors_path.stat().st_size == 2 * 16 * 4
+
+    model = CountingEmbeddings()
+    reloaded = CachedEmbeddings(model, "fake-16", cache_dir=str(tmp_path))
+    assert reloaded.embed_documents(["pump manual", "turbine manual"]) == \
+        vectors
+    assert model.embedded == 0
+
+
+def test_interrupted_write_is_dropped_on_load(tmp_path):
+    """Test vectors written without their key are discarded."""
+    cache = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path))
+    cache.embed_documents(["pump manual"])
+
+    with open(tmp_path / "fake-16" / VECTORS_FILE, "ab") as f:
+        np.zeros(16, dtype=np.float32).tofile(f)
+
+    reloaded = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path))
+    reloaded.embed_documents(["turbine manual"])
+
+    again = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path))
+    assert again.get_stats()["entries"] == 2
+    assert again.embed_query("turbine manual") == reloaded.embed_query("turbine manual")
+    assert (tmp_path / "fake-16" / KEYS_FILE).read_text().startswith("dimensions=16\n")
+
+
+def test_keys_without_vectors_are_dropped_on_load(tmp_path):
+    """Test keys written without their vector are removed so later rows stay aligned."""
+    cache = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path))
+    cache.embed_documents(["pump manual"])
+
+    with open(tmp_path / "fake-16" / KEYS_FILE, "a", encoding="utf-8") as f:
+        f.write(f"{CachedEmbeddings.make_key('lost manual')}\n")
+
+    reloaded = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path))
+    assert reloaded.get_stats()["entries"] == 1
+    expected = reloaded.embed_documents(["turbine manual"])
+
+    model = CountingEmbeddings()
+    again = CachedEmbeddings(model, "fake-16", cache_dir=str(tmp_path))
+    assert again.embed_documents(["turbine manual"]) == expected
+    assert model.embedded == 0
+    assert len((tmp_path / "fake-16" / KEYS_FILE).read_text().split()) == 3
+
+
+def test_entries_are_bounded_and_files_compacted(tmp_path):
+    """Test least recently used vectors are evicted and evicted rows leave the files."""
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "fake-16", cache_dir=str(tmp_path), max_entries=3)
+    cache.embed_documents(["a", "b", "c"])
+    cache.embed_query("a")
+    cache.embed_documents(["d", "e", "f", "g"])
+
+    assert cache.get_stats()["entries"] == 3
+    assert cache.get_stats()["compactions"] == 1
+    vectors_path = tmp_path / "fake-16" / VECTORS_FILE
+    assert vectors_path.stat().st_size == 3 * 16 * 4
+
+    reloaded = CachedEmbeddings(CountingEmbeddings(), "fake-16", cache_dir=str(tmp_path), max_entries=3)
+    assert reloaded.get_stats()["entries"] == 3
+    embedded = model.embedded
+    cache.embed_documents(["g"])
+    assert model.embedded == embedded
+    cache.embed_documents(["a"])
+    assert model.embedded == embedded + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
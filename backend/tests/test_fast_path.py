@@ -0,0 +1,68 @@
+import pytest
+
+from app.agents.fast_path import answer_lookup, detect_intents
+from app.services.data_service import DataService
+
+data_service = DataService()
+
+
+def test_status_lookup_answered_from_data():
+    """Test status questions are answered without the agent graph."""
+    result = answer_lookup("What is the status of COMP-001?", None, data_service)
+    assert result is not None
+    assert "COMP-001" in result["answer"]
+    assert "operational" in result["answer"]
+    assert result["confidence"] == 1.0
+
+
+def test_alert_lookup_uses_request_equipment_id():
+    """Test the request equipment ID is used when the query has none."""
+    result = answer_lookup("Any open alerts?", "PUMP-007", data_service)
+    assert result is not None
+    assert "High Vibration" in result["answer"]
+
+
+def test_analytical_questions_fall_back():
+    """Test analytical questions and unknown equipment go to the agent graph."""
+    assert detect_intents("Why is the status of PUMP-007 critical?") == []
+    assert answer_lookup("Why is PUMP-007 vibrating?", None, data_service) is None
+    assert answer_lookup("What is the status of XYZ-999?", None, data_service) is None
+
+
+
+def test_unknown_equipment_in_query_ignores_request_id():
+    """Test a query naming unknown equipment is not answered with the request's equipment."""
+    assert answer_lookup("What is the status of XYZ-999?", "PUMP-007", data_service) is None
+    result = answer_lookup("what is the status of comp-001", "PUMP-007", data_service)
+    assert "COMP-001" in result["answer"]
+
+
+@pytest.mark.parametrize("query,intents", [
+    ("PUMP-007 status", ["status"]),
+    ("what is the status of pump-007", ["status"]),
+    ("Is TURB-003 running?", ["status"]),
+    ("What's the status and health score of COMP-001?", ["status", "health"]),
+    ("When is the next maintenance for CONV-012 due?", ["next_maintenance"]),
+    ("Are there any open alerts on PUMP-007?", ["alerts"]),
+])
+def test_lookup_templates(query, intents):
+    """Test short lookup questions are recognized."""
+    assert detect_intents(query) == intents
+
+
+@pytest.mark.parametrize("query", [
+    "Is PUMP-007 running hot?",
+    "What state are the bearings on PUMP-007 in?",
+    "Is PUMP-007 running at abnormal vibration levels?",
+    "Summarize the health trend of TURB-003 over the last month",
+    "Is COMP-001 safe to keep running until the next maintenance?",
+    "What is the status of the PUMP-007 seal replacement work order?",
+])
+def test_diagnostic_questions_mentioning_lookups_fall_back(query):
+    """Test questions that only mention a lookup keyword go to the agent graph."""
+    assert detect_intents(query) == []
+    assert answer_lookup(query, None, data_service) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+
+from app.rag.filters import matches_filter, normalize_filter, normalize_metadata
+
+
+METADATA = {"equipment_id": "PUMP-007", "doc_type": "manual", "date": 20240315}
+
+
+def test_normalize_makes_operators_explicit():
+    """Test implicit equality and multi-field dicts become single-key conditions."""
+    assert normalize_filter({"equipment_id": "PUMP-007"}) == {"equipment_id": {"$eq": "PUMP-007"}}
+    assert normalize_filter({"equipment_id": "PUMP-007", "doc_type": "manual"}) == {"$and": [
+        {"equipment_id": {"$eq": "PUMP-007"}},
+        {"doc_type": {"$eq": "manual"}},
+    ]}
+
+
+def test_normalize_unwraps_and_drops_empty_groups():
+    """Test single-child groups are unwrapped, as Chroma rejects them."""
+    assert normalize_filter(None) is None
+    assert normalize_filter({"$and": [{}, None]}) is None
+    assert normalize_filter({"$and": [{"doc_type": "manual"}]}) == {"doc_type": {"$eq": "manual"}}
+
+
+def test_normalize_converts_dates():
+    """Test date operands become YYYYMMDD integers."""
+    assert normalize_filter({"date": {"$gte": "2024-03-01", "$lt": date(2024, 4, 1)}}) == {"$and": [
+        {"date": {"$gte": 20240301}},
+        {"date": {"$lt": 20240401}},
+    ]}
+    assert normalize_metadata({"date": "2024-03-15T08:00:00"}) == {"date": 20240315}
+
+
+@pytest.mark.parametrize("bad_filter", [
+    {"$not": [{"doc_type": "manual"}]},
+    {"doc_type": {"$like": "man%"}},
+    {"equipment_id": {"$in": []}},
+    {"$or": {"doc_type": "manual"}},
+    {"date": {"$gt": "last week"}},
+])
+def test_normalize_rejects_malformed_filters(bad_filter):
+    """Test unknown operators and malformed operands are rejected."""
+    with pytest.raises(ValueError):
+        normalize_filter(bad_filter)
+
+
+def test_matches_compound_filters():
+    """Test membership, ranges and logical groups."""
+    assert matches_filter(METADATA, normalize_filter({
+        "equipment_id": {"$in": ["PUMP-007", "COMP-001"]},
+        "date": {"$gte": "2024-01-01"},
+    }))
+    assert not matches_filter(METADATA, normalize_filter({"equipment_id": {"$nin": ["PUMP-007"]}}))
+    assert matches_filter(METADATA, normalize_filter({"$or": [{"doc_type": "guide"}, {"date": {"$lt": 20240401}}]}))
+    assert not matches_filter(METADATA, normalize_filter({"date": {"$gt": "2024-03-15"}}))
+
+
+def test_missing_fields_never_match():
+    """Test conditions on absent fields fail, including negations, as in Chroma."""
+    assert not matches_filter(METADATA, {"category": {"$ne": "operations"}})
+    assert not matches_filter(METADATA, {"category": {"$nin": ["operations"]}})
+    assert not matches_filter({"doc_type": "manual"}, {"date": {"$lt": 20990101}})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,45 @@
+import pytest
+
+from app.agents.intent_router import IntentRouter
+
+
+class KeywordEmbeddings:
+    """Tiny deterministic embedding over a fixed vocabulary."""
+
+    vocabulary = ["why", "cause", "manual", "procedure", "hello", "thanks"]
+
+    def embed_query(self, text):
+        words = text.lower().replace("?", "").split()
+        return [float(sum(word.startswith(v) for word in words)) + 0.01 for v in self.vocabulary]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+EXAMPLES = {
+    "analysis": ["why is it hot", "what is the cause"],
+    "retrieval": ["show the manual", "startup procedure"],
+    "direct_answer": ["hello", "thanks"],
+}
+
+
+def test_routes_to_nearest_centroid():
+    """Test queries are routed to the most similar intent centroid."""
+    embeddings = KeywordEmbeddings()
+    router = IntentRouter(embeddings, examples=EXAMPLES)
+
+    assert router.route(embeddings.embed_query("Why is PUMP-007 vibrating?"))[0] == "analysis"
+    assert router.route(embeddings.embed_query("Bearing replacement procedure"))[0] == "retrieval"
+    assert router.route(embeddings.embed_query("hello there"))[0] == "direct_answer"
+
+
+def test_low_similarity_uses_default():
+    """Test low-confidence matches fall back to the full analysis path."""
+    embeddings = KeywordEmbeddings()
+    router = IntentRouter(embeddings, examples=EXAMPLES, min_similarity=0.99)
+
+    assert router.route(embeddings.embed_query("hello why manual"))[0] == "analysis"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
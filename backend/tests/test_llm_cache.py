@@ -0,0 +1,94 @@
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.agents.llm_cache import LLMResponseCache
+
+
+def _messages(query):
+    return [SystemMessage(content="You are an analyst."), HumanMessage(content=query)]
+
+
+def test_exact_hit_and_version_invalidation():
+    """Test exact matches are served until the data changes."""
+    cache = LLMResponseCache()
+    key = LLMResponseCache.make_key("gpt", 0.7, _messages("why is PUMP-007 vibrating"))
+
+    assert cache.get(key, ("data-a", "docs-a")) is None
+    cache.put(key, "worn bearings", ("data-a", "docs-a"))
+    assert cache.get(key, ("data-a", "docs-a")) == "worn bearings"
+    assert cache.get(key, ("data-b", "docs-a")) is None
+
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_semantic_hit_within_scope():
+    """Test similar query embeddings hit only within the same scope."""
+    cache = LLMResponseCache(semantic_threshold=0.9)
+    scope = LLMResponseCache.make_scope("gpt", 0.7, "You are an analyst.", "PUMP-007")
+    other_scope = LLMResponseCache.make_scope("gpt", 0.7, "You are an analyst.", "COMP-001")
+
+    cache.put("a", "worn bearings", ("data-a", "docs-a"), scope=scope, embedding=[1.0, 0.0, 0.1])
+
+    assert cache.get("b", ("data-a", "docs-a"), scope=scope, embedding=[1.0, 0.05, 0.1]) == "worn bearings"
+    assert cache.get("b", ("data-a", "docs-a"), scope=other_scope, embedding=[1.0, 0.05, 0.1]) is None
+    assert cache.get("b", ("data-a", "docs-a"), scope=scope, embedding=[0.0, 1.0, 0.0]) is None
+
+
+def test_stale_entries_expire_when_read():
+    """Test stale entries are dropped as they are read, without scanning the whole cache."""
+    cache = LLMResponseCache()
+    scope = LLMResponseCache.make_scope("gpt", 0.7, "You are an analyst.", "PUMP-007")
+    cache.put("a", "worn bearings", ("data-a", "docs-a"))
+    cache.put("b", "loose coupling", ("data-a", "docs-a"), scope=scope, embedding=[1.0, 0.0])
+
+    assert cache.get("a", ("data-b", "docs-a")) is None
+    assert cache.get_stats()["size"] == 1
+
+    assert cache.get("c", ("data-b", "docs-a"), scope=scope, embedding=[1.0, 0.0]) is None
+    assert cache.get_stats()["size"] == 0
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    """Test size bound eviction and reload from disk."""
+    path = str(tmp_path / "llm_cache.json")
+    cache = LLMResponseCache(max_entries=2, persist_path=path)
+    cache.put("a", "1", ("data-a", "docs-a"))
+    cache.put("b", "2", ("data-a", "docs-a"))
+    cache.get("a", ("data-a", "docs-a"))
+    cache.put("c", "3", ("data-a", "docs-a"))
+
+    assert cache.get("b", ("data-a", "docs-a")) is None
+    cache.save()
+
+    reloaded = LLMResponseCache(max_entries=2, persist_path=path)
+    assert reloaded.get("a", ("data-a", "docs-a")) == "1"
+    assert reloaded.get("c", ("data-a", "docs-a")) == "3"
+
+
+def test_restarted_service_invalidates_persisted_entries(tmp_path):
+    """Test entries persisted for one process's data are stale for re-seeded data."""
+    from app.services.data_service import DataService
+
+    first, second = DataService(), DataService()
+    assert first.fingerprint() == first.fingerprint()
+    # Both start at version 0, but their sample data differs
+    assert first.version == second.version
+    assert first.fingerprint() != second.fingerprint()
+
+    path = str(tmp_path / "llm_cache.json")
+    cache = LLMResponseCache(persist_path=path)
+    cache.put("a", "due in 5 days", (first.fingerprint(), "docs-a"))
+    cache.save()
+
+    assert LLMResponseCache(persist_path=path).get("a", (second.fingerprint(), "docs-a")) is None
+
+    alert = first.alerts[0]
+    before = first.fingerprint()
+    first.update_alert_status(alert.id, not alert.resolved)
+    assert first.fingerprint() != before
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,58 @@
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+
+from app.providers.local_embeddings import DynamicBatcher, LocalEmbeddings
+
+
+@pytest.fixture
+def no_sentence_transformers(monkeypatch):
+    """Make sentence-transformers unimportable to force the hashing fallback."""
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+
+
+def test_concurrent_queries_share_a_batch():
+    """Test queries arriving together are encoded in one model call."""
+    batches = []
+    release = threading.Event()
+
+    def encode(texts):
+        batches.append(len(texts))
+        release.wait(1)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    batcher = DynamicBatcher(encode, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(f"query {i}") for i in range(5)]
+    release.set()
+
+    assert all(future.result(1).shape == (4,) for future in futures)
+    assert batches == [5]
+    assert batcher.stats == {"requests": 5, "batches": 1}
+
+
+def test_hashing_fallback_without_sentence_transformers(no_sentence_transformers):
+    """Test the backend works offline and matches query and document vectors."""
+    embeddings = LocalEmbeddings(fallback_dimensions=64)
+
+    assert embeddings.model_name == "hashing-64"
+    assert embeddings.encode(["pump bearing"]).dtype == np.float32
+    assert embeddings.embed_query("pump bearing") == embeddings.embed_documents(["pump bearing"])[0]
+
+
+def test_model_load_failure_falls_back(monkeypatch):
+    """Test a model that cannot be downloaded or loaded falls back instead of failing startup."""
+    def offline(*args, **kwargs):
+        raise OSError("We couldn't connect to 'https://huggingface.co'")
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(SentenceTransformer=offline))
+    embeddings = LocalEmbeddings(fallback_dimensions=64)
+
+    assert embeddings.model_name == "hashing-64"
+    assert len(embeddings.embed_query("pump bearing")) == 64
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
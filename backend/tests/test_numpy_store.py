@@ -0,0 +1,146 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.rag.numpy_store import NumpyVectorStore
+
+
+def random_vectors(count, dimensions=32, seed=0):
+    """Generate random unit vectors."""
+    vectors = np.random.default_rng(seed).normal(size=(count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fill(store, vectors, equipment_ids=("PUMP-007", "TURB-003")):
+    """Upsert vectors as chunks alternating between equipment IDs."""
+    ids = [f"c{i}" for i in range(len(vectors))]
+    metadatas = [
+        {"source": f"doc{i // 10}.pdf", "equipment_id": equipment_ids[i % len(equipment_ids)]}
+        for i in range(len(vectors))
+    ]
+    store.upsert(ids, vectors.tolist(), [f"text {i}" for i in range(len(vectors))], metadatas)
+    return ids
+
+
+def test_brute_force_matches_exact_ranking():
+    """Test the top-k equals an exact cosine ranking."""
+    vectors = random_vectors(500)
+    store = NumpyVectorStore(ivf_lists=0)
+    ids = fill(store, vectors)
+
+    query = random_vectors(1, seed=1)[0]
+    expected = [ids[i] for i in np.argsort(-(vectors @ query))[:5]]
+    assert [chunk_id for chunk_id, _, _ in store.query(query.tolist(), 5)] == expected
+
+
+def test_equipment_filter_uses_row_masks():
+    """Test filtered searches only return matching rows, including after deletes."""
+    store = NumpyVectorStore(ivf_lists=0)
+    fill(store, random_vectors(100))
+    store.delete(["c0", "c2"])
+
+    results = store.query(random_vectors(1, seed=2)[0].tolist(), 100, {"equipment_id": "PUMP-007"})
+    assert len(results) == 48
+    assert all(metadata["equipment_id"] == "PUMP-007" for _, _, metadata in results)
+    assert store.query(random_vectors(1)[0].tolist(), 5, {"equipment_id": "COMP-001"}) == []
+
+
+def test_compound_filter_is_pushed_down(monkeypatch):
+    """Test $in, range and $or filters match a metadata scan without scanning metadata."""
+    store = NumpyVectorStore(ivf_lists=0)
+    vectors = random_vectors(60)
+    metadatas = [
+        {
+            "source": f"doc{i}.pdf",
+            "equipment_id": ("PUMP-007", "TURB-003", "COMP-001")[i % 3],
+            "doc_type": ("manual", "guide")[i % 2],
+            "date": 20240101 + i
+        }
+        for i in range(60)
+    ]
+    store.upsert([f"c{i}" for i in range(60)], vectors.tolist(), [""] * 60, metadatas)
+    filter_dict = {
+        "equipment_id": {"$in": ["PUMP-007", "COMP-001"]},
+        "$or": [{"doc_type": "guide"}, {"date": {"$gte": "2024-01-31"}}],
+    }
+    expected = {
+        f"c{i}" for i, metadata in enumerate(metadatas)
+        if metadata["equipment_id"] != "TURB-003" and (metadata["doc_type"] == "guide" or metadata["date"] >= 20240131)
+    }
+    monkeypatch.setattr("app.rag.numpy_store.matches_filter", lambda *args: pytest.fail("metadata scanned"))
+
+    results = store.query(random_vectors(1, seed=4)[0].tolist(), 60, filter_dict)
+
+    assert {chunk_id for chunk_id, _, _ in results} == expected
+
+
+def test_unindexed_fields_fall_back_to_metadata_scan():
+    """Test conditions on fields without masks are still applied before scoring."""
+    store = NumpyVectorStore(ivf_lists=0)
+    fill(store, random_vectors(20))
+
+    results = store.query(random_vectors(1)[0].tolist(), 20, {"source": {"$in": ["doc0.pdf"]}, "equipment_id": "PUMP-007"})
+
+    assert sorted(chunk_id for chunk_id, _, _ in results) == ["c0", "c2", "c4", "c6", "c8"]
+
+
+def test_ivf_recall():
+    """Test IVF search finds most of the exact nearest neighbours."""
+    vectors = random_vectors(4000)
+    store = NumpyVectorStore(ivf_lists=32, ivf_probes=12, ivf_min_rows=1000)
+    ids = fill(store, vectors)
+    store.build_ivf()
+
+    recalls = []
+    for query in random_vectors(20, seed=3):
+        exact = {ids[i] for i in np.argsort(-(vectors @ query))[:10]}
+        found = {chunk_id for chunk_id, _, _ in store.query(query.tolist(), 10)}
+        recalls.append(len(exact & found) / 10)
+    assert np.mean(recalls) >= 0.8
+    assert store.get_stats()["ivf_lists"] == 32
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path):
+    """Test snapshots drop deleted rows, load memory-mapped and accept new writes."""
+    path = str(tmp_path / "index")
+    store = NumpyVectorStore(path=path, dtype="float16", ivf_lists=0)
+    fill(store, random_vectors(50))
+    store.delete(["c1"])
+    store.save()
+
+    loaded = NumpyVectorStore(path=path)
+    assert loaded.count() == 49
+    assert loaded.get_stats()["memory_mapped"]
+    assert loaded.get_stats()["dtype"] == "float16"
+    assert loaded.ids_for_sources({"doc0.pdf"}) == {f"c{i}" for i in range(10)} - {"c1"}
+
+    loaded.upsert(["new"], random_vectors(1, seed=4).tolist(), ["new text"], [{"source": "new.pdf"}])
+    assert loaded.query(random_vectors(1, seed=4)[0].tolist(), 1)[0][0] == "new"
+    assert not loaded.get_stats()["memory_mapped"]
+
+
+
+def test_queries_racing_saves_return_consistent_chunks(tmp_path):
+    """Test chunks returned while a save compacts the index keep their own text."""
+    store = NumpyVectorStore(path=str(tmp_path / "index"), ivf_lists=0)
+    vectors = random_vectors(400)
+    fill(store, vectors)
+    stop = threading.Event()
+
+    def churn():
+        for i in range(0, 400, 2):
+            store.delete([f"c{i}"])
+            store.save()
+        stop.set()
+
+    writer = threading.Thread(target=churn)
+    writer.start()
+    while not stop.is_set():
+        for chunk_id, text, _ in store.query(vectors[1].tolist(), 50):
+            assert text == f"text {chunk_id[1:]}"
+    writer.join()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,206 @@
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.rag import pipeline
+from app.agents.orchestrator import IndustrialAgentOrchestrator
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    """Orchestrator wired to the deterministic fake providers."""
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIRECTORY", None)
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", None)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", None)
+    monkeypatch.setattr(pipeline, "rag_pipeline", None)
+    return IndustrialAgentOrchestrator()
+
+
+def test_process_query_offline(orchestrator):
+    """Test the full agent graph runs offline with fake providers."""
+    result = orchestrator.process_query("Why is PUMP-007 vibrating?", equipment_id="PUMP-007")
+    assert result["confidence"] == 0.85
+    assert result["answer"]
+    assert result["recommendations"]
+
+
+def test_fake_responses_are_deterministic(orchestrator):
+    """Test identical queries produce identical answers."""
+    first = orchestrator._run_query("Explain the turbine temperature trend", None)
+    second = orchestrator._run_query("Explain the turbine temperature trend", None)
+    assert first == second
+
+
+def test_stream_query_offline(orchestrator):
+    """Test streaming emits node events, tokens and a final response."""
+    events = list(orchestrator.stream_query("Why is TURB-003 running hot?"))
+    names = [event["event"] for event in events]
+    assert names[0] == "route"
+    assert "token" in names
+    assert names[-1] == "done"
+
+
+@pytest.mark.parametrize("route", ["analysis", "retrieval"])
+def test_analysis_and_retrieval_run_concurrently(orchestrator, monkeypatch, route):
+    """Test the router fans out to both branches at once and the join runs downstream nodes once."""
+    # Each branch waits for the other; run one after the other, they would break the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    calls = {"recommendation": 0, "synthesizer": 0}
+
+    def concurrent(node):
+        def wrapped(state):
+            barrier.wait()
+            return node(state)
+        return wrapped
+
+    def counted(name, node):
+        def wrapped(state):
+            calls[name] += 1
+            return node(state)
+        return wrapped
+
+    monkeypatch.setattr(orchestrator.intent_router, "route", lambda embedding: (route, 1.0))
+    monkeypatch.setattr(orchestrator, "_analysis_agent", concurrent(orchestrator._analysis_agent))
+    monkeypatch.setattr(orchestrator, "_retrieval_agent", concurrent(orchestrator._retrieval_agent))
+    monkeypatch.setattr(orchestrator, "_recommendation_agent", counted("recommendation", orchestrator._recommendation_agent))
+    monkeypatch.setattr(orchestrator, "_synthesizer_agent", counted("synthesizer", orchestrator._synthesizer_agent))
+    orchestrator.workflow = orchestrator._build_workflow()
+
+    result = orchestrator._run_query("Why is PUMP-007 vibrating?", "PUMP-007")
+
+    assert result["answer"]
+    assert calls == {"recommendation": 1, "synthesizer": 1}
+
+
+def test_embedding_outage_routes_to_default(orchestrator, monkeypatch):
+    """Test a failing embedding provider does not fail routing or the query."""
+    def unavailable(text):
+        raise ConnectionError("embedding provider unavailable")
+
+    monkeypatch.setattr(orchestrator.rag_pipeline.embeddings, "embed_query", unavailable)
+
+    update = orchestrator._router_agent(orchestrator._initial_state("Why is PUMP-007 vibrating?", "PUMP-007"))
+    assert update == {"next_agent": orchestrator.intent_router.default_intent, "query_embedding": None}
+
+    result = orchestrator._run_query("Why is PUMP-007 vibrating?", "PUMP-007")
+    assert result["answer"]
+    assert result["confidence"] > 0
+
+
+def test_slow_llm_degrades_to_partial_answer(orchestrator, monkeypatch):
+    """Test a query still answers, with lower confidence, when the LLM misses its deadline."""
+    monkeypatch.setattr(settings, "LLM_NODE_TIMEOUT_SECONDS", 0.05)
+    for model in [orchestrator.llm, *orchestrator.node_models.values()]:
+        monkeypatch.setattr(model, "latency_ms", 500)
+
+    result = orchestrator._run_query("Why is TURB-003 running hot?", None)
+
+    assert result["confidence"] == 0.5
+    assert result["answer"]
+    assert "Degraded" in result["agent_reasoning"]
+
+
+def test_stalled_stream_falls_back_at_deadline(orchestrator, monkeypatch):
+    """Test a synthesizer stream that stalls is cut off at the node timeout."""
+    monkeypatch.setattr(settings, "LLM_NODE_TIMEOUT_SECONDS", 0.3)
+    model_class = type(orchestrator.node_models["synthesizer"])
+    stream = model_class.stream
+
+    def stalled_stream(self, messages):
+        yield from stream(self, messages)
+        time.sleep(2)
+
+    # Pydantic models reject instance attributes; only the synthesizer streams
+    monkeypatch.setattr(model_class, "stream", stalled_stream)
+    start = time.monotonic()
+    events = list(orchestrator.stream_query("Why is TURB-003 running hot?"))
+
+    assert time.monotonic() - start < 3
+    assert events[-1]["event"] == "done"
+    assert "synthesizer" in events[-1]["data"]["agent_reasoning"]
+
+
+def test_invalid_small_model_output_escalates(orchestrator, monkeypatch):
+    """Test a node escalates to the large model when the small model's output fails validation."""
+    small = orchestrator.node_models["recommendation"]
+    assert small.model_name != orchestrator.llm.model_name
+    monkeypatch.setattr(small, "output_tokens", 0)
+
+    result = orchestrator._run_query("Why is PUMP-007 vibrating?", "PUMP-007")
+
+    assert result["recommendations"]
+    assert orchestrator.get_model_stats()["nodes"]["recommendation"]["escalations"] == 1
+    assert orchestrator.get_model_stats()["nodes"]["synthesizer"]["escalations"] == 0
+
+
+def test_session_follow_up_uses_history(orchestrator):
+    """Test follow-up questions reuse the session's equipment and history."""
+    orchestrator.process_query("Why is PUMP-007 vibrating?", session_id="s1")
+    follow_up = orchestrator.process_query("What is its health score?", session_id="s1")
+
+    assert "45.8" in follow_up["answer"]
+    assert "Why is PUMP-007 vibrating?" in orchestrator.sessions.get_history("s1")
+
+
+def test_process_batch_shares_retrieval(orchestrator, monkeypatch):
+    """Test repeated batch queries share a retrieval and distinct queries get their own."""
+    searches = []
+    search = orchestrator.rag_pipeline.search_equipment_docs
+    monkeypatch.setattr(
+        orchestrator.rag_pipeline,
+        "search_equipment_docs",
+        lambda *args, **kwargs: searches.append(kwargs["query"]) or search(*args, **kwargs)
+    )
+    retrieved = {}
+    process_query = orchestrator.process_query
+
+    def recording_process_query(query, *args, **kwargs):
+        retrieved[query] = kwargs["retrieved_docs"]
+        return process_query(query, *args, **kwargs)
+
+    monkeypatch.setattr(orchestrator, "process_query", recording_process_query)
+    queries = [
+        {"query": text, "equipment_id": "PUMP-007"}
+        for i in range(3)
+        for text in (f"Analyze trend {i} for PUMP-007", f"analyze  trend {i} for PUMP-007?")
+    ]
+
+    results = list(orchestrator.process_batch(queries, max_concurrency=3))
+
+    assert sorted(result["index"] for result in results) == list(range(6))
+    assert len(searches) == 3
+    for i in range(3):
+        # Both spellings of a query got the documents retrieved for that query
+        expected = search(query=f"Analyze trend {i} for PUMP-007", equipment_id="PUMP-007", k=3)
+        assert retrieved[f"Analyze trend {i} for PUMP-007"] == expected
+        assert retrieved[f"analyze  trend {i} for PUMP-007?"] == expected
+
+
+def test_retrieved_docs_are_compressed_once(orchestrator, monkeypatch):
+    """Test prompts get the relevant sentences within budget, scored once for both agents."""
+    filler = "Keep the area around the unit clean and dry. " * 20
+    docs = [{
+        "source": "pump.pdf",
+        "content": f"{filler}Cavitation causes noise and erratic pressure; inspect the suction strainer.",
+        "metadata": {}
+    }]
+    state = orchestrator._initial_state("What causes cavitation noise?", "PUMP-007", retrieved_docs=docs)
+
+    update = orchestrator._retrieval_agent(state)
+    summary = update["messages"][0].content
+    assert "inspect the suction strainer" in summary
+    assert len(summary) < len(filler)
+
+    monkeypatch.setattr(orchestrator.rag_pipeline.compressor, "score", lambda *args: pytest.fail("rescored"))
+    prompts = []
+    monkeypatch.setattr(orchestrator, "_invoke_llm", lambda messages, *args: prompts.append(messages[1].content) or "1. Fix it now")
+    orchestrator._recommendation_agent({**state, **update})
+    assert "inspect the suction strainer" in prompts[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
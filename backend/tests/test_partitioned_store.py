@@ -0,0 +1,148 @@
+import uuid
+
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+import numpy as np
+import pytest
+
+from app.rag.numpy_store import NumpyVectorStore
+from app.rag.partitioned_store import PartitionedVectorStore, partition_name
+from app.rag.vector_store import ChromaVectorStore
+
+EQUIPMENT = {"PUMP-007": "Pump", "PUMP-009": "Pump", "TURB-003": "Turbine", "COMP-001": "Compressor"}
+
+
+@pytest.fixture(params=["chroma", "numpy"])
+def factory(request):
+    """Partition factory for each backend, recording which partitions were queried."""
+    queried = []
+    # Same settings as the pipeline; Chroma allows one ephemeral configuration per process
+    client = chromadb.EphemeralClient(ChromaSettings(anonymized_telemetry=False)) if request.param == "chroma" else None
+    prefix = f"test_{uuid.uuid4().hex[:8]}__"
+
+    def create(name):
+        store = ChromaVectorStore(client, f"{prefix}{name}") if client else NumpyVectorStore(ivf_lists=0)
+        query = store.query_with_scores
+
+        def recording_query(*args, **kwargs):
+            queried.append(name)
+            return query(*args, **kwargs)
+
+        store.query_with_scores = recording_query
+        return store
+
+    create.queried = queried
+    return create
+
+
+def fill(store, count=40):
+    """Upsert chunks spread over the equipment, plus shared guides without a type."""
+    vectors = np.random.default_rng(0).normal(size=(count, 16))
+    equipment_ids = list(EQUIPMENT) + [None]
+    metadatas = []
+    for i in range(count):
+        equipment_id = equipment_ids[i % len(equipment_ids)]
+        metadata = {"source": f"doc{i}.pdf", "doc_type": "guide" if equipment_id is None else "manual"}
+        if equipment_id:
+            metadata.update(equipment_id=equipment_id, equipment_type=EQUIPMENT[equipment_id])
+        metadatas.append(metadata)
+    store.upsert([f"c{i}" for i in range(count)], vectors.tolist(), [f"text {i}" for i in range(count)], metadatas)
+    return metadatas
+
+
+def test_partition_names_are_safe():
+    """Test key values map to collection- and directory-safe names."""
+    assert partition_name("Plant 2 / Line A") == "plant_2_line_a"
+    assert partition_name(None) == "shared"
+
+
+def test_chunks_land_in_their_partition(factory):
+    """Test upserts are split by the partition key."""
+    store = PartitionedVectorStore("equipment_type", factory)
+    fill(store)
+
+    assert store.get_stats()["partitions"] == {"compressor": 8, "pump": 16, "shared": 8, "turbine": 8}
+    assert store.count() == 40
+
+
+def test_filters_route_to_matching_partitions(factory):
+    """Test partition key and equipment id filters only scan the partitions holding matches."""
+    store = PartitionedVectorStore("equipment_type", factory)
+    fill(store)
+    query = np.ones(16).tolist()
+
+    results = store.query(query, 10, {"equipment_type": "Pump", "doc_type": "manual"})
+    assert len(results) == 10 and {metadata["equipment_type"] for _, _, metadata in results} == {"Pump"}
+    assert factory.queried == ["pump"]
+
+    factory.queried.clear()
+    results = store.query(query, 20, {"equipment_id": {"$in": ["TURB-003", "COMP-001"]}})
+    assert {metadata["equipment_id"] for _, _, metadata in results} == {"TURB-003", "COMP-001"}
+    assert sorted(factory.queried) == ["compressor", "turbine"]
+
+    factory.queried.clear()
+    assert store.query(query, 5, {"equipment_id": "MISSING-1"}) == []
+    assert factory.queried == []
+
+
+def test_unrouted_search_merges_partitions_by_score(factory):
+    """Test searches without a routable filter scan every partition and merge by score."""
+    query = np.random.default_rng(1).normal(size=16).tolist()
+    store = PartitionedVectorStore("equipment_type", factory)
+    fill(store)
+    factory.queried.clear()
+
+    results = store.query_with_scores(query, 8, {"doc_type": {"$ne": "guide"}})
+
+    scores = [score for _, score in results]
+    assert len(results) == 8 and scores == sorted(scores, reverse=True)
+    assert all(metadata["doc_type"] == "manual" for (_, _, metadata), _ in results)
+    assert len(set(factory.queried)) == 4
+
+
+def test_merged_order_matches_exact_search():
+    """Test the merged ranking equals an unpartitioned exact search.
+
+    Runs on the exact NumPy index only; Chroma's HNSW results are approximate.
+    """
+    query = np.random.default_rng(1).normal(size=16).tolist()
+    flat = NumpyVectorStore(ivf_lists=0)
+    fill(flat)
+    store = PartitionedVectorStore("equipment_type", lambda name: NumpyVectorStore(ivf_lists=0))
+    fill(store)
+
+    expected = [chunk_id for chunk_id, _, _ in flat.query(query, 8, {"doc_type": {"$ne": "guide"}})]
+    results = store.query(query, 8, {"doc_type": {"$ne": "guide"}})
+
+    assert [chunk_id for chunk_id, _, _ in results] == expected
+
+
+def test_delete_updates_routes(factory):
+    """Test deleted chunks leave their partition and its routes."""
+    store = PartitionedVectorStore("equipment_type", factory)
+    fill(store, count=5)
+
+    store.delete(["c2"])
+
+    assert store.query(np.ones(16).tolist(), 5, {"equipment_id": "TURB-003"}) == []
+    assert store.ids_for_sources({"doc2.pdf", "doc3.pdf"}) == {"c3"}
+
+
+def test_reopens_existing_partitions(tmp_path):
+    """Test persisted partitions and their routes are restored."""
+    def create(name):
+        return NumpyVectorStore(path=str(tmp_path / name), ivf_lists=0)
+
+    store = PartitionedVectorStore("equipment_type", create)
+    fill(store)
+    store.save()
+
+    reopened = PartitionedVectorStore("equipment_type", create, ["compressor", "pump", "shared", "turbine"])
+
+    assert reopened.count() == 40
+    results = reopened.query(np.ones(16).tolist(), 20, {"equipment_id": "PUMP-009"})
+    assert len(results) == 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,246 @@
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.rag.pipeline import RAGPipeline
+
+
+@pytest.fixture(params=["chroma", "numpy"])
+def rag(request, monkeypatch, tmp_path):
+    """RAG pipeline on fake embeddings with an isolated collection, for each vector backend."""
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", request.param)
+    monkeypatch.setattr(settings, "NUMPY_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIRECTORY", None)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", None)
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+    return RAGPipeline()
+
+
+def make_doc(source, content, equipment_id="PUMP-007"):
+    """Build a document in the ingestion format."""
+    return {"content": content, "metadata": {"equipment_id": equipment_id}, "source": source}
+
+
+def test_reingesting_is_idempotent(rag):
+    """Test re-adding the same documents adds no chunks."""
+    docs = [make_doc("pump.pdf", "Pump manual. " * 200), make_doc("turbine.pdf", "Turbine guide.")]
+
+    first = rag.add_documents(docs)
+    version = rag.collection_version
+    second = rag.add_documents(docs)
+
+    assert first["added"] > 0
+    assert second == {**first, "added": 0, "unchanged": first["added"], "deleted": 0}
+    assert rag.collection_version == version
+    assert rag.store.count() == first["added"]
+
+
+def test_content_fingerprint_tracks_stored_chunks(rag):
+    """Test the fingerprint depends on the stored chunks, not on ingestion order or counters."""
+    empty = rag.content_fingerprint()
+    rag.add_documents([make_doc("pump.pdf", "Check the seals."), make_doc("turbine.pdf", "Turbine guide.")])
+    both = rag.content_fingerprint()
+
+    rag.add_documents([make_doc("pump.pdf", "Check the bearings.")])
+    assert rag.content_fingerprint() not in (empty, both)
+
+    rag.add_documents([make_doc("pump.pdf", "Check the seals.")])
+    assert rag.content_fingerprint() == both
+
+
+def test_lexical_index_restored_from_snapshot(rag, monkeypatch):
+    """Test a restart loads saved postings and only tokenizes chunks added since the save."""
+    if settings.VECTOR_BACKEND == "chroma":
+        pytest.skip("Chroma persists only with a directory; the snapshot logic is shared")
+    rag.add_documents([make_doc("pump.pdf", "Check the seals."), make_doc("turbine.pdf", "Turbine guide.")])
+    rag.save_index()
+    rag.add_documents([make_doc("pump.pdf", "Check the bearings."), make_doc("valve.pdf", "Valve manual.")])
+    rag.save_index(lexical=False)
+
+    restarted = RAGPipeline()
+
+    assert restarted.startup_timings["lexical_index_source"] == "snapshot"
+    assert restarted.startup_timings["lexical_chunks_tokenized"] == 2
+    assert sorted(restarted.bm25.chunk_ids()) == sorted(rag.bm25.chunk_ids())
+    assert restarted.bm25.search("seals") == []
+    assert restarted.bm25.search("turbine") == rag.bm25.search("turbine")
+
+
+def test_changed_source_replaces_only_delta(rag):
+    """Test a changed source upserts new chunks and deletes vanished ones."""
+    rag.add_documents([make_doc("pump.pdf", "Check the seals."), make_doc("turbine.pdf", "Turbine guide.")])
+
+    report = rag.add_documents([make_doc("pump.pdf", "Check the bearings.")])
+
+    assert report["added"] == 1
+    assert report["deleted"] == 1
+    stored = [text for _, text, _ in rag.store.iter_chunks()]
+    assert sorted(stored) == ["Check the bearings.", "Turbine guide."]
+
+
+def test_embedding_batches_retry_failures(rag, monkeypatch):
+    """Test chunks are embedded in batches and only failed batches are retried."""
+    monkeypatch.setattr(settings, "INGEST_EMBEDDING_BATCH_SIZE", 2)
+    monkeypatch.setattr("app.rag.pipeline.EMBEDDING_RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+    embed = rag.embeddings.embed_documents
+
+    def flaky(texts):
+        calls.append(list(texts))
+        if texts[0] == "doc 0" and calls.count(list(texts)) == 1:
+            raise RuntimeError("rate limited")
+        return embed(texts)
+
+    monkeypatch.setattr(rag.embeddings, "embed_documents", flaky)
+    report = rag.add_documents([make_doc(f"doc{i}.pdf", f"doc {i}") for i in range(5)])
+
+    assert report["added"] == 5
+    assert report["failed"] == 0
+    assert len(calls) == 4
+    assert max(len(batch) for batch in calls) == 2
+
+
+def test_exhausted_retries_skip_batch(rag, monkeypatch):
+    """Test a batch that keeps failing is reported and picked up by a re-run."""
+    monkeypatch.setattr(settings, "INGEST_EMBEDDING_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "INGEST_EMBEDDING_MAX_RETRIES", 1)
+    monkeypatch.setattr("app.rag.pipeline.EMBEDDING_RETRY_BACKOFF_SECONDS", 0)
+    embed = rag.embeddings.embed_documents
+
+    def failing(texts):
+        if texts == ["doc 1"]:
+            raise RuntimeError("provider error")
+        return embed(texts)
+
+    docs = [make_doc(f"doc{i}.pdf", f"doc {i}") for i in range(3)]
+    monkeypatch.setattr(rag.embeddings, "embed_documents", failing)
+    report = rag.add_documents(docs)
+    assert report["added"] == 2
+    assert report["failed"] == 1
+
+    monkeypatch.setattr(rag.embeddings, "embed_documents", embed)
+    assert rag.add_documents(docs)["added"] == 1
+
+
+def test_hybrid_search_finds_exact_identifiers(rag):
+    """Test hybrid search surfaces the chunk with an exact part number."""
+    rag.add_documents([
+        make_doc("bearings.pdf", "Replace worn bearings and check alignment."),
+        make_doc("parts.pdf", "Spare part BRG-6205 fits the drive end."),
+        make_doc("turbine.pdf", "Trip at 550°F exhaust temperature.", equipment_id="TURB-003")
+    ])
+
+    assert rag.search("BRG-6205 bearing", k=1)[0]["source"] == "parts.pdf"
+    filtered = rag.search("550°F trip", k=3, filter_dict={"equipment_id": "PUMP-007"})
+    assert filtered
+    assert all(doc["metadata"]["equipment_id"] == "PUMP-007" for doc in filtered)
+
+
+def test_lexical_query_skips_embedding(rag, monkeypatch):
+    """Test identifier-only queries do not call the embedding model."""
+    rag.add_documents([make_doc("parts.pdf", "Spare part BRG-6205 fits the drive end.")])
+    monkeypatch.setattr(rag.embeddings, "embed_query", lambda text: pytest.fail("embedded a lexical query"))
+
+    assert rag.search("BRG-6205", k=1)[0]["source"] == "parts.pdf"
+
+
+def test_lexical_index_rebuilt_from_collection(rag):
+    """Test a new pipeline on an existing collection indexes its chunks lexically."""
+    rag.add_documents([make_doc("parts.pdf", "Spare part BRG-6205 fits the drive end.")])
+    rag.store.save()
+
+    reopened = RAGPipeline()
+    assert reopened.search("BRG-6205", k=1, mode="lexical")[0]["source"] == "parts.pdf"
+
+
+def test_repeated_search_served_from_cache(rag, monkeypatch):
+    """Test identical searches skip retrieval until the collection changes."""
+    rag.add_documents([make_doc("pump.pdf", "Check the pump seals.")])
+    first = rag.search_equipment_docs("pump seals", "PUMP-007", k=2)
+
+    embed_query = rag.embeddings.embed_query
+    monkeypatch.setattr(rag.embeddings, "embed_query", lambda text: pytest.fail("re-embedded a cached query"))
+    assert rag.search_equipment_docs("Pump seals?", "PUMP-007", k=2) == first
+    assert rag.result_cache.get_stats()["hits"] == 1
+
+    monkeypatch.setattr(rag.embeddings, "embed_query", embed_query)
+    rag.add_documents([make_doc("seals.pdf", "Seal kit for the pump.")])
+    assert len(rag.search_equipment_docs("pump seals", "PUMP-007", k=2)) == 2
+
+
+@pytest.mark.parametrize("backend", ["chroma", "numpy"])
+def test_restart_loads_index_without_embedding(backend, monkeypatch, tmp_path):
+    """Test a restarted pipeline serves the persisted index without embedding calls."""
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", backend)
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "NUMPY_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", None)
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+
+    rag = RAGPipeline()
+    rag.add_documents([make_doc("parts.pdf", "Spare part BRG-6205 fits the drive end.")])
+    rag.save_index()
+
+    restarted = RAGPipeline()
+    assert restarted.startup_timings["chunks"] == 1
+    assert restarted.add_documents([make_doc("parts.pdf", "Spare part BRG-6205 fits the drive end.")])["added"] == 0
+    assert restarted.embeddings.get_stats()["misses"] == 0
+
+
+
+def test_compound_filters_apply_in_every_mode(rag):
+    """Test equipment lists, doc type and date ranges filter vector and lexical results alike."""
+    rag.add_documents([
+        {"content": "Bearing replacement for the pump.", "source": "pump.pdf",
+         "metadata": {"equipment_id": "PUMP-007", "doc_type": "manual", "date": "2024-03-01"}},
+        {"content": "Bearing inspection for the turbine.", "source": "turbine.pdf",
+         "metadata": {"equipment_id": "TURB-003", "doc_type": "manual", "date": "2023-06-01"}},
+        {"content": "Bearing noise bulletin for the compressor.", "source": "comp.pdf",
+         "metadata": {"equipment_id": "COMP-001", "doc_type": "bulletin", "date": "2024-05-01"}},
+    ])
+    filter_dict = {
+        "equipment_id": {"$in": ["PUMP-007", "TURB-003"]},
+        "doc_type": "manual",
+        "date": {"$gte": "2024-01-01"}
+    }
+
+    for mode in ("vector", "lexical", "hybrid"):
+        results = rag.search("bearing", k=5, filter_dict=filter_dict, mode=mode)
+        assert [result["source"] for result in results] == ["pump.pdf"]
+
+    results = rag.search_equipment_docs("bearing", ["COMP-001", "TURB-003"], k=5)
+    assert sorted(result["source"] for result in results) == ["comp.pdf", "turbine.pdf"]
+    with pytest.raises(ValueError):
+        rag.search("bearing", filter_dict={"date": {"$gte": "recently"}})
+
+
+@pytest.mark.parametrize("backend", ["chroma", "numpy"])
+def test_partitioned_index_reopens_and_routes(backend, monkeypatch, tmp_path):
+    """Test a partitioned index persists per partition and routes filtered searches."""
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", backend)
+    monkeypatch.setattr(settings, "VECTOR_PARTITION_KEY", "equipment_type")
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "NUMPY_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", None)
+    monkeypatch.setattr(settings, "COLLECTION_NAME", f"test_{uuid.uuid4().hex}")
+
+    rag = RAGPipeline()
+    rag.add_documents([
+        {"content": "Pump seal kit.", "source": "pump.pdf", "metadata": {"equipment_type": "Pump"}},
+        {"content": "Turbine blade inspection.", "source": "turbine.pdf", "metadata": {"equipment_type": "Turbine"}},
+        {"content": "General vibration guide.", "source": "guide.pdf", "metadata": {}},
+    ])
+    rag.save_index()
+
+    restarted = RAGPipeline()
+    assert restarted.store.get_stats()["partitions"] == {"pump": 1, "shared": 1, "turbine": 1}
+    results = restarted.search("inspection", k=5, filter_dict={"equipment_type": "Turbine"}, mode="vector")
+    assert [result["source"] for result in results] == ["turbine.pdf"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
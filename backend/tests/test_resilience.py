@@ -0,0 +1,157 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.agents.resilience import CircuitBreaker, HedgedCaller, LatencyTracker, LLMUnavailable
+
+
+@pytest.fixture
+def executor():
+    """Thread pool for the hedged calls."""
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=False)
+
+
+def test_latency_tracker_needs_min_samples():
+    """Test percentiles are only reported once enough samples exist."""
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record(0.1)
+    assert tracker.percentile(95) is None
+
+    tracker.record(0.2)
+    tracker.record(0.3)
+    assert tracker.percentile(95) == 0.3
+
+
+def test_hedge_wins_against_straggler(executor):
+    """Test a duplicate request is sent after the hedge delay and its result used."""
+    caller = HedgedCaller(executor, CircuitBreaker(), hedge_percentile=95, hedge_min_delay=0.05)
+    for _ in range(20):
+        caller._tracker("node").record(0.01)
+
+    delays = iter([1.0, 0.0])
+    result = caller.call("node", lambda: time.sleep(next(delays)) or "ok", timeout=2.0)
+
+    assert result == "ok"
+    stats = caller.get_stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_timeout_raises_unavailable(executor):
+    """Test a call slower than its timeout raises LLMUnavailable."""
+    caller = HedgedCaller(executor, CircuitBreaker(), hedge_percentile=0)
+
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        caller.call("node", lambda: time.sleep(0.5), timeout=0.1)
+
+    assert time.monotonic() - start < 0.4
+    assert caller.get_stats()["timeouts"] == 1
+
+
+def test_timeouts_count_toward_latency_percentiles(executor):
+    """Test timed-out attempts are recorded, so the hedge delay sees the tail."""
+    caller = HedgedCaller(executor, CircuitBreaker(), hedge_percentile=0)
+
+    with pytest.raises(LLMUnavailable):
+        caller.call("node", lambda: time.sleep(0.3), timeout=0.1)
+
+    assert caller._tracker("node")._samples[0] >= 0.1
+
+
+def test_circuit_opens_after_failures(executor):
+    """Test the breaker rejects calls after repeated failures and recovers after reset."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.1)
+    caller = HedgedCaller(executor, breaker, hedge_percentile=0)
+
+    def failing():
+        raise RuntimeError("provider down")
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            caller.call("node", failing, timeout=1.0)
+
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailable):
+        caller.call("node", lambda: "ok", timeout=1.0)
+    assert caller.get_stats()["rejected"] == 1
+
+    time.sleep(0.15)
+    assert breaker.state == "half_open"
+    assert caller.call("node", lambda: "ok", timeout=1.0) == "ok"
+    assert breaker.state == "closed"
+
+
+
+def test_stalled_stream_times_out(executor):
+    """Test a stream that stops producing chunks fails at its deadline and counts as a failure."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    caller = HedgedCaller(executor, breaker, hedge_percentile=0)
+
+    def stalling():
+        yield "first"
+        time.sleep(1.0)
+        yield "never"
+
+    received = []
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        for item in caller.stream("node", stalling, timeout=0.2):
+            received.append(item)
+
+    assert received == ["first"]
+    assert time.monotonic() - start < 0.6
+    assert caller.get_stats()["timeouts"] == 1
+    assert breaker.state == "open"
+
+
+def test_stream_relays_items_and_errors(executor):
+    """Test a completed stream closes the circuit and provider errors surface as LLMUnavailable."""
+    caller = HedgedCaller(executor, CircuitBreaker(), hedge_percentile=0)
+    assert list(caller.stream("node", lambda: iter(["a", "b"]), timeout=1.0)) == ["a", "b"]
+
+    def failing():
+        yield "a"
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(LLMUnavailable):
+        list(caller.stream("node", failing, timeout=1.0))
+
+
+def test_closed_stream_releases_half_open_trial(executor):
+    """Test a stream closed before its outcome frees the half-open trial slot."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.state == "half_open"
+    caller = HedgedCaller(executor, breaker, hedge_percentile=0)
+
+    stream = caller.stream("node", lambda: iter(["a", "b"]), timeout=1.0)
+    assert next(stream) == "a"
+    stream.close()
+
+    assert breaker.allow()
+
+
+def test_saturated_executor_rejects_calls(executor):
+    """Test calls beyond max_in_flight fail fast, counting timed-out calls still running."""
+    caller = HedgedCaller(executor, CircuitBreaker(failure_threshold=10), hedge_percentile=0, max_in_flight=1)
+
+    with pytest.raises(LLMUnavailable):
+        caller.call("node", lambda: time.sleep(0.3), timeout=0.05)
+
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable, match="in flight"):
+        caller.call("node", lambda: "ok", timeout=1.0)
+    assert time.monotonic() - start < 0.1
+    assert caller.get_stats()["rejected"] == 1
+
+    time.sleep(0.4)
+    assert caller.call("node", lambda: "ok", timeout=1.0) == "ok"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
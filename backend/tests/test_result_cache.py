@@ -0,0 +1,38 @@
+import pytest
+
+from app.rag.result_cache import SearchResultCache
+
+
+def test_key_normalizes_query():
+    """Test keys ignore case, whitespace and trailing punctuation but not filters or k."""
+    key = SearchResultCache.make_key("Pump  bearing?", 3, {"equipment_id": "PUMP-007"})
+    assert key == SearchResultCache.make_key("pump bearing", 3, {"equipment_id": "PUMP-007"})
+    assert key != SearchResultCache.make_key("pump bearing", 5, {"equipment_id": "PUMP-007"})
+    assert key != SearchResultCache.make_key("pump bearing", 3, {"equipment_id": "COMP-001"})
+
+
+def test_version_change_invalidates():
+    """Test entries from an older collection version are misses."""
+    cache = SearchResultCache()
+    cache.put("k", [{"source": "a.pdf"}], version=1)
+
+    assert cache.get("k", version=1) == [{"source": "a.pdf"}]
+    assert cache.get("k", version=2) is None
+    assert cache.get_stats()["stale"] == 1
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted first."""
+    cache = SearchResultCache(max_entries=2)
+    cache.put("a", [], 0)
+    cache.put("b", [], 0)
+    cache.get("a", 0)
+    cache.put("c", [], 0)
+
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == []
+    assert cache.get_stats()["evictions"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
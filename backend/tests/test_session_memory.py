@@ -0,0 +1,45 @@
+import pytest
+
+from app.core.tokens import estimate_tokens
+from app.agents.session_memory import SessionStore
+
+
+def test_history_includes_recent_turns():
+    """Test recent turns are returned verbatim and equipment is remembered."""
+    store = SessionStore()
+    store.add_turn("s1", "Why is PUMP-007 vibrating?", "Worn bearings. Replace them.", "PUMP-007")
+
+    history = store.get_history("s1")
+    assert "User: Why is PUMP-007 vibrating?" in history
+    assert "Assistant: Worn bearings. Replace them." in history
+    assert store.get_last_equipment_id("s1") == "PUMP-007"
+    assert store.get_history("unknown") == ""
+
+
+def test_history_stays_bounded():
+    """Test older turns are summarized and history size stays bounded."""
+    store = SessionStore(recent_turns=2, summary_max_tokens=60)
+    for i in range(50):
+        store.add_turn("s1", f"Question {i} about the turbine", f"Answer {i}. " + "detail " * 200)
+
+    history = store.get_history("s1")
+    assert "Earlier in this conversation:" in history
+    assert "Asked: Question 47 about the turbine Answer: Answer 47." in history
+    assert "Question 0 " not in history
+    assert estimate_tokens(history) < 400
+
+
+def test_lru_evicts_oldest_session():
+    """Test the least recently used session is evicted."""
+    store = SessionStore(max_sessions=2)
+    store.add_turn("a", "q", "a")
+    store.add_turn("b", "q", "a")
+    store.get_history("a")
+    store.add_turn("c", "q", "a")
+
+    assert store.get_history("b") == ""
+    assert store.get_history("a") != ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
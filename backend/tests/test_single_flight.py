@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from app.agents.single_flight import SingleFlight
+
+
+def test_make_key_normalizes_query():
+    """Test keys ignore case, whitespace and trailing punctuation."""
+    assert SingleFlight.make_key("Why is PUMP-007  vibrating?", "PUMP-007") == \
+        SingleFlight.make_key("why is pump-007 vibrating", "PUMP-007")
+    assert SingleFlight.make_key("status", "PUMP-007") != SingleFlight.make_key("status", "COMP-001")
+
+
+def test_concurrent_calls_share_execution():
+    """Test concurrent identical calls run the function once."""
+    flight = SingleFlight()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        time.sleep(0.2)
+        return {"answer": "ok"}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert results == [{"answer": "ok"}] * 5
+    assert flight.get_stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])